@@ -0,0 +1,153 @@
+"""Codec and event loop cost on representative gateway traffic.
+
+Run with: uv run python -m benchmarks.codecs [--round-trips 5000]
+
+Every installed JSON codec and ETF encode the payloads the engine sends
+(heartbeat, IDENTIFY, voice state, presence) and decode the dispatch mix
+from benchmarks.prefilter. For ETF the mix is re-encoded with snowflakes
+as integers, the way the gateway sends them. "peek" is the header
+prefilter that runs on every frame, "decode" the full decode. Then every
+installed loop and codec pair times heartbeat round trips through
+GatewayConnection over a real localhost websocket, which adds the loop
+and socket overhead on top of the codec.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import time
+from collections.abc import Callable
+from typing import Any, cast
+
+import websockets
+from websockets.asyncio.server import ServerConnection, serve
+
+from benchmarks.prefilter import build_frames
+from src.engine import etf
+from src.engine.codec import CODECS, ETF, Codec, codec_available, load_codec
+from src.engine.gateway import GatewayConnection, peek_header
+from src.engine.runner import DiscordClient
+from src.main import loop_factory
+from src.models.gateway import Opcode
+
+FRAMES = 10_000
+ROUNDS = 5
+ROUND_TRIPS = 5_000
+WARMUP = 500
+ACK: dict[str, Any] = {"t": None, "s": None, "op": Opcode.HEARTBEAT_ACK, "d": None}
+LOOPS = ("asyncio", "uvloop")
+
+
+def build_payloads(count: int) -> list[dict[str, Any]]:
+    """The engine's outgoing traffic: mostly heartbeats, some joins."""
+    client = DiscordClient("token", "online", 0, int(time.time() * 1000))
+    presence = {"op": Opcode.PRESENCE_UPDATE, "d": client.presence()}
+    payloads: list[dict[str, Any]] = [client.identify_payload(), presence]
+    for i in range(count - len(payloads)):
+        if i % 10 == 0:
+            voice = {
+                "guild_id": str(10**17 + i),
+                "channel_id": str(10**18 + i),
+                "self_mute": True,
+                "self_deaf": True,
+            }
+            payloads.append({"op": Opcode.VOICE_STATE_UPDATE, "d": voice})
+        else:
+            payloads.append({"op": Opcode.HEARTBEAT, "d": i})
+    return payloads
+
+
+def snowflakes_as_ints(value: Any) -> Any:
+    """Turn ID strings into integers, as the gateway does over ETF."""
+    if isinstance(value, dict):
+        items = cast("dict[str, Any]", value).items()
+        return {key: snowflakes_as_ints(item) for key, item in items}
+    if isinstance(value, list):
+        return [snowflakes_as_ints(item) for item in cast("list[Any]", value)]
+    if isinstance(value, str) and len(value) >= 17 and value.isdigit():
+        return int(value)
+    return value
+
+
+def best_of(func: Callable[[Any], object], items: list[Any]) -> float:
+    """Best-of CPU seconds for one pass of func over the items."""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.process_time()
+        # Results are dropped right away, like frames once they are sent
+        for item in items:
+            func(item)
+        best = min(best, time.process_time() - start)
+    return best
+
+
+async def round_trips(codec: Codec, count: int) -> tuple[float, float]:
+    """Wall and CPU seconds for heartbeat round trips over localhost."""
+    ack = codec.dumps(ACK)
+
+    async def answer(ws: ServerConnection) -> None:
+        async for _ in ws:
+            await ws.send(ack, text=codec.text)
+
+    async with serve(answer, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        async with websockets.connect(f"ws://127.0.0.1:{port}") as ws:
+            conn = GatewayConnection(ws, codec=codec)
+            for _ in range(WARMUP):
+                await conn.send_heartbeat()
+                await conn.recv()
+            start, cpu = time.perf_counter(), time.process_time()
+            for _ in range(count):
+                await conn.send_heartbeat()
+                await conn.recv()
+            return time.perf_counter() - start, time.process_time() - cpu
+
+
+def main() -> None:
+    """Run the benchmark and print one row per codec, then per loop."""
+    parser = argparse.ArgumentParser(description="Codec and event loop benchmark")
+    parser.add_argument("--round-trips", type=int, default=ROUND_TRIPS)
+    args = parser.parse_args()
+
+    codecs = [load_codec(name) for name in CODECS if codec_available(name)]
+    codecs.append(ETF)
+    payloads = build_payloads(FRAMES)
+    json_frames = build_frames(FRAMES)
+    etf_frames = [etf.encode(snowflakes_as_ints(json.loads(f))) for f in json_frames]
+    scale = 10_000 / FRAMES * 1000
+
+    print(
+        f"{'codec':>8} {'encode':>10} {'peek':>10} {'decode':>10} {'avg size':>10}"
+        "  (ms CPU per 10k)"
+    )
+    for codec in codecs:
+        frames = etf_frames if codec.encoding == "etf" else json_frames
+        encode = best_of(codec.dumps, payloads)
+        peek = best_of(codec.peek or peek_header, frames)
+        decode = best_of(codec.loads, frames)
+        size = sum(map(len, frames)) / len(frames)
+        print(
+            f"{codec.name:>8} {encode * scale:>10.2f} {peek * scale:>10.2f} "
+            f"{decode * scale:>10.2f} {size:>8.0f} B"
+        )
+
+    print(f"\n{'loop':>8} {'codec':>8} {'round trip':>12} {'CPU':>10}")
+    for loop in LOOPS:
+        if loop != "asyncio" and importlib.util.find_spec(loop) is None:
+            print(f"{loop:>8} not installed")
+            continue
+        for codec in codecs:
+            wall, cpu = asyncio.run(
+                round_trips(codec, args.round_trips),
+                loop_factory=loop_factory(loop),
+            )
+            per_trip = 1e6 / args.round_trips
+            print(
+                f"{loop:>8} {codec.name:>8} {wall * per_trip:>9.1f} us "
+                f"{cpu * per_trip:>7.1f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
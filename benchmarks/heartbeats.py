@@ -0,0 +1,65 @@
+"""Heartbeat timer wakeups and CPU: one sleep loop per connection vs the wheel.
+
+Run with: uv run python -m benchmarks.heartbeats [--connections 15,200]
+
+Every connection beats with the gateway's 41.25s interval and the
+default 1s tolerance, both scaled down 100x so a run takes seconds.
+Sends are ACKed on the next loop iteration, so only the timing cost is
+measured. A sleep loop wakes the event loop once per beat, the wheel
+once per occupied slot.
+"""
+
+import argparse
+import asyncio
+import time
+
+from src.engine.heartbeat import HEARTBEAT_TOLERANCE, Heartbeat, HeartbeatWheel
+
+SCALE = 100
+INTERVAL = 41.25 / SCALE
+TOLERANCE = HEARTBEAT_TOLERANCE / SCALE
+DURATION = 10.0
+
+
+async def measure(connections: int, wheel: HeartbeatWheel | None) -> tuple[int, float]:
+    """Beats sent and CPU seconds for the connections over DURATION."""
+    beats = 0
+
+    def heartbeat() -> Heartbeat:
+        async def send() -> None:
+            nonlocal beats
+            beats += 1
+            asyncio.get_running_loop().call_soon(beat.ack)
+
+        beat = Heartbeat(INTERVAL, send, wheel)
+        return beat
+
+    cpu = time.process_time()
+    tasks = [asyncio.create_task(heartbeat().run()) for _ in range(connections)]
+    await asyncio.sleep(DURATION)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return beats, time.process_time() - cpu
+
+
+def main() -> None:
+    """Run the benchmark and print one row per connection count and timer."""
+    parser = argparse.ArgumentParser(description="Heartbeat timer benchmark")
+    parser.add_argument("--connections", default="15,200")
+    args = parser.parse_args()
+
+    print(f"{'connections':>11} {'timer':>6} {'beats':>7} {'wakeups':>8} {'CPU':>10}")
+    for connections in map(int, args.connections.split(",")):
+        for name in ("sleep", "wheel"):
+            wheel = HeartbeatWheel(TOLERANCE) if name == "wheel" else None
+            beats, cpu = asyncio.run(measure(connections, wheel))
+            wakeups = wheel.wakeups if wheel is not None else beats
+            print(
+                f"{connections:>11} {name:>6} {beats:>7} {wakeups:>8} "
+                f"{cpu * 1000:>7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Decode CPU per 10k gateway frames, with and without the header prefilter.
+
+Run with: uv run python -m benchmarks.prefilter
+"""
+
+import json
+import random
+import time
+from collections.abc import Callable
+from typing import Any
+
+from src.engine.gateway import peek_header
+
+FRAMES = 10_000
+ROUNDS = 5
+
+# Frames the engine actually handles, everything else is dropped
+HANDLED_OPS = {1, 7, 9, 11}
+HANDLED_EVENTS = {"READY", "RESUMED"}
+
+
+def _snowflake(rng: random.Random) -> str:
+    return str(rng.randrange(10**17, 10**19))
+
+
+def _dispatch(event: str, seq: int, data: dict[str, Any]) -> bytes:
+    frame = {"t": event, "s": seq, "op": 0, "d": data}
+    return json.dumps(frame, separators=(",", ":")).encode()
+
+
+def build_frames(count: int, seed: int = 0) -> list[bytes]:
+    """Build a representative mix of gateway traffic for a joined guild."""
+    rng = random.Random(seed)
+    frames: list[bytes] = []
+    for seq in range(1, count + 1):
+        roll = rng.random()
+        guild_id = _snowflake(rng)
+        data: dict[str, Any]
+        user = {
+            "id": _snowflake(rng),
+            "username": f"user{rng.randrange(10_000)}",
+            "avatar": "a" * 32,
+            "discriminator": "0",
+            "global_name": None,
+        }
+        if roll < 0.4:
+            data = {
+                "guild_id": guild_id,
+                "user": user,
+                "status": rng.choice(["online", "idle", "dnd"]),
+                "activities": [{"name": "Game", "type": 0, "created_at": seq}],
+                "client_status": {"desktop": "online"},
+            }
+            frames.append(_dispatch("PRESENCE_UPDATE", seq, data))
+        elif roll < 0.7:
+            data = {
+                "id": _snowflake(rng),
+                "channel_id": _snowflake(rng),
+                "guild_id": guild_id,
+                "author": user,
+                "content": "hello " * rng.randrange(1, 40),
+                "timestamp": "2026-01-01T00:00:00.000000+00:00",
+                "mentions": [],
+                "attachments": [],
+                "embeds": [],
+            }
+            frames.append(_dispatch("MESSAGE_CREATE", seq, data))
+        elif roll < 0.95:
+            data = {
+                "channel_id": _snowflake(rng),
+                "guild_id": guild_id,
+                "user_id": user["id"],
+                "timestamp": seq,
+            }
+            frames.append(_dispatch("TYPING_START", seq, data))
+        else:
+            frames.append(b'{"t":null,"s":null,"op":11,"d":null}')
+    return frames
+
+
+def decode_all(frames: list[bytes]) -> int:
+    """Fully decode every frame, then route it (the unfiltered path)."""
+    handled = 0
+    for data in frames:
+        payload = json.loads(data)
+        op = payload["op"]
+        if (op == 0 and payload["t"] in HANDLED_EVENTS) or op in HANDLED_OPS:
+            handled += 1
+    return handled
+
+
+def decode_filtered(frames: list[bytes]) -> int:
+    """Peek at the envelope first and decode only handled frames."""
+    handled = 0
+    for data in frames:
+        header = peek_header(data)
+        if header is not None:
+            op, event, _ = header
+            if not ((op == 0 and event in HANDLED_EVENTS) or op in HANDLED_OPS):
+                continue
+        payload = json.loads(data)
+        op = payload["op"]
+        if (op == 0 and payload["t"] in HANDLED_EVENTS) or op in HANDLED_OPS:
+            handled += 1
+    return handled
+
+
+def measure(func: Callable[[list[bytes]], int], frames: list[bytes]) -> float:
+    """Best-of CPU seconds for one pass over the frames."""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.process_time()
+        func(frames)
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main() -> None:
+    """Run the benchmark and print CPU time per 10k frames."""
+    frames = build_frames(FRAMES)
+    assert decode_all(frames) == decode_filtered(frames)
+
+    size = sum(map(len, frames)) / len(frames)
+    full = measure(decode_all, frames)
+    filtered = measure(decode_filtered, frames)
+    scale = 10_000 / len(frames) * 1000
+
+    print(f"frames: {len(frames)} (avg {size:.0f} bytes)")
+    print(f"full decode:    {full * scale:8.2f} ms CPU per 10k frames")
+    print(f"with prefilter: {filtered * scale:8.2f} ms CPU per 10k frames")
+    print(f"speedup:        {full / filtered:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
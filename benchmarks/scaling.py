@@ -0,0 +1,215 @@
+"""Engine cost at 1, 15 and 200 servers against the local gateway stand-in.
+
+Run with: uv run python -m benchmarks.scaling [--servers 1,15,200]
+
+For every server count the stand-in (tests.fakes.gateway) and the engine
+run in separate processes, so the numbers only cover the engine. Reports
+time until every server is connected, RSS per connection, CPU per
+heartbeat and how long all servers take to come back after every socket
+is dropped (this includes the first reconnect backoff of ~1s).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+from urllib.parse import urlsplit
+
+HEARTBEAT_INTERVAL = 1000
+WINDOW = 5.0
+POLL = 0.05
+TIMEOUT = 120.0
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak instead of current, in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def free_port() -> int:
+    """Ask the OS for a port nobody is listening on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def http_get(host: str, port: int, path: str) -> str:
+    """Minimal HTTP/1.0 GET, returns the body."""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.0\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return response.partition(b"\r\n\r\n")[2].decode()
+
+
+class Scrape:
+    """The figures the benchmark needs from /metrics."""
+
+    def __init__(self, text: str) -> None:
+        self.connected = 0
+        self.reconnects = 0
+        self.heartbeats = 0
+        for line in text.splitlines():
+            name, _, value = line.rpartition(" ")
+            if name.startswith("discord_streak_connection_state{") and (
+                'state="connected"' in name
+            ):
+                self.connected += int(value)
+            elif name.startswith("discord_streak_reconnects_total{"):
+                self.reconnects += int(value)
+            elif name.startswith("discord_streak_heartbeat_rtt_seconds_count{"):
+                self.heartbeats += int(value)
+
+
+async def measure(servers: int, gateway: str, window: float) -> dict[str, Any]:
+    """Run run_all against the stand-in and take measurements."""
+    health_port = free_port()
+    pairs = ",".join(f"{i + 1}:{i + 1001}" for i in range(servers))
+    os.environ.update(
+        {
+            "DISCORD_TOKEN": "token",
+            "DISCORD_SERVERS": pairs,
+            "DISCORD_GATEWAY_BASE_URL": gateway,
+            # The 5s identify window would otherwise dominate at 200 servers
+            "DISCORD_IDENTIFY_CONCURRENCY": str(servers),
+            "DISCORD_HEALTH_PORT": str(health_port),
+            "DISCORD_LEDGER": "false",
+            "DISCORD_LOG_LEVEL": "error",
+        }
+    )
+
+    from src.engine.runner import run_all
+    from src.models.config import Settings
+
+    settings = Settings()  # pyright: ignore[reportCallIssue]
+
+    async def scrape() -> Scrape:
+        return Scrape(await http_get("127.0.0.1", health_port, "/metrics"))
+
+    async def poll(done: Callable[[Scrape], bool]) -> None:
+        async with asyncio.timeout(TIMEOUT):
+            while True:
+                with contextlib.suppress(OSError):
+                    if done(await scrape()):
+                        return
+                await asyncio.sleep(POLL)
+
+    rss_before = rss_bytes()
+    start = time.monotonic()
+    task = asyncio.create_task(run_all(settings))
+    try:
+        await poll(lambda m: m.connected == servers)
+        connected_after = time.monotonic() - start
+        rss_per_connection = (rss_bytes() - rss_before) / servers
+
+        beats_before = (await scrape()).heartbeats
+        cpu_before = time.process_time()
+        await asyncio.sleep(window)
+        cpu = time.process_time() - cpu_before
+        beats = (await scrape()).heartbeats - beats_before
+
+        gateway_url = urlsplit(gateway)
+        assert gateway_url.hostname is not None and gateway_url.port is not None
+        dropped_at = time.monotonic()
+        await http_get(gateway_url.hostname, gateway_url.port, "/_control/drop")
+        await poll(lambda m: m.reconnects >= servers and m.connected == servers)
+        reconnect = time.monotonic() - dropped_at
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    return {
+        "servers": servers,
+        "connected_after": connected_after,
+        "rss_per_connection": rss_per_connection,
+        "cpu_per_heartbeat": cpu / beats if beats else float("nan"),
+        "heartbeats": beats,
+        "reconnect": reconnect,
+    }
+
+
+def run_worker(servers: int, interval: int, window: float) -> dict[str, Any]:
+    """Start a stand-in and a measuring engine process for one server count."""
+    gateway = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "tests.fakes.gateway",
+            "--heartbeat-interval",
+            str(interval),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert gateway.stdout is not None
+        url = gateway.stdout.readline().strip()
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.scaling",
+                "--worker",
+                str(servers),
+                "--gateway",
+                url,
+                "--window",
+                str(window),
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return json.loads(result.stdout.splitlines()[-1])
+    finally:
+        gateway.terminate()
+        gateway.wait()
+
+
+def main() -> None:
+    """Run the benchmark and print one row per server count."""
+    parser = argparse.ArgumentParser(description="Engine scaling benchmark")
+    parser.add_argument("--servers", default="1,15,200", help="comma-separated")
+    parser.add_argument("--interval", type=int, default=HEARTBEAT_INTERVAL, help="ms")
+    parser.add_argument("--window", type=float, default=WINDOW, help="seconds")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--gateway", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        result = asyncio.run(measure(args.worker, args.gateway, args.window))
+        print(json.dumps(result))
+        return
+
+    print(
+        f"{'servers':>8} {'all connected':>14} {'RSS/conn':>10} "
+        f"{'CPU/heartbeat':>14} {'reconnect':>10}"
+    )
+    for servers in (int(count) for count in args.servers.split(",")):
+        r = run_worker(servers, args.interval, args.window)
+        print(
+            f"{r['servers']:>8} {r['connected_after']:>12.2f} s "
+            f"{r['rss_per_connection'] / 1024:>6.1f} KiB "
+            f"{r['cpu_per_heartbeat'] * 1e6:>11.1f} us "
+            f"{r['reconnect']:>8.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Soak run_server_client against a chaotic gateway and look for leaks.
+
+Run with: uv run python -m benchmarks.soak [--servers 5] [--duration 300]
+
+The gateway stand-in runs in its own process with fault injection on a
+seeded schedule. Time is compressed by --time-scale: heartbeat interval,
+reconnect backoff, identify window and fault rate all shrink together,
+so five minutes at the default scale of 0.05 cover about 100 minutes of
+bad network. Reports recovery-time percentiles and disconnected time
+per server in wall-clock seconds, and fails when tasks outlive their
+clients or traced memory grows with the number of reconnects.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any
+from unittest.mock import patch
+from urllib.parse import urlsplit
+
+from src.engine import runner
+from src.engine.breaker import FAILURE_WINDOW, RELEASE_STAGGER, CircuitBreaker
+from src.engine.scheduler import IDENTIFY_WINDOW, IdentifyScheduler
+from src.models.config import Settings
+from src.models.results import ConnectionState, SessionState
+from src.utils import configure
+
+# Discord's real heartbeat interval and mean seconds between faults per socket
+HEARTBEAT_INTERVAL = 41250
+FAULT_INTERVAL = 20.0
+# Seconds between memory samples, and before sampling starts
+SAMPLE_INTERVAL = 1.0
+WARMUP = 30.0
+# Seconds closing sockets get before leftover tasks count as leaked
+SETTLE = 1.0
+# Fail when traced memory grows faster than this per 1000 reconnects
+LEAK_BYTES_PER_1000 = 512 * 1024
+
+
+class Recovery:
+    """Disconnected time and recovery durations for one server."""
+
+    def __init__(self, started: float) -> None:
+        self.down_since: float | None = started
+        self.disconnected = 0.0
+        self.recoveries: list[float] = []
+
+    def transition(self, state: ConnectionState) -> None:
+        """Track a session state change."""
+        now = time.monotonic()
+        if state == ConnectionState.CONNECTED:
+            if self.down_since is not None:
+                outage = now - self.down_since
+                self.recoveries.append(outage)
+                self.disconnected += outage
+                self.down_since = None
+        elif self.down_since is None:
+            self.down_since = now
+
+    def finish(self) -> None:
+        """Count an outage still in progress at the end of the run."""
+        if self.down_since is not None:
+            self.disconnected += time.monotonic() - self.down_since
+            self.down_since = None
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile, NaN for no values."""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+async def fetch_stats(gateway: str) -> dict[str, Any]:
+    """Read the stand-in's counters."""
+    url = urlsplit(gateway)
+    assert url.hostname is not None and url.port is not None
+    reader, writer = await asyncio.open_connection(url.hostname, url.port)
+    writer.write(b"GET /_control/stats HTTP/1.0\r\n\r\n")
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return json.loads(response.partition(b"\r\n\r\n")[2])
+
+
+async def soak(
+    gateway: str, servers: int, duration: float, scale: float, report: float
+) -> bool:
+    """Run the soak, print the report and return whether it passed."""
+    os.environ.update(
+        {
+            "DISCORD_TOKEN": "token",
+            "DISCORD_SERVERS": ",".join(f"{i + 1}:{i + 1001}" for i in range(servers)),
+            "DISCORD_GATEWAY_BASE_URL": gateway,
+            "DISCORD_LOG_LEVEL": "error",
+        }
+    )
+    settings = Settings()  # pyright: ignore[reportCallIssue]
+    configure(settings.log_level, settings.log_format)
+    scheduler = IdentifyScheduler(1, IDENTIFY_WINDOW * scale)
+    breaker = CircuitBreaker(3, FAILURE_WINDOW * scale, RELEASE_STAGGER * scale)
+
+    start = time.monotonic()
+    recoveries = [Recovery(start) for _ in range(servers)]
+    tasks: list[asyncio.Task[None]] = []
+    for i, server in enumerate(settings.servers):
+        session = SessionState(server_index=i)
+        tracker = recoveries[i]
+        session.attach(lambda _, state, tracker=tracker: tracker.transition(state))
+        tasks.append(
+            asyncio.create_task(
+                runner.run_server_client(
+                    settings, server, session, 0, scheduler, breaker
+                )
+            )
+        )
+
+    # (reconnect cycles, traced bytes) once a second after warm-up
+    samples: list[tuple[float, float]] = []
+    next_report = report
+    print(f"{'elapsed':>8} {'reconnects':>10} {'tasks':>6} {'traced':>10}")
+    while (elapsed := time.monotonic() - start) < duration:
+        await asyncio.sleep(min(SAMPLE_INTERVAL, duration - elapsed))
+        elapsed = time.monotonic() - start
+        cycles = sum(len(r.recoveries) for r in recoveries)
+        gc.collect()
+        traced = tracemalloc.get_traced_memory()[0]
+        if elapsed >= min(WARMUP, duration / 2):
+            samples.append((cycles, traced))
+        if elapsed >= next_report:
+            next_report += report
+            live = len(asyncio.all_tasks())
+            print(f"{elapsed:>7.0f}s {cycles:>10} {live:>6} {traced / 1024:>7.0f} KiB")
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for tracker in recoveries:
+        tracker.finish()
+    # Give closing sockets a moment, anything still running after that leaked
+    await asyncio.sleep(SETTLE)
+    leftover = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    faults = (await fetch_stats(gateway))["faults"]
+    print(f"\nfaults injected: {json.dumps(faults, sort_keys=True)}")
+
+    # The first connect of every server is not a recovery
+    outages = [outage for r in recoveries for outage in r.recoveries[1:]]
+    print(f"recoveries: {len(outages)}")
+    for q in (50, 90, 99):
+        print(f"  p{q}: {percentile(outages, q):7.2f}s")
+    if outages:
+        print(f"  max: {max(outages):7.2f}s  mean: {statistics.mean(outages):.2f}s")
+
+    total = time.monotonic() - start
+    print("disconnected time per server:")
+    for i, tracker in enumerate(recoveries):
+        share = tracker.disconnected / total * 100
+        print(f"  [Server {i + 1}] {tracker.disconnected:8.1f}s ({share:4.1f}%)")
+
+    passed = not leftover
+    print(f"tasks left after shutdown: {len(leftover)}")
+    for task in leftover:
+        print(f"  {task.get_coro()!r}")
+
+    cycles = [c for c, _ in samples]
+    if len(samples) < 2 or cycles[0] == cycles[-1]:
+        print("too few reconnects after warm-up to check memory growth")
+    else:
+        # Growth that tracks the number of reconnects is a per-connection leak
+        slope = statistics.linear_regression(cycles, [t for _, t in samples]).slope
+        print(f"traced memory: {slope * 1000 / 1024:+.1f} KiB per 1000 reconnects")
+        passed = passed and slope * 1000 <= LEAK_BYTES_PER_1000
+    print("PASS" if passed else "FAIL")
+    return passed
+
+
+def main() -> None:
+    """Start the chaotic stand-in and soak the engine against it."""
+    parser = argparse.ArgumentParser(description="Engine soak under fault injection")
+    parser.add_argument("--servers", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=300.0, help="seconds")
+    parser.add_argument("--time-scale", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", type=float, default=30.0, help="seconds")
+    args = parser.parse_args()
+    scale: float = args.time_scale
+
+    gateway = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "tests.fakes.gateway",
+            "--chaos",
+            "--seed",
+            str(args.seed),
+            "--heartbeat-interval",
+            str(int(HEARTBEAT_INTERVAL * scale)),
+            "--fault-interval",
+            str(FAULT_INTERVAL * scale),
+            "--max-delay",
+            str(2.0 * scale),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert gateway.stdout is not None
+        url = gateway.stdout.readline().strip()
+        tracemalloc.start()
+        low, high = runner.INVALID_SESSION_DELAY
+        with (
+            patch.object(runner, "BASE_DELAY", runner.BASE_DELAY * scale),
+            patch.object(runner, "MAX_DELAY", runner.MAX_DELAY * scale),
+            patch.object(runner, "INVALID_SESSION_DELAY", (low * scale, high * scale)),
+            contextlib.suppress(KeyboardInterrupt),
+        ):
+            passed = asyncio.run(
+                soak(url, args.servers, args.duration, scale, args.report)
+            )
+            sys.exit(0 if passed else 1)
+    finally:
+        gateway.terminate()
+        gateway.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Import time from process start to the first gateway connect.
+
+Run with: uv run python -m benchmarks.startup [--budget MS]
+
+Imports everything `python -m src` needs before opening its first socket
+under -X importtime and reports the median total, the heaviest packages
+and whether anything that should load lazily slipped in. Exits non-zero
+when the median goes over the budget.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+ROUNDS = 7
+BUDGET_MS = 400.0
+
+# Modules loaded before the first connect (websockets imports its client lazily)
+STARTUP_IMPORTS = "import src.main, websockets.asyncio.client"
+# Packages to break out in the report
+PACKAGES = ("pydantic", "pydantic_settings", "websockets", "colorama", "src")
+# Only needed once REST validation runs, never before the first connect
+LAZY = ("httpx",)
+
+
+def sample() -> dict[str, int]:
+    """Import the startup modules in a fresh interpreter.
+
+    Returns self time in microseconds per top-level package.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_IMPORTS],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    totals: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, _, name = line.removeprefix("import time:").split("|")
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0) + int(own)
+    return totals
+
+
+def main() -> None:
+    """Run the benchmark and print import time per package."""
+    parser = argparse.ArgumentParser(description="Startup import time budget")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="ms")
+    args = parser.parse_args()
+
+    samples = [sample() for _ in range(ROUNDS)]
+    runs = sorted(samples, key=lambda totals: sum(totals.values()))
+    median = runs[len(runs) // 2]
+    total = statistics.median(sum(totals.values()) for totals in samples) / 1000
+
+    print(f"total import time: {total:8.2f} ms (median of {ROUNDS})")
+    for package in PACKAGES:
+        print(f"  {package:<18} {median.get(package, 0) / 1000:8.2f} ms")
+
+    loaded = [package for package in LAZY if package in median]
+    if loaded:
+        print(f"imported before first connect: {', '.join(loaded)}")
+        sys.exit(1)
+    if total > args.budget:
+        print(f"over budget: {total:.2f} ms > {args.budget:.2f} ms")
+        sys.exit(1)
+    print(f"budget:            {args.budget:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
 """Core engine for Discord client and server management."""
 
-from src.engine.runner import DiscordClient, HealthServer, run_all
+from src.engine.health import HealthRegistry, HealthServer
+from src.engine.metrics import Metrics
+from src.engine.presence import PresenceManager
+from src.engine.runner import DiscordClient, Engine, run_all
 
 __all__ = [
     "DiscordClient",
+    "Engine",
+    "HealthRegistry",
     "HealthServer",
+    "Metrics",
+    "PresenceManager",
     "run_all",
 ]
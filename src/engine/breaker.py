@@ -0,0 +1,122 @@
+"""Circuit breaker shared by every gateway client."""
+
+import asyncio
+import time
+from collections import deque
+from enum import StrEnum
+from typing import Final
+
+from src.utils.logger import log
+
+# Failures older than this are not considered correlated
+FAILURE_WINDOW: Final[float] = 30.0
+# Delay between clients released after a successful probe
+RELEASE_STAGGER: Final[float] = 0.5
+
+
+class BreakerState(StrEnum):
+    """Circuit breaker state enumeration."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stops reconnect storms when many clients fail at once.
+
+    Once failures from `threshold` different clients land within the
+    failure window, the circuit opens. While open, a single client is let
+    through as a probe and everyone else waits. When any client connects
+    again the circuit closes and the waiting clients are released one by
+    one, `stagger` seconds apart.
+    """
+
+    def __init__(
+        self,
+        threshold: int = 3,
+        window: float = FAILURE_WINDOW,
+        stagger: float = RELEASE_STAGGER,
+    ) -> None:
+        self.threshold = threshold
+        self.window = window
+        self.stagger = stagger
+        self.state = BreakerState.CLOSED
+        self.probe: int | None = None
+        self._failures: deque[tuple[float, int]] = deque()
+        self._waiters: dict[int, asyncio.Future[None]] = {}
+
+    async def wait(self, client_index: int) -> None:
+        """Wait until this client is allowed to attempt a connection."""
+        if self.state == BreakerState.CLOSED:
+            return
+        if self.probe is None or self.probe == client_index:
+            # Nobody is probing, this client checks if the network is back
+            self.state = BreakerState.HALF_OPEN
+            self.probe = client_index
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[client_index] = future
+        try:
+            await future
+        finally:
+            self._waiters.pop(client_index, None)
+
+    def record_failure(self, client_index: int) -> None:
+        """Record a failed connection, opening the circuit on correlation."""
+        now = time.monotonic()
+        if self.probe == client_index:
+            # Probe failed, stay open and let the next attempt probe again
+            self.state = BreakerState.OPEN
+            self.probe = None
+            return
+
+        self._failures.append((now, client_index))
+        while self._failures and self._failures[0][0] < now - self.window:
+            self._failures.popleft()
+
+        failing = {index for _, index in self._failures}
+        if self.state == BreakerState.CLOSED and len(failing) >= self.threshold:
+            self.state = BreakerState.OPEN
+            log(
+                "warn",
+                f"Circuit open: {len(failing)} servers failed within "
+                f"{self.window:.0f}s, probing before reconnecting the rest",
+            )
+
+    def release(self, client_index: int) -> None:
+        """Forget a client that stopped, handing its probe slot on if it had it."""
+        waiter = self._waiters.pop(client_index, None)
+        if waiter is not None:
+            waiter.cancel()
+        if self.probe != client_index:
+            return
+        self.probe = None
+        self.state = BreakerState.OPEN
+        if self._waiters:
+            # The lowest waiting index probes next, like the release order
+            self.probe = min(self._waiters)
+            self.state = BreakerState.HALF_OPEN
+            _release(self._waiters[self.probe])
+
+    def record_success(self, client_index: int) -> None:
+        """Record a successful connection, closing the circuit if open."""
+        if self.state == BreakerState.CLOSED:
+            return
+
+        self.state = BreakerState.CLOSED
+        self.probe = None
+        self._failures.clear()
+
+        loop = asyncio.get_running_loop()
+        waiters = [self._waiters[index] for index in sorted(self._waiters)]
+        if waiters:
+            log("info", f"Circuit closed, releasing {len(waiters)} waiting servers")
+        for position, future in enumerate(waiters):
+            loop.call_later(position * self.stagger, _release, future)
+
+
+def _release(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,116 @@
+"""Gateway frame codecs: JSON (fastest installed first) or ETF."""
+
+import functools
+import importlib
+import importlib.util
+import json
+from collections.abc import Callable
+from typing import Any, Final, Literal, NamedTuple
+
+from src.engine import etf
+from src.models.config import Encoding
+from src.models.gateway import Opcode
+
+CodecName = Literal["auto", "orjson", "msgspec", "json"]
+
+# Opcode, event name and sequence number of a frame
+FrameHeader = tuple[int, str | None, int | None]
+
+
+class Codec(NamedTuple):
+    """Encodes payloads to frame bytes and decodes them back."""
+
+    name: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+    # Heartbeat frame for a sequence number, without building the payload
+    heartbeat: Callable[[int | None], bytes]
+    encoding: Encoding = "json"
+    # Reads the envelope without decoding "d", None means the JSON prefilter
+    peek: Callable[[bytes], FrameHeader | None] | None = None
+
+    @property
+    def text(self) -> bool:
+        """Whether frames go out as text, ETF needs binary frames."""
+        return self.encoding == "json"
+
+
+# Heartbeats are sent for the life of every socket, only "d" changes
+_JSON_HEARTBEAT: Final[bytes] = b'{"op":%d,"d":' % Opcode.HEARTBEAT
+_ETF_HEARTBEAT: Final[bytes] = (
+    bytes((etf.VERSION, etf.MAP_EXT, 0, 0, 0, 2))
+    + etf.encode_term("op")
+    + etf.encode_term(Opcode.HEARTBEAT)
+    + etf.encode_term("d")
+)
+
+
+def _json_heartbeat(sequence: int | None) -> bytes:
+    return _JSON_HEARTBEAT + (b"null" if sequence is None else b"%d" % sequence) + b"}"
+
+
+def _etf_heartbeat(sequence: int | None) -> bytes:
+    return _ETF_HEARTBEAT + etf.encode_term(sequence)
+
+
+ETF: Final[Codec] = Codec(
+    "etf", etf.encode, etf.decode, _etf_heartbeat, "etf", etf.peek_header
+)
+
+
+def _orjson() -> Codec:
+    orjson = importlib.import_module("orjson")
+    return Codec("orjson", orjson.dumps, orjson.loads, _json_heartbeat)
+
+
+def _msgspec() -> Codec:
+    msgspec_json = importlib.import_module("msgspec.json")
+    return Codec(
+        "msgspec",
+        msgspec_json.Encoder().encode,
+        msgspec_json.Decoder().decode,
+        _json_heartbeat,
+    )
+
+
+def _stdlib() -> Codec:
+    # Compact like the others, the default separators pad every key
+    encoder = json.JSONEncoder(separators=(",", ":"))
+
+    def dumps(obj: Any) -> bytes:
+        return encoder.encode(obj).encode()
+
+    return Codec("json", dumps, json.loads, _json_heartbeat)
+
+
+# Module each codec needs, in order of preference
+CODECS: Final[dict[CodecName, tuple[str, Callable[[], Codec]]]] = {
+    "orjson": ("orjson", _orjson),
+    "msgspec": ("msgspec", _msgspec),
+    "json": ("json", _stdlib),
+}
+
+
+def codec_available(name: CodecName) -> bool:
+    """Whether the codec can be loaded, without importing it."""
+    if name == "auto":
+        return True
+    return importlib.util.find_spec(CODECS[name][0]) is not None
+
+
+@functools.cache
+def load_codec(name: CodecName = "auto") -> Codec:
+    """Load a codec by name, or the fastest installed one for "auto"."""
+    if name != "auto":
+        return CODECS[name][1]()
+    for module, factory in CODECS.values():
+        if importlib.util.find_spec(module) is not None:
+            return factory()
+    return _stdlib()
+
+
+def gateway_codec(encoding: Encoding = "json", json_codec: CodecName = "auto") -> Codec:
+    """The codec for a gateway encoding, ETF or the chosen JSON codec."""
+    if encoding == "etf":
+        return ETF
+    return load_codec(json_codec)
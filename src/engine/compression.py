@@ -0,0 +1,34 @@
+"""Gateway transport compression (zlib-stream)."""
+
+import zlib
+from typing import Final
+
+# Every complete zlib-stream message ends with a Z_SYNC_FLUSH marker
+ZLIB_SUFFIX: Final[bytes] = b"\x00\x00\xff\xff"
+
+
+class ZlibStreamInflater:
+    """Streaming decompressor shared by all frames of one gateway socket.
+
+    The gateway compresses the whole connection as a single zlib stream, so
+    the inflater must live exactly as long as the socket it belongs to.
+    """
+
+    def __init__(self) -> None:
+        self._inflater = zlib.decompressobj()
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> bytes | None:
+        """Feed one frame, return the decompressed message once complete."""
+        if not self._buffer and data.endswith(ZLIB_SUFFIX):
+            # Fast path: the message fits in one frame, no copy needed
+            return self._inflater.decompress(data)
+
+        # The suffix may itself be split, so check the joined message
+        self._buffer += data
+        if not self._buffer.endswith(ZLIB_SUFFIX):
+            return None
+
+        message = self._inflater.decompress(self._buffer)
+        self._buffer.clear()
+        return message
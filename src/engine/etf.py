@@ -0,0 +1,316 @@
+"""Erlang External Term Format for the gateway's encoding=etf mode.
+
+Covers the terms the gateway exchanges: integers of any size, floats,
+atoms, binaries, lists, tuples and maps. Atoms decode to str except nil,
+true and false, which become None, True and False. Binaries decode to
+str, the gateway only sends UTF-8 text in them. Encoding follows the
+gateway's own erlpack: str and bytes become binaries, None and bools
+become atoms.
+"""
+
+import struct
+import zlib
+from typing import Any, Final, cast
+
+VERSION: Final[int] = 131
+
+NEW_FLOAT_EXT: Final[int] = 70
+COMPRESSED: Final[int] = 80
+SMALL_INTEGER_EXT: Final[int] = 97
+INTEGER_EXT: Final[int] = 98
+FLOAT_EXT: Final[int] = 99
+ATOM_EXT: Final[int] = 100
+SMALL_TUPLE_EXT: Final[int] = 104
+LARGE_TUPLE_EXT: Final[int] = 105
+NIL_EXT: Final[int] = 106
+STRING_EXT: Final[int] = 107
+LIST_EXT: Final[int] = 108
+BINARY_EXT: Final[int] = 109
+SMALL_BIG_EXT: Final[int] = 110
+LARGE_BIG_EXT: Final[int] = 111
+SMALL_ATOM_EXT: Final[int] = 115
+MAP_EXT: Final[int] = 116
+ATOM_UTF8_EXT: Final[int] = 118
+SMALL_ATOM_UTF8_EXT: Final[int] = 119
+
+_U16: Final[struct.Struct] = struct.Struct(">H")
+_U32: Final[struct.Struct] = struct.Struct(">I")
+_I32: Final[struct.Struct] = struct.Struct(">i")
+_F64: Final[struct.Struct] = struct.Struct(">d")
+
+# Atoms with a Python value of their own
+_ATOMS: Final[dict[str, Any]] = {"nil": None, "true": True, "false": False}
+_NIL: Final[bytes] = bytes((SMALL_ATOM_UTF8_EXT, 3)) + b"nil"
+_TRUE: Final[bytes] = bytes((SMALL_ATOM_UTF8_EXT, 4)) + b"true"
+_FALSE: Final[bytes] = bytes((SMALL_ATOM_UTF8_EXT, 5)) + b"false"
+
+# Opcode, event name and sequence number of a frame
+Header = tuple[int, str | None, int | None]
+
+
+def _encode_int(value: int, out: bytearray) -> None:
+    if 0 <= value <= 0xFF:
+        out += bytes((SMALL_INTEGER_EXT, value))
+    elif -(2**31) <= value < 2**31:
+        out.append(INTEGER_EXT)
+        out += _I32.pack(value)
+    else:
+        magnitude = abs(value)
+        digits = magnitude.to_bytes((magnitude.bit_length() + 7) // 8, "little")
+        if len(digits) <= 0xFF:
+            out += bytes((SMALL_BIG_EXT, len(digits), value < 0))
+        else:
+            out.append(LARGE_BIG_EXT)
+            out += _U32.pack(len(digits))
+            out.append(value < 0)
+        out += digits
+
+
+def _encode_binary(data: bytes, out: bytearray) -> None:
+    out.append(BINARY_EXT)
+    out += _U32.pack(len(data))
+    out += data
+
+
+def _encode(obj: Any, out: bytearray) -> None:
+    if isinstance(obj, str):
+        _encode_binary(obj.encode(), out)
+    elif obj is None:
+        out += _NIL
+    elif obj is True:
+        out += _TRUE
+    elif obj is False:
+        out += _FALSE
+    elif isinstance(obj, int):
+        _encode_int(obj, out)
+    elif isinstance(obj, dict):
+        mapping = cast("dict[Any, Any]", obj)
+        out.append(MAP_EXT)
+        out += _U32.pack(len(mapping))
+        for key, value in mapping.items():
+            _encode(key, out)
+            _encode(value, out)
+    elif isinstance(obj, list):
+        items = cast("list[Any]", obj)
+        if items:
+            out.append(LIST_EXT)
+            out += _U32.pack(len(items))
+            for item in items:
+                _encode(item, out)
+        out.append(NIL_EXT)
+    elif isinstance(obj, tuple):
+        elements = cast("tuple[Any, ...]", obj)
+        if len(elements) <= 0xFF:
+            out += bytes((SMALL_TUPLE_EXT, len(elements)))
+        else:
+            out.append(LARGE_TUPLE_EXT)
+            out += _U32.pack(len(elements))
+        for element in elements:
+            _encode(element, out)
+    elif isinstance(obj, float):
+        out.append(NEW_FLOAT_EXT)
+        out += _F64.pack(obj)
+    elif isinstance(obj, bytes | bytearray):
+        _encode_binary(bytes(obj), out)
+    else:
+        msg = f"Cannot encode {type(obj).__name__} as ETF"
+        raise TypeError(msg)
+
+
+def encode(obj: Any) -> bytes:
+    """Encode a value as an ETF message."""
+    out = bytearray((VERSION,))
+    _encode(obj, out)
+    return bytes(out)
+
+
+def encode_term(obj: Any) -> bytes:
+    """Encode a value without the version byte, to splice into a message."""
+    out = bytearray()
+    _encode(obj, out)
+    return bytes(out)
+
+
+def _atom(name: str) -> Any:
+    return _ATOMS.get(name, name)
+
+
+def _decode(data: bytes, pos: int) -> tuple[Any, int]:
+    """Decode the term at pos, return it and the position after it."""
+    tag = data[pos]
+    pos += 1
+    if tag == BINARY_EXT:
+        (length,) = _U32.unpack_from(data, pos)
+        pos += 4
+        return data[pos : pos + length].decode(), pos + length
+    if tag == SMALL_INTEGER_EXT:
+        return data[pos], pos + 1
+    if tag == MAP_EXT:
+        (arity,) = _U32.unpack_from(data, pos)
+        pos += 4
+        result: dict[Any, Any] = {}
+        for _ in range(arity):
+            key, pos = _decode(data, pos)
+            result[key], pos = _decode(data, pos)
+        return result, pos
+    if tag in (SMALL_ATOM_UTF8_EXT, SMALL_ATOM_EXT):
+        length = data[pos]
+        pos += 1
+        encoding = "utf-8" if tag == SMALL_ATOM_UTF8_EXT else "latin-1"
+        return _atom(data[pos : pos + length].decode(encoding)), pos + length
+    if tag in (ATOM_EXT, ATOM_UTF8_EXT):
+        (length,) = _U16.unpack_from(data, pos)
+        pos += 2
+        encoding = "utf-8" if tag == ATOM_UTF8_EXT else "latin-1"
+        return _atom(data[pos : pos + length].decode(encoding)), pos + length
+    if tag == INTEGER_EXT:
+        return _I32.unpack_from(data, pos)[0], pos + 4
+    if tag in (SMALL_BIG_EXT, LARGE_BIG_EXT):
+        if tag == SMALL_BIG_EXT:
+            length = data[pos]
+            pos += 1
+        else:
+            (length,) = _U32.unpack_from(data, pos)
+            pos += 4
+        sign = data[pos]
+        pos += 1
+        value = int.from_bytes(data[pos : pos + length], "little")
+        return -value if sign else value, pos + length
+    if tag == NIL_EXT:
+        return [], pos
+    if tag == LIST_EXT:
+        (length,) = _U32.unpack_from(data, pos)
+        pos += 4
+        items: list[Any] = []
+        for _ in range(length):
+            item, pos = _decode(data, pos)
+            items.append(item)
+        tail, pos = _decode(data, pos)
+        if tail != []:
+            msg = "Improper lists are not supported"
+            raise ValueError(msg)
+        return items, pos
+    if tag in (SMALL_TUPLE_EXT, LARGE_TUPLE_EXT):
+        if tag == SMALL_TUPLE_EXT:
+            arity = data[pos]
+            pos += 1
+        else:
+            (arity,) = _U32.unpack_from(data, pos)
+            pos += 4
+        elements: list[Any] = []
+        for _ in range(arity):
+            element, pos = _decode(data, pos)
+            elements.append(element)
+        return tuple(elements), pos
+    if tag == NEW_FLOAT_EXT:
+        return _F64.unpack_from(data, pos)[0], pos + 8
+    if tag == STRING_EXT:
+        # A list of bytes, erlpack hands it back as text
+        (length,) = _U16.unpack_from(data, pos)
+        pos += 2
+        return data[pos : pos + length].decode("latin-1"), pos + length
+    if tag == FLOAT_EXT:
+        text = data[pos : pos + 31].split(b"\x00", 1)[0]
+        return float(text), pos + 31
+    msg = f"Unsupported ETF tag {tag} at offset {pos - 1}"
+    raise ValueError(msg)
+
+
+def decode(data: bytes) -> Any:
+    """Decode an ETF message."""
+    if not data or data[0] != VERSION:
+        msg = "Not an ETF message"
+        raise ValueError(msg)
+    try:
+        if data[1] == COMPRESSED:
+            (size,) = _U32.unpack_from(data, 2)
+            data = bytes((VERSION,)) + zlib.decompress(data[6:], bufsize=size)
+        value, end = _decode(data, 1)
+    except (IndexError, TypeError, struct.error, UnicodeDecodeError, zlib.error) as e:
+        msg = f"Malformed ETF message: {e}"
+        raise ValueError(msg) from e
+    if end != len(data):
+        msg = f"Trailing data after ETF term at offset {end}"
+        raise ValueError(msg)
+    return value
+
+
+def _skip(data: bytes, pos: int) -> int:
+    """Position after the term at pos, without building any values."""
+    # Terms still to skip, containers add their elements
+    pending = 1
+    while pending:
+        pending -= 1
+        tag = data[pos]
+        pos += 1
+        if tag == BINARY_EXT:
+            pos += 4 + _U32.unpack_from(data, pos)[0]
+        elif tag == SMALL_INTEGER_EXT:
+            pos += 1
+        elif tag == MAP_EXT:
+            pending += 2 * _U32.unpack_from(data, pos)[0]
+            pos += 4
+        elif tag == LIST_EXT:
+            # Elements plus the tail
+            pending += _U32.unpack_from(data, pos)[0] + 1
+            pos += 4
+        elif tag in (SMALL_ATOM_UTF8_EXT, SMALL_ATOM_EXT):
+            pos += 1 + data[pos]
+        elif tag in (ATOM_EXT, ATOM_UTF8_EXT, STRING_EXT):
+            pos += 2 + _U16.unpack_from(data, pos)[0]
+        elif tag == INTEGER_EXT:
+            pos += 4
+        elif tag == SMALL_BIG_EXT:
+            pos += 2 + data[pos]
+        elif tag == LARGE_BIG_EXT:
+            pos += 5 + _U32.unpack_from(data, pos)[0]
+        elif tag == NIL_EXT:
+            pass
+        elif tag == SMALL_TUPLE_EXT:
+            pending += data[pos]
+            pos += 1
+        elif tag == LARGE_TUPLE_EXT:
+            pending += _U32.unpack_from(data, pos)[0]
+            pos += 4
+        elif tag == NEW_FLOAT_EXT:
+            pos += 8
+        elif tag == FLOAT_EXT:
+            pos += 31
+        else:
+            msg = f"Unsupported ETF tag {tag} at offset {pos - 1}"
+            raise ValueError(msg)
+    return pos
+
+
+def peek_header(data: bytes) -> Header | None:
+    """Read op, t and s from a frame, skipping over "d" undecoded.
+
+    The ETF counterpart of the JSON prefilter: the envelope is a map, so
+    its keys can be read while the payload is stepped over, and reading
+    stops once op, t and s are in. Returns None for anything else, the
+    caller then decodes the frame in full.
+    """
+    if len(data) < 6 or data[0] != VERSION or data[1] != MAP_EXT:
+        return None
+    fields: dict[Any, Any] = {}
+    try:
+        pos = 6
+        for _ in range(_U32.unpack_from(data, 2)[0]):
+            key, pos = _decode(data, pos)
+            if key == "d":
+                pos = _skip(data, pos)
+            else:
+                fields[key], pos = _decode(data, pos)
+                if len(fields) == 3:
+                    break
+    except (IndexError, TypeError, ValueError, struct.error):
+        return None
+
+    op, event, sequence = fields.get("op"), fields.get("t"), fields.get("s")
+    if (
+        not isinstance(op, int)
+        or not (event is None or isinstance(event, str))
+        or not (sequence is None or isinstance(sequence, int))
+    ):
+        return None
+    return op, event, sequence
@@ -0,0 +1,152 @@
+"""Gateway socket wrapper with a continuously draining receive pump."""
+
+import re
+from collections.abc import Awaitable, Callable, Mapping
+from typing import Any, Final
+
+from websockets.asyncio.client import ClientConnection
+
+from src.engine.codec import Codec, FrameHeader, load_codec
+from src.engine.compression import ZlibStreamInflater
+from src.engine.metrics import SocketStats
+from src.models.gateway import GatewayPayload, Opcode
+
+Handler = Callable[[GatewayPayload], Awaitable[None]]
+
+# The order the gateway actually uses, checked first with one anchored match
+_CANONICAL_HEADER: Final[re.Pattern[bytes]] = re.compile(
+    rb'\{"t":(null|"[A-Z0-9_]+"),"s":(null|\d+),"op":(\d+),"d":'
+)
+_HEADER_FIELD: Final[re.Pattern[bytes]] = re.compile(
+    rb'"(op|s|t)":(null|\d+|"[A-Z0-9_]+")'
+)
+_DATA_KEY: Final[bytes] = b'"d":'
+
+
+def peek_header(data: bytes) -> FrameHeader | None:
+    """Read op, t and s from a raw frame without decoding its payload.
+
+    The gateway sends the envelope fields before "d", so they can be read
+    from the prefix alone. Returns None when the frame doesn't have that
+    shape, in which case the caller must fall back to a full decode.
+    """
+    match = _CANONICAL_HEADER.match(data)
+    if match is not None:
+        event, sequence, op = match.groups()
+    else:
+        end = data.find(_DATA_KEY)
+        if end == -1:
+            return None
+        fields = dict(_HEADER_FIELD.findall(data, 0, end))
+        if len(fields) != 3:
+            return None
+        event, sequence, op = fields[b"t"], fields[b"s"], fields[b"op"]
+
+    return (
+        int(op),
+        None if event == b"null" else event[1:-1].decode(),
+        None if sequence == b"null" else int(sequence),
+    )
+
+
+class GatewayConnection:
+    """A single gateway socket and the handlers for the frames it receives.
+
+    The receive pump reads every frame as soon as it arrives and hands it to
+    the handler registered for its opcode (or event name, for dispatches).
+    Frames without a handler are dropped on the spot, so nothing accumulates
+    in memory no matter how long the connection lives.
+    """
+
+    def __init__(
+        self,
+        ws: ClientConnection,
+        *,
+        compress: bool = False,
+        sequence: int | None = None,
+        stats: SocketStats | None = None,
+        codec: Codec | None = None,
+    ) -> None:
+        self.ws = ws
+        self.codec = codec or load_codec()
+        self._peek = self.codec.peek or peek_header
+        self.sequence = sequence
+        self.stats = stats or SocketStats()
+        self.frames_dropped = 0
+        # Each socket is its own zlib stream, never reuse an inflater
+        self._inflater = ZlibStreamInflater() if compress else None
+        self._handlers: dict[int, Handler] = {}
+        self._dispatch_handlers: dict[str, Handler] = {}
+
+    def on(self, op: Opcode, handler: Handler) -> None:
+        """Register the handler for a non-dispatch opcode."""
+        self._handlers[op] = handler
+
+    def on_dispatch(self, event: str, handler: Handler) -> None:
+        """Register the handler for a dispatch event name."""
+        self._dispatch_handlers[event] = handler
+
+    async def send(self, payload: Mapping[str, Any]) -> None:
+        """Encode and send a payload."""
+        await self.send_encoded(self.codec.dumps(payload))
+
+    async def send_encoded(self, message: bytes) -> None:
+        """Send a payload already encoded with this connection's codec."""
+        self.stats.bytes_out += len(message)
+        # JSON bytes go out as a text frame as is, no str round trip
+        await self.ws.send(message, text=self.codec.text)
+
+    async def send_heartbeat(self) -> None:
+        """Send a heartbeat carrying the last sequence number."""
+        await self.send_encoded(self.codec.heartbeat(self.sequence))
+
+    def _handler_for(self, op: int, event: str | None) -> Handler | None:
+        """Look up the handler for an opcode or dispatch event."""
+        if op == Opcode.DISPATCH:
+            return self._dispatch_handlers.get(event or "")
+        return self._handlers.get(op)
+
+    async def _recv_message(self) -> bytes:
+        """Receive the next complete message as raw bytes."""
+        while True:
+            # decode=False skips UTF-8 decoding of text frames, codecs take bytes
+            message = await self.ws.recv(decode=False)
+            self.stats.bytes_in += len(message)
+            if self._inflater is None:
+                return message
+            data = self._inflater.feed(message)
+            if data is not None:
+                return data
+
+    def _decode(self, data: bytes) -> GatewayPayload:
+        """Fully decode a message and track its sequence number."""
+        payload: GatewayPayload = self.codec.loads(data)
+        if payload.get("s") is not None:
+            self.sequence = payload["s"]
+        return payload
+
+    async def recv(self) -> GatewayPayload:
+        """Receive and decode the next complete gateway message."""
+        return self._decode(await self._recv_message())
+
+    async def run(self) -> None:
+        """Drain the socket forever, routing frames to their handlers."""
+        while True:
+            data = await self._recv_message()
+
+            # Skip decoding frames nobody handles when the header allows it
+            header = self._peek(data)
+            if header is not None:
+                op, event, sequence = header
+                if self._handler_for(op, event) is None:
+                    if sequence is not None:
+                        self.sequence = sequence
+                    self.frames_dropped += 1
+                    continue
+
+            payload = self._decode(data)
+            handler = self._handler_for(payload["op"], payload["t"])
+            if handler is None:
+                self.frames_dropped += 1
+                continue
+            await handler(payload)
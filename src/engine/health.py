@@ -0,0 +1,200 @@
+"""HTTP health checks backed by live connection state."""
+
+import asyncio
+import contextlib
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from typing import Final
+
+from src.engine.metrics import CONTENT_TYPE, Metrics
+from src.models.results import ConnectionState, SessionState
+from src.utils.logger import log
+
+# A connected session counts as ready only if it was heard from this recently
+READY_MAX_AGE: Final[timedelta] = timedelta(seconds=120)
+# Seconds a connection may sit idle or take to send a request's headers
+READ_TIMEOUT: Final[float] = 5.0
+
+
+def build_response(
+    status: HTTPStatus,
+    body: str,
+    *,
+    keep_alive: bool,
+    head: bool = False,
+    content_type: str = "text/plain",
+) -> bytes:
+    """Serialize an HTTP/1.1 response."""
+    payload = body.encode()
+    connection = "keep-alive" if keep_alive else "close"
+    headers = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        f"Connection: {connection}\r\n"
+        "\r\n"
+    ).encode()
+    return headers if head else headers + payload
+
+
+class HealthRegistry:
+    """Registry of every server's session state for readiness checks."""
+
+    def __init__(self, min_ready: int = 1, max_age: timedelta = READY_MAX_AGE) -> None:
+        self.min_ready = min_ready
+        self.max_age = max_age
+        self.sessions: dict[int, SessionState] = {}
+
+    def register(self, session: SessionState) -> None:
+        """Track a server's session state."""
+        self.sessions[session.server_index] = session
+
+    def unregister(self, session: SessionState) -> None:
+        """Stop tracking a server's session state."""
+        if self.sessions.get(session.server_index) is session:
+            del self.sessions[session.server_index]
+
+    def ready_count(self) -> int:
+        """Count sessions that are connected and were heard from recently."""
+        cutoff = datetime.now() - self.max_age
+        count = 0
+        for session in self.sessions.values():
+            if session.state != ConnectionState.CONNECTED:
+                continue
+            # A fresh reconnect counts even before its first heartbeat ACK
+            seen = [
+                time
+                for time in (session.last_heartbeat, session.last_connected)
+                if time is not None
+            ]
+            if seen and max(seen) >= cutoff:
+                count += 1
+        return count
+
+
+class HealthServer:
+    """HTTP health check server.
+
+    Serves /healthz (liveness, also /), /readyz (at least min_ready servers
+    connected recently) and, when given a registry, Prometheus /metrics over
+    keep-alive connections. Health response bytes are cached and only
+    rebuilt when the readiness figures change. Connections that stay idle
+    or stall mid-request for read_timeout seconds are closed.
+    """
+
+    def __init__(
+        self,
+        port: int = 8080,
+        registry: HealthRegistry | None = None,
+        metrics: Metrics | None = None,
+        read_timeout: float = READ_TIMEOUT,
+    ) -> None:
+        self.port = port
+        self.registry = registry or HealthRegistry()
+        self.metrics = metrics
+        self.read_timeout = read_timeout
+        self._cache: dict[tuple[str, int, int, bool, bool], bytes] = {}
+
+    def _response(self, path: str, *, keep_alive: bool, head: bool) -> bytes:
+        """Return the (cached) response bytes for a request path."""
+        if path == "/metrics" and self.metrics is not None:
+            return build_response(
+                HTTPStatus.OK,
+                self.metrics.render(),
+                keep_alive=keep_alive,
+                head=head,
+                content_type=CONTENT_TYPE,
+            )
+        if path in ("/", "/healthz"):
+            key = ("live", 0, 0, keep_alive, head)
+        elif path == "/readyz":
+            key = (
+                "ready",
+                self.registry.ready_count(),
+                len(self.registry.sessions),
+                keep_alive,
+                head,
+            )
+        else:
+            key = ("missing", 0, 0, keep_alive, head)
+
+        response = self._cache.get(key)
+        if response is None:
+            response = self._render(key)
+            self._cache[key] = response
+        return response
+
+    def _render(self, key: tuple[str, int, int, bool, bool]) -> bytes:
+        kind, ready, total, keep_alive, head = key
+        if kind == "live":
+            return build_response(HTTPStatus.OK, "OK", keep_alive=keep_alive, head=head)
+        if kind == "missing":
+            return build_response(
+                HTTPStatus.NOT_FOUND, "Not Found", keep_alive=keep_alive, head=head
+            )
+        is_ready = ready >= self.registry.min_ready
+        status = HTTPStatus.OK if is_ready else HTTPStatus.SERVICE_UNAVAILABLE
+        body = f"{'READY' if is_ready else 'NOT READY'} {ready}/{total}"
+        return build_response(status, body, keep_alive=keep_alive, head=head)
+
+    async def handle_request(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Serve requests on one connection until the client closes it."""
+        try:
+            while True:
+                async with asyncio.timeout(self.read_timeout):
+                    request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, keep_alive = request
+                writer.write(
+                    self._response(path, keep_alive=keep_alive, head=method == "HEAD")
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (
+            ConnectionError,
+            TimeoutError,
+            asyncio.IncompleteReadError,
+            ValueError,
+        ):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> tuple[str, str, bool] | None:
+        """Read a request's method, path and keep-alive, None at the end."""
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        parts = request_line.decode("latin-1").split()
+        method = parts[0] if parts else ""
+        path = parts[1].split("?", 1)[0] if len(parts) > 1 else "/"
+        version = parts[2] if len(parts) > 2 else "HTTP/1.0"
+
+        # HTTP/1.1 defaults to keep-alive, HTTP/1.0 has to ask for it
+        keep_alive = version == "HTTP/1.1"
+        while line := (await reader.readline()).strip():
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "connection":
+                keep_alive = value.strip().lower() == "keep-alive"
+        return method, path, keep_alive
+
+    async def start(self) -> None:
+        """Start the health check server."""
+        server = await asyncio.start_server(
+            self.handle_request,
+            "0.0.0.0",
+            self.port,  # noqa: S104
+        )
+        log("info", f"Health server running on port {self.port}")
+        async with server:
+            await server.serve_forever()
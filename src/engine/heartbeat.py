@@ -0,0 +1,179 @@
+"""Gateway heartbeat with ACK tracking and latency measurement."""
+
+import asyncio
+import heapq
+import math
+import random
+import time
+from collections.abc import Awaitable, Callable
+from typing import Final
+
+from src.utils.errors import HeartbeatTimeoutError
+
+# Seconds a beat may go out early to share a wakeup with other connections
+HEARTBEAT_TOLERANCE: Final[float] = 1.0
+# Short intervals (tests, stand-ins) are never pulled in by more than this share,
+# so the ACK window stays at 90% of the interval or more
+MAX_EARLY_SHARE: Final[float] = 0.1
+
+
+class Heartbeat:
+    """Heartbeat state for a single gateway connection.
+
+    Follows the gateway rules: the first beat is jittered, every beat must be
+    ACKed before the next one is due, and the server may request a beat at
+    any time. A missing ACK means the connection is a zombie. With a wheel,
+    beats are timed by the shared HeartbeatWheel instead of a sleep loop.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        send: Callable[[], Awaitable[None]],
+        wheel: "HeartbeatWheel | None" = None,
+    ) -> None:
+        self.interval = interval
+        self._send = send
+        self.wheel = wheel
+        self._last_sent: float | None = None
+        self._awaiting_ack = False
+        self.last_ack: float | None = None
+        self.latency: float | None = None
+
+    async def beat(self) -> None:
+        """Send a heartbeat now and start waiting for its ACK."""
+        self._last_sent = time.perf_counter()
+        self._awaiting_ack = True
+        await self._send()
+
+    def ack(self) -> None:
+        """Record a heartbeat ACK and the round-trip latency."""
+        self.last_ack = time.perf_counter()
+        if self._last_sent is not None:
+            self.latency = self.last_ack - self._last_sent
+        self._awaiting_ack = False
+
+    def check(self) -> None:
+        """Raise if the last beat was never ACKed."""
+        if self._awaiting_ack:
+            msg = f"No heartbeat ACK within {self.interval:.1f}s"
+            raise HeartbeatTimeoutError(msg)
+
+    async def run(self) -> None:
+        """Send heartbeats forever, raise if an ACK goes missing."""
+        if self.wheel is not None:
+            await self.wheel.run(self)
+            return
+        # Jitter the first beat so reconnecting clients don't beat in lockstep
+        await asyncio.sleep(self.interval * random.random())
+        while True:
+            self.check()
+            await self.beat()
+            await asyncio.sleep(self.interval)
+
+
+class _Entry:
+    """A connection registered with the wheel."""
+
+    __slots__ = ("done", "heartbeat")
+
+    def __init__(self, heartbeat: Heartbeat, done: asyncio.Future[None]) -> None:
+        self.heartbeat = heartbeat
+        # Failed with the error that ends the connection, or cancelled with it
+        self.done = done
+
+
+class HeartbeatWheel:
+    """Timer wheel that times the heartbeats of every connection.
+
+    Time is cut into slots of tolerance seconds. A beat is due somewhere
+    in a slot and goes out at the slot's start, together with every
+    other beat in it, so connections share loop wakeups instead of each
+    sleeping on its own timer. Beats are never late and at most
+    tolerance (or a tenth of the interval, if less) early. Only the earliest
+    occupied slot has a loop timer, an idle wheel costs nothing.
+    """
+
+    def __init__(self, tolerance: float = HEARTBEAT_TOLERANCE) -> None:
+        self.tolerance = tolerance
+        self._slots: dict[float, list[_Entry]] = {}
+        self._starts: list[float] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._sends: set[asyncio.Task[None]] = set()
+
+        # Coalescing figures
+        self.wakeups = 0
+        self.beats = 0
+
+    async def run(self, heartbeat: Heartbeat) -> None:
+        """Send a connection's heartbeats until an ACK goes missing."""
+        loop = asyncio.get_running_loop()
+        entry = _Entry(heartbeat, loop.create_future())
+        # Jitter the first beat so reconnecting clients don't beat in lockstep
+        self._schedule(entry, loop.time() + heartbeat.interval * random.random())
+        try:
+            await entry.done
+        finally:
+            # Dropped from its slot when that comes up
+            entry.done.cancel()
+
+    def _schedule(self, entry: _Entry, due: float) -> None:
+        """Put a beat in the slot it is due in."""
+        early = min(self.tolerance, entry.heartbeat.interval * MAX_EARLY_SHARE)
+        # Slot starts come from the slot number, so equal slots get equal keys
+        start = math.floor(due / self.tolerance) * self.tolerance
+        if due - start > early:
+            # Too early for this interval, the beat gets a slot of its own
+            start = due
+        slot = self._slots.get(start)
+        if slot is None:
+            slot = self._slots[start] = []
+            heapq.heappush(self._starts, start)
+        slot.append(entry)
+        self._arm()
+
+    def _arm(self) -> None:
+        """Keep the loop timer on the earliest occupied slot."""
+        if not self._starts:
+            return
+        start = self._starts[0]
+        if self._timer is not None:
+            if self._timer.when() == start:
+                return
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_at(start, self._fire)
+
+    def _fire(self) -> None:
+        """Send the beats of every slot that has come up."""
+        self._timer = None
+        # The loop may run a timer a hair before its time, its slot is due anyway
+        now = max(asyncio.get_running_loop().time(), self._starts[0])
+        batch: list[_Entry] = []
+        while self._starts and self._starts[0] <= now:
+            for entry in self._slots.pop(heapq.heappop(self._starts)):
+                if entry.done.done():
+                    continue
+                try:
+                    entry.heartbeat.check()
+                except HeartbeatTimeoutError as e:
+                    entry.done.set_exception(e)
+                    continue
+                batch.append(entry)
+                self._schedule(entry, now + entry.heartbeat.interval)
+        if batch:
+            self.wakeups += 1
+            self.beats += len(batch)
+            task = asyncio.create_task(self._send(batch))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+        self._arm()
+
+    async def _send(self, batch: list[_Entry]) -> None:
+        """Send a slot's beats side by side, so a slow socket holds up no other."""
+        results = await asyncio.gather(
+            *(entry.heartbeat.beat() for entry in batch), return_exceptions=True
+        )
+        for entry, result in zip(batch, results, strict=True):
+            # A closed socket ends only its own connection
+            if isinstance(result, Exception) and not entry.done.done():
+                entry.done.set_exception(result)
@@ -0,0 +1,198 @@
+"""Prometheus metrics for connections, heartbeats and reconnects."""
+
+from bisect import bisect_left
+from collections.abc import Iterable
+from typing import Final
+
+from src.engine.scheduler import IdentifyScheduler
+from src.models.results import ConnectionState, SessionState
+
+# Prometheus text exposition format served on /metrics
+CONTENT_TYPE: Final[str] = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX: Final[str] = "discord_streak"
+
+# Heartbeat round trips are tens to hundreds of milliseconds
+RTT_BUCKETS: Final[tuple[float, ...]] = (
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+# Time-to-READY covers the handshake, HELLO and IDENTIFY/RESUME
+READY_BUCKETS: Final[tuple[float, ...]] = (
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class Histogram:
+    """Fixed-bucket histogram, observing is a bisect and two additions."""
+
+    __slots__ = ("buckets", "count", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        # One slot per bucket plus +Inf, stored non-cumulative
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record a single observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> Iterable[str]:
+        """Yield exposition lines for this histogram's series."""
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts, strict=False):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class SocketStats:
+    """Byte counters for a client's gateway sockets, kept across reconnects."""
+
+    __slots__ = ("bytes_in", "bytes_out")
+
+    def __init__(self) -> None:
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+
+class ClientMetrics:
+    """Telemetry recorded by one gateway client."""
+
+    def __init__(self) -> None:
+        self.socket = SocketStats()
+        self.heartbeat_rtt = Histogram(RTT_BUCKETS)
+        self.time_to_ready = Histogram(READY_BUCKETS)
+
+
+class Metrics:
+    """Registry for everything exported on /metrics.
+
+    Hot-path updates only touch plain attributes on the client's own
+    objects. Session state is read directly from SessionState when the
+    endpoint is scraped, so tracking it costs nothing in between.
+    """
+
+    def __init__(self, scheduler: IdentifyScheduler | None = None) -> None:
+        self.sessions: dict[int, SessionState] = {}
+        self.clients: dict[int, ClientMetrics] = {}
+        # Its wait counters and queue are read on scrape, like session state
+        self.scheduler = scheduler
+
+    def register(self, session: SessionState) -> None:
+        """Export a server's session state."""
+        self.sessions[session.server_index] = session
+
+    def unregister(self, session: SessionState) -> None:
+        """Stop exporting a server's session state."""
+        if self.sessions.get(session.server_index) is session:
+            del self.sessions[session.server_index]
+
+    def remove_client(self, client_index: int) -> None:
+        """Stop exporting a gateway client's metrics."""
+        self.clients.pop(client_index, None)
+
+    def client(self, client_index: int) -> ClientMetrics:
+        """Return the metrics for a gateway client, creating them if needed."""
+        metrics = self.clients.get(client_index)
+        if metrics is None:
+            metrics = self.clients[client_index] = ClientMetrics()
+        return metrics
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        return "\n".join(
+            [
+                *self._render_sessions(),
+                *self._render_clients(),
+                *self._render_identify(),
+                "",
+            ]
+        )
+
+    def _render_sessions(self) -> Iterable[str]:
+        sessions = sorted(self.sessions.items())
+
+        name = f"{PREFIX}_connection_state"
+        yield f"# HELP {name} Current connection state of each server."
+        yield f"# TYPE {name} gauge"
+        for index, session in sessions:
+            for state in ConnectionState:
+                value = int(session.state == state)
+                yield f'{name}{{server="{index + 1}",state="{state.value}"}} {value}'
+
+        name = f"{PREFIX}_reconnect_attempts"
+        yield f"# HELP {name} Reconnect attempts since the last successful connect."
+        yield f"# TYPE {name} gauge"
+        for index, session in sessions:
+            yield f'{name}{{server="{index + 1}"}} {session.reconnect_attempts}'
+
+        name = f"{PREFIX}_reconnects_total"
+        yield f"# HELP {name} Reconnects since startup."
+        yield f"# TYPE {name} counter"
+        for index, session in sessions:
+            yield f'{name}{{server="{index + 1}"}} {session.reconnects}'
+
+    def _render_clients(self) -> Iterable[str]:
+        clients = sorted(self.clients.items())
+
+        for name, help_text, attr in (
+            ("socket_received_bytes_total", "Bytes received", "bytes_in"),
+            ("socket_sent_bytes_total", "Bytes sent", "bytes_out"),
+        ):
+            name = f"{PREFIX}_{name}"
+            yield f"# HELP {name} {help_text} on gateway sockets."
+            yield f"# TYPE {name} counter"
+            for index, metrics in clients:
+                value: int = getattr(metrics.socket, attr)
+                yield f'{name}{{client="{index + 1}"}} {value}'
+
+        for name, help_text, attr in (
+            ("heartbeat_rtt_seconds", "Heartbeat round-trip time", "heartbeat_rtt"),
+            ("time_to_ready_seconds", "Time from connect to READY", "time_to_ready"),
+        ):
+            name = f"{PREFIX}_{name}"
+            yield f"# HELP {name} {help_text}."
+            yield f"# TYPE {name} histogram"
+            for index, metrics in clients:
+                histogram: Histogram = getattr(metrics, attr)
+                yield from histogram.render(name, f'client="{index + 1}"')
+
+    def _render_identify(self) -> Iterable[str]:
+        scheduler = self.scheduler
+        if scheduler is None:
+            return
+
+        name = f"{PREFIX}_identify_wait_seconds"
+        yield f"# HELP {name} Time spent waiting for an identify slot."
+        yield f"# TYPE {name} summary"
+        yield f"{name}_sum {scheduler.total_wait}"
+        yield f"{name}_count {scheduler.granted}"
+
+        name = f"{PREFIX}_identify_wait_max_seconds"
+        yield f"# HELP {name} Longest wait for an identify slot since startup."
+        yield f"# TYPE {name} gauge"
+        yield f"{name} {scheduler.max_wait}"
+
+        name = f"{PREFIX}_identify_queue_depth"
+        yield f"# HELP {name} Clients waiting for an identify slot."
+        yield f"# TYPE {name} gauge"
+        yield f"{name} {scheduler.queued}"
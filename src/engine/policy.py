@@ -0,0 +1,60 @@
+"""What to do when a gateway connection ends."""
+
+from enum import StrEnum
+from typing import Final
+
+from websockets.exceptions import ConnectionClosed
+
+from src.utils.errors import HeartbeatTimeoutError, ReconnectRequestedError
+
+
+class Recovery(StrEnum):
+    """How a client recovers from a closed connection."""
+
+    # Retrying can't succeed, stop the engine
+    FATAL = "fatal"
+    # The gateway asked for it or went quiet, resume without waiting
+    IMMEDIATE = "immediate"
+    # Back off, then resume the session
+    RESUME = "resume"
+    # Back off, then identify, the session is gone
+    IDENTIFY = "identify"
+
+
+# Close code sent when the gateway rejects the token
+AUTH_FAILED_CODE: Final[int] = 4004
+
+# Gateway close codes that don't mean "back off and resume"
+CLOSE_CODES: Final[dict[int, Recovery]] = {
+    AUTH_FAILED_CODE: Recovery.FATAL,
+    4007: Recovery.IDENTIFY,  # Invalid seq
+    4009: Recovery.IDENTIFY,  # Session timed out
+    4010: Recovery.FATAL,  # Invalid shard
+    4011: Recovery.FATAL,  # Sharding required
+    4012: Recovery.FATAL,  # Invalid API version
+    4013: Recovery.FATAL,  # Invalid intents
+    4014: Recovery.FATAL,  # Disallowed intents
+}
+
+
+def close_code(error: BaseException) -> int | None:
+    """The close code the gateway sent, if the error is a close."""
+    if isinstance(error, ConnectionClosed) and error.rcvd is not None:
+        return error.rcvd.code
+    return None
+
+
+def classify(error: BaseException) -> Recovery:
+    """Pick the recovery for the error that ended a connection.
+
+    Op 7 RECONNECT surfaces as ReconnectRequestedError. It and a zombie
+    connection (HeartbeatTimeoutError) resume right away. Network errors
+    and close codes not in the table keep the session and back off. Op 9
+    INVALID_SESSION never gets here, it is answered on the live connection.
+    """
+    if isinstance(error, ReconnectRequestedError | HeartbeatTimeoutError):
+        return Recovery.IMMEDIATE
+    code = close_code(error)
+    if code is None:
+        return Recovery.RESUME
+    return CLOSE_CODES.get(code, Recovery.RESUME)
@@ -0,0 +1,103 @@
+"""Presence manager that keeps every client's status current."""
+
+import asyncio
+import contextlib
+from collections.abc import Callable, Sequence
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Final
+
+from src.models.config import Status, StatusWindow
+from src.utils.logger import log
+
+if TYPE_CHECKING:
+    from src.engine.runner import DiscordClient
+
+# Longest wait between schedule checks, so a clock jump (DST, NTP) is caught up
+MAX_WAIT: Final[float] = 300.0
+
+
+class PresenceManager:
+    """The status every client shows, the configured one or a scheduled one.
+
+    Changes reach live sockets as op 3 PRESENCE_UPDATE, so no connection
+    has to re-identify, and clients that connect later IDENTIFY with the
+    status due at the time. An update that leaves the status as it is
+    sends nothing. run() switches the status at each schedule boundary.
+    """
+
+    def __init__(
+        self,
+        status: Status = "online",
+        schedule: Sequence[StatusWindow] = (),
+        *,
+        clock: Callable[[], datetime] = datetime.now,
+    ) -> None:
+        self.default: Status = status
+        self.schedule = tuple(schedule)
+        self._clock = clock
+        self.clients: set[DiscordClient] = set()
+        self.status: Status = self.current()
+        self._changed = asyncio.Event()
+
+    def current(self) -> Status:
+        """The status due now: the first window covering it, else the default."""
+        now = self._clock().time()
+        for window in self.schedule:
+            if window.contains(now):
+                return window.status
+        return self.default
+
+    def next_change(self) -> float | None:
+        """Seconds until a window starts or ends, None without a schedule."""
+        now = self._clock()
+        delays: list[float] = []
+        for window in self.schedule:
+            for boundary in (window.start, window.end):
+                at = datetime.combine(now.date(), boundary, now.tzinfo)
+                if at <= now:
+                    at += timedelta(days=1)
+                delays.append((at - now).total_seconds())
+        return min(delays, default=None)
+
+    def register(self, client: "DiscordClient") -> None:
+        """Track a client, set to the current status before it connects."""
+        client.status = self.status
+        self.clients.add(client)
+
+    def unregister(self, client: "DiscordClient") -> None:
+        """Stop tracking a client."""
+        self.clients.discard(client)
+
+    async def set_status(self, status: Status) -> None:
+        """Change the status shown outside scheduled windows."""
+        await self.configure(status, self.schedule)
+
+    async def configure(self, status: Status, schedule: Sequence[StatusWindow]) -> None:
+        """Replace the default status and the schedule, then apply them."""
+        self.default = status
+        self.schedule = tuple(schedule)
+        # run() has to recompute its next boundary
+        self._changed.set()
+        await self.refresh()
+
+    async def refresh(self) -> bool:
+        """Send the status due now to every client, if it changed."""
+        status = self.current()
+        if status == self.status:
+            return False
+        self.status = status
+        log("info", f"Status changed to {status}")
+        await asyncio.gather(*(client.set_status(status) for client in self.clients))
+        return True
+
+    async def run(self) -> None:
+        """Follow the schedule, waking only at its boundaries."""
+        while True:
+            self._changed.clear()
+            delay = self.next_change()
+            with contextlib.suppress(TimeoutError):
+                async with asyncio.timeout(
+                    min(delay, MAX_WAIT) if delay is not None else None
+                ):
+                    await self._changed.wait()
+            await self.refresh()
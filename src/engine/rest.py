@@ -0,0 +1,167 @@
+"""Shared Discord REST client with connection pooling and rate limits."""
+
+import asyncio
+import importlib.util
+import time
+from typing import TYPE_CHECKING, Any, Final
+
+from src.models.config import API_URL
+from src.utils.logger import log
+
+if TYPE_CHECKING:
+    # httpx takes a noticeable share of startup, it's imported on first request
+    import httpx
+
+# Retries for a single request that keeps getting 429s
+MAX_RETRIES: Final[int] = 5
+# Path parameters that get their own rate-limit bucket per value
+MAJOR_PARAMS: Final[tuple[str, ...]] = ("channel_id", "guild_id", "webhook_id")
+
+
+class RateLimitBucket:
+    """Remaining requests and reset time for one rate-limit bucket."""
+
+    def __init__(self) -> None:
+        # Requests in the same bucket are queued behind this lock
+        self.lock = asyncio.Lock()
+        self.remaining: int | None = None
+        self.reset_at = 0.0
+
+    async def wait(self) -> None:
+        """Sleep until the bucket has room for another request."""
+        if self.remaining == 0:
+            delay = self.reset_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.remaining = None
+
+    def update(self, headers: "httpx.Headers") -> None:
+        """Update the bucket from X-RateLimit-* response headers."""
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_after = headers.get("X-RateLimit-Reset-After")
+        if remaining is not None:
+            self.remaining = int(remaining)
+        if reset_after is not None:
+            self.reset_at = time.monotonic() + float(reset_after)
+
+
+class RestClient:
+    """Process-wide REST client for the Discord API.
+
+    One pooled httpx client (HTTP/2 when h2 is installed) serves every
+    request. Requests are queued per rate-limit bucket using the limits the
+    API reports, and 429 responses are retried after Retry-After instead of
+    being returned to the caller.
+    """
+
+    def __init__(
+        self,
+        base_url: str = API_URL,
+        *,
+        transport: "httpx.AsyncBaseTransport | None" = None,
+    ) -> None:
+        self.base_url = base_url
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        # Route key -> bucket hash reported by the API
+        self._bucket_hashes: dict[str, str] = {}
+        self._buckets: dict[str, RateLimitBucket] = {}
+        # Set while no global rate limit is in effect
+        self._global = asyncio.Event()
+        self._global.set()
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        """The pooled HTTP client, created on first use."""
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=importlib.util.find_spec("h2") is not None,
+                transport=self._transport,
+            )
+        return self._client
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        token: str | None = None,
+        params: dict[str, str] | None = None,
+        **kwargs: Any,
+    ) -> "httpx.Response":
+        """Send a request to a route template, waiting out any rate limits.
+
+        Path placeholders such as {channel_id} are filled from params.
+        """
+        params = params or {}
+        url = path.format(**params)
+        headers = dict(kwargs.pop("headers", {}))
+        if token is not None:
+            headers["Authorization"] = token
+
+        # Until the API reports a bucket hash, the route is its own bucket
+        route = f"{method} {path}"
+        major = ":".join(params.get(name, "") for name in MAJOR_PARAMS)
+        bucket_hash = self._bucket_hashes.get(route, route)
+        bucket = self._buckets.setdefault(f"{bucket_hash}:{major}", RateLimitBucket())
+
+        attempt = 0
+        async with bucket.lock:
+            while True:
+                await self._global.wait()
+                await bucket.wait()
+
+                resp = await self.client.request(method, url, headers=headers, **kwargs)
+                bucket.update(resp.headers)
+                bucket_hash = resp.headers.get("X-RateLimit-Bucket")
+                if bucket_hash is not None and route not in self._bucket_hashes:
+                    self._bucket_hashes[route] = bucket_hash
+                    self._buckets.setdefault(f"{bucket_hash}:{major}", bucket)
+
+                if resp.status_code != 429 or attempt == MAX_RETRIES:
+                    return resp
+                attempt += 1
+
+                retry_after = float(resp.headers.get("Retry-After", 1))
+                log("warn", f"Rate limited on {route}, retrying in {retry_after:.1f}s")
+                if resp.headers.get("X-RateLimit-Global") == "true":
+                    self._global.clear()
+                    await asyncio.sleep(retry_after)
+                    self._global.set()
+                else:
+                    await asyncio.sleep(retry_after)
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_rest_client: RestClient | None = None
+
+
+def get_rest_client() -> RestClient:
+    """Return the process-wide REST client."""
+    global _rest_client
+    if _rest_client is None:
+        _rest_client = RestClient()
+    return _rest_client
+
+
+def configure_rest_client(base_url: str) -> None:
+    """Point the process-wide REST client at an API base URL, before first use."""
+    global _rest_client
+    if _rest_client is None or _rest_client.base_url != base_url:
+        _rest_client = RestClient(base_url)
+
+
+async def close_rest_client() -> None:
+    """Close the process-wide REST client, if it was ever used."""
+    global _rest_client
+    if _rest_client is not None:
+        await _rest_client.aclose()
+        _rest_client = None
@@ -1,19 +1,48 @@
 """Core engine for Discord client and server management."""
 
 import asyncio
-import json
+import contextlib
+import itertools
 import random
 import time
-from http import HTTPStatus
-from typing import Final
+from collections.abc import Callable, Coroutine, Hashable, Sequence
+from pathlib import Path
+from typing import Any, Final
 
-import httpx
 import websockets  # pyright: ignore[reportMissingImports]
+from pydantic import ValidationError
 
 from src import __metadata__
-from src.models.config import API_URL, GATEWAY_URL, Server, Settings, Status
-from src.models.results import SessionState, User
-from src.utils.logger import log
+from src.engine.breaker import CircuitBreaker
+from src.engine.codec import Codec, gateway_codec, load_codec
+from src.engine.gateway import GatewayConnection
+from src.engine.health import HealthRegistry, HealthServer
+from src.engine.heartbeat import Heartbeat, HeartbeatWheel
+from src.engine.metrics import ClientMetrics, Metrics
+from src.engine.policy import AUTH_FAILED_CODE, Recovery, classify, close_code
+from src.engine.presence import PresenceManager
+from src.engine.rest import get_rest_client
+from src.engine.scheduler import IdentifyScheduler
+from src.models.config import (
+    DEFAULT_MAX_MESSAGE_SIZE,
+    DEFAULT_MAX_QUEUE,
+    GATEWAY_BASE_URL,
+    Server,
+    Settings,
+    Status,
+    gateway_url,
+)
+from src.models.gateway import GatewayPayload, Opcode
+from src.models.results import ConnectionState, SessionState, User
+from src.utils.cache import TokenCache
+from src.utils.errors import (
+    AuthenticationError,
+    HeartbeatTimeoutError,
+    ReconnectRequestedError,
+)
+from src.utils.errors import ConnectionError as GatewayError
+from src.utils.ledger import Ledger
+from src.utils.logger import configure, log
 
 # Activity configuration
 APP_ID: Final[str] = "1425827351261872219"
@@ -28,6 +57,29 @@ BASE_DELAY: Final[float] = 1.0
 MAX_DELAY: Final[float] = 60.0
 JITTER_FACTOR: Final[float] = 0.1
 
+# Seconds to wait before re-identifying after INVALID_SESSION (picked at random)
+INVALID_SESSION_DELAY: Final[tuple[float, float]] = (1.0, 5.0)
+
+# Settings a reload applies in place, the rest need a restart
+RELOADABLE: Final[frozenset[str]] = frozenset(
+    {
+        "servers_raw",
+        "servers_file",
+        "status",
+        "status_schedule_raw",
+        "log_level",
+        "log_format",
+    }
+)
+# Seconds between checks of .env and the servers file for changes
+ENV_POLL_INTERVAL: Final[float] = 2.0
+
+# Seconds to wait for the closing handshake, zombie sockets never answer it
+CLOSE_TIMEOUT: Final[float] = 2.0
+
+# A server to join and the state tracked for it
+Target = tuple[Server, SessionState]
+
 
 def generate_client_properties(index: int) -> dict[str, str]:
     """Generate unique client properties for each connection (15 unique combos)."""
@@ -41,6 +93,11 @@ def generate_client_properties(index: int) -> dict[str, str]:
     return {"os": os_name, "browser": browser, "device": ""}
 
 
+def snowflake(value: Any) -> str | None:
+    """A Discord ID as str, encoding=etf sends them as integers."""
+    return None if value is None else str(value)
+
+
 def calculate_backoff(attempt: int) -> float:
     """Exponential backoff: 1s -> 2s -> 4s -> ... -> 60s max."""
     delay = min(BASE_DELAY * (2**attempt), MAX_DELAY)
@@ -52,180 +109,925 @@ class DiscordClient:
     """Discord Gateway WebSocket client."""
 
     def __init__(
-        self, token: str, status: Status, client_index: int, start_time: int
+        self,
+        token: str,
+        status: Status,
+        client_index: int,
+        start_time: int,
+        *,
+        compress: bool = False,
+        max_message_size: int = DEFAULT_MAX_MESSAGE_SIZE,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        label: str | None = None,
+        token_cache: TokenCache | None = None,
+        identify_scheduler: IdentifyScheduler | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        heartbeat_wheel: HeartbeatWheel | None = None,
+        metrics: ClientMetrics | None = None,
+        gateway_base_url: str = GATEWAY_BASE_URL,
+        codec: Codec | None = None,
+        confirm_voice: bool = False,
     ) -> None:
         self.token = token
-        self.status = status
+        self.status: Status = status
         self.client_index = client_index
         self.properties = generate_client_properties(client_index)
         self.start_time = start_time
+        self.compress = compress
+        self.max_message_size = max_message_size
+        self.max_queue = max_queue
+        self.label = label or f"[Server {client_index + 1}]"
+        self.token_cache = token_cache
+        self.identify_scheduler = identify_scheduler
+        self.circuit_breaker = circuit_breaker
+        self.heartbeat_wheel = heartbeat_wheel
+        self.metrics = metrics
+        self.gateway_base_url = gateway_base_url
+        self.codec = codec or load_codec()
+        # Servers count as connected only once the gateway reports the join
+        self.confirm_voice = confirm_voice
+
+        # Gateway session, kept across reconnects so they can RESUME
+        self.session_id: str | None = None
+        self.resume_gateway_url: str | None = None
+        self.sequence: int | None = None
+
+        # The live socket and the servers it joined, for close()
+        self.connection: GatewayConnection | None = None
+        self.targets: Sequence[Target] = ()
+        self.closing = False
+        # Set by READY or RESUMED, before that the gateway rejects op 3 and op 4
+        self.ready = False
+        # The status the gateway session shows, from IDENTIFY or an op 3
+        self.shown_status: Status | None = None
+        # Our own voice channel per guild, from VOICE_STATE_UPDATE dispatches
+        self.user_id: str | None = None
+        self.voice_channels: dict[str, str | None] = {}
+
+        # Frames that only change with their key, encoded once and reused
+        self._frames: dict[Hashable, bytes] = {}
+
+    @classmethod
+    def from_settings(
+        cls,
+        settings: Settings,
+        client_index: int,
+        start_time: int,
+        *,
+        label: str | None = None,
+        identify_scheduler: IdentifyScheduler | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        heartbeat_wheel: HeartbeatWheel | None = None,
+        metrics: Metrics | None = None,
+        confirm_voice: bool = False,
+    ) -> "DiscordClient":
+        """Create a client configured from application settings."""
+        return cls(
+            settings.token,
+            settings.status,
+            client_index,
+            start_time,
+            compress=settings.compress,
+            max_message_size=settings.max_message_size,
+            max_queue=settings.max_queue,
+            label=label,
+            token_cache=TokenCache(settings.cache_file, settings.cache_ttl),
+            identify_scheduler=identify_scheduler,
+            circuit_breaker=circuit_breaker,
+            heartbeat_wheel=heartbeat_wheel,
+            metrics=metrics.client(client_index) if metrics is not None else None,
+            gateway_base_url=settings.gateway_base_url,
+            codec=gateway_codec(settings.encoding, settings.json_codec),
+            confirm_voice=confirm_voice,
+        )
+
+    @property
+    def can_resume(self) -> bool:
+        """Whether a previous gateway session can be resumed."""
+        return self.session_id is not None and self.resume_gateway_url is not None
+
+    def reset_session(self) -> None:
+        """Forget the gateway session so the next connect will IDENTIFY."""
+        self.session_id = None
+        self.resume_gateway_url = None
+        self.sequence = None
 
     async def get_user(self) -> User | None:
-        """Validate token and get user information."""
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{API_URL}/users/@me",
-                headers={"Authorization": self.token},
-            )
-            if resp.status_code == 200:
-                return resp.json()
+        """Validate token and get user information, None if it is rejected.
+
+        Any status but 401 and 403 (an outage, rate limits that outlasted the
+        retries) says nothing about the token and raises GatewayError.
+        """
+        resp = await get_rest_client().request("GET", "/users/@me", token=self.token)
+        if resp.status_code == 200:
+            return resp.json()
+        if resp.status_code in (401, 403):
             return None
+        msg = f"Discord API answered /users/@me with {resp.status_code}"
+        raise GatewayError(msg)
 
-    async def keep_online(self, server: Server, session: SessionState) -> None:
-        """Maintain connection for a single server."""
-        async with websockets.connect(GATEWAY_URL) as ws:
-            hello = json.loads(await ws.recv())
-            heartbeat_interval: float = hello["d"]["heartbeat_interval"] / 1000
+    async def wait_for_identify(self) -> None:
+        """Wait for a slot from the shared identify scheduler, if any."""
+        if self.identify_scheduler is None:
+            return
+        waited = await self.identify_scheduler.acquire(self.client_index)
+        if waited >= 1:
+            log("info", f"{self.label} Waited {waited:.1f}s for an identify slot")
 
-            log(
-                "info",
-                f"[Server {self.client_index + 1}] Connected to Gateway "
-                f"(heartbeat: {heartbeat_interval:.1f}s)",
-            )
+    def identify_payload(self) -> dict[str, Any]:
+        """Build the IDENTIFY payload with unique properties."""
+        return {
+            "op": Opcode.IDENTIFY,
+            "d": {
+                "token": self.token,
+                "properties": self.properties,
+                "presence": self.presence(),
+            },
+        }
 
-            # Send identify packet with unique properties
-            identify = {
-                "op": 2,
-                "d": {
-                    "token": self.token,
-                    "properties": self.properties,
-                    "presence": {
-                        "status": self.status,
-                        "since": 0,
-                        "activities": [
-                            {
-                                "name": ACTIVITY_NAME,
-                                "type": 0,
-                                "application_id": APP_ID,
-                                "details": ACTIVITY_DETAILS,
-                                "state": ACTIVITY_STATE,
-                                "timestamps": {"start": self.start_time},
-                                "buttons": ["GitHub Repository"],
-                                "metadata": {"button_urls": [REPO_URL]},
-                            }
-                        ],
-                        "afk": False,
-                    },
-                },
-            }
-            await ws.send(json.dumps(identify))
-            await ws.recv()
+    def identify_frame(self) -> bytes:
+        """The encoded IDENTIFY, rebuilt only when the status changes."""
+        return self._encoded(("identify", self.status), self.identify_payload)
+
+    def _encoded(self, key: Hashable, build: Callable[[], dict[str, Any]]) -> bytes:
+        """Encode the payload for a key on first use, reuse the bytes after."""
+        frame = self._frames.get(key)
+        if frame is None:
+            frame = self._frames[key] = self.codec.dumps(build())
+        return frame
+
+    def presence(self) -> dict[str, Any]:
+        """Build the presence sent on IDENTIFY and in PRESENCE_UPDATE."""
+        return {
+            "status": self.status,
+            "since": 0,
+            "activities": [
+                {
+                    "name": ACTIVITY_NAME,
+                    "type": 0,
+                    "application_id": APP_ID,
+                    "details": ACTIVITY_DETAILS,
+                    "state": ACTIVITY_STATE,
+                    "timestamps": {"start": self.start_time},
+                    "buttons": ["GitHub Repository"],
+                    "metadata": {"button_urls": [REPO_URL]},
+                }
+            ],
+            "afk": False,
+        }
+
+    def resume_payload(self) -> dict[str, Any]:
+        """Build the RESUME payload for the current session."""
+        return {
+            "op": Opcode.RESUME,
+            "d": {
+                "token": self.token,
+                "session_id": self.session_id,
+                "seq": self.sequence,
+            },
+        }
+
+    async def close(self, reason: str = "Shutting down") -> None:
+        """Leave voice and close the live socket with a normal close frame.
+
+        The client stops reconnecting. Closing with 1000 also ends the
+        gateway session, so it doesn't linger until it times out.
+        """
+        self.closing = True
+        conn = self.connection
+        if conn is None:
+            return
+        for server, _ in self.targets:
+            await self.leave(server)
+        # The heartbeat and receive tasks end with the socket
+        await conn.ws.close(code=1000, reason=reason)
+
+    async def set_status(self, status: Status) -> None:
+        """Change the status, live sockets get a PRESENCE_UPDATE right away."""
+        self.status = status
+        conn = self.connection
+        if conn is None or not self.ready:
+            # The next IDENTIFY carries it, or the update follows RESUMED
+            return
+        with contextlib.suppress(websockets.ConnectionClosed):
+            await self._send_presence(conn)
+
+    async def _identify(self, conn: GatewayConnection) -> None:
+        """Send IDENTIFY, which carries the current status."""
+        self.shown_status = self.status
+        await conn.send_encoded(self.identify_frame())
 
-            # Mark as connected (for backoff reset)
+    async def _send_presence(self, conn: GatewayConnection) -> None:
+        """Send a PRESENCE_UPDATE, unless the session already shows the status."""
+        status = self.status
+        if status == self.shown_status:
+            return
+        self.shown_status = status
+        frame = self._encoded(
+            ("presence", status),
+            lambda: {"op": Opcode.PRESENCE_UPDATE, "d": self.presence()},
+        )
+        await conn.send_encoded(frame)
+
+    def in_channel(self, server: Server) -> bool:
+        """Whether the server counts as joined, always without confirm_voice."""
+        if not self.confirm_voice:
+            return True
+        return self.voice_channels.get(server.guild_id) == server.channel_id
+
+    async def join(self, server: Server, session: SessionState) -> None:
+        """Join a server's voice channel on the live socket, if there is one."""
+        conn = self.connection
+        if conn is None or not self.ready:
+            # Joined on the next READY
+            return
+        if self.in_channel(server):
             session.mark_connected()
+        with contextlib.suppress(websockets.ConnectionClosed):
+            await self._join_voice(conn, server, session)
+
+    async def leave(self, server: Server) -> None:
+        """Leave a server's voice channel on the live socket, if there is one."""
+        conn = self.connection
+        if conn is None:
+            return
+        frame = self._encoded(
+            ("leave", server.guild_id),
+            lambda: {
+                "op": Opcode.VOICE_STATE_UPDATE,
+                "d": {
+                    "guild_id": server.guild_id,
+                    "channel_id": None,
+                    "self_mute": False,
+                    "self_deaf": False,
+                },
+            },
+        )
+        with contextlib.suppress(websockets.ConnectionClosed):
+            await conn.send_encoded(frame)
 
-            # Join voice channel
-            voice_state = {
-                "op": 4,
+    async def _join_voice(
+        self, conn: GatewayConnection, server: Server, session: SessionState
+    ) -> None:
+        """Join the server's voice channel with its mute and deafen options."""
+        frame = self._encoded(
+            ("join", server),
+            lambda: {
+                "op": Opcode.VOICE_STATE_UPDATE,
                 "d": {
                     "guild_id": server.guild_id,
                     "channel_id": server.channel_id,
-                    "self_mute": True,
-                    "self_deaf": True,
+                    "self_mute": server.self_mute,
+                    "self_deaf": server.self_deaf,
                 },
-            }
-            await ws.send(json.dumps(voice_state))
+            },
+        )
+        await conn.send_encoded(frame)
+        log(
+            "info",
+            f"[Server {session.server_index + 1}] Joined voice channel "
+            f"{server.channel_id} in guild {server.guild_id}",
+            server=session.server_index + 1,
+            state=session.state.value,
+        )
+
+    def _register_handlers(
+        self,
+        conn: GatewayConnection,
+        targets: Sequence[Target],
+        heartbeat: Heartbeat,
+        started: float,
+        background: set[asyncio.Task[None]],
+    ) -> None:
+        """Route the frames this client cares about, the rest are dropped.
+
+        Handlers run inside the receive pump, so anything that waits (like
+        the re-IDENTIFY after INVALID_SESSION) goes to a background task
+        that ends with the connection.
+        """
+        metrics = self.metrics
+
+        async def on_ready(payload: GatewayPayload) -> None:
+            self.session_id = payload["d"]["session_id"]
+            self.resume_gateway_url = payload["d"]["resume_gateway_url"]
+            self.user_id = snowflake(payload["d"]["user"]["id"])
+            # A new session starts outside every voice channel
+            self.voice_channels.clear()
+            if metrics is not None:
+                metrics.time_to_ready.observe(time.monotonic() - started)
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_success(self.client_index)
+            self.ready = True
+            # A status changed while waiting for READY missed the IDENTIFY
+            await self._send_presence(conn)
+            for server, session in targets:
+                # Mark as connected (for backoff reset)
+                if self.in_channel(server):
+                    session.mark_connected()
+                await self._join_voice(conn, server, session)
+
+        async def on_resumed(payload: GatewayPayload) -> None:
+            if metrics is not None:
+                metrics.time_to_ready.observe(time.monotonic() - started)
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_success(self.client_index)
+            self.ready = True
+            for server, session in targets:
+                if self.in_channel(server):
+                    session.mark_connected()
+            # Voice state survives a resume, no need to join again
+            log("info", f"{self.label} Resumed session")
+            # RESUME carries no presence, a change made while away goes now
+            await self._send_presence(conn)
+
+        async def on_voice_state(payload: GatewayPayload) -> None:
+            data = payload["d"]
+            if snowflake(data.get("user_id")) != self.user_id:
+                return
+            guild_id = snowflake(data.get("guild_id"))
+            if guild_id is None:
+                return
+            self.voice_channels[guild_id] = snowflake(data.get("channel_id"))
+            for server, session in targets:
+                if server.guild_id != guild_id:
+                    continue
+                if self.in_channel(server):
+                    session.mark_connected()
+                elif session.connected:
+                    session.mark_disconnected()
+                    log(
+                        "warn",
+                        f"[Server {session.server_index + 1}] Left voice channel "
+                        f"{server.channel_id} in guild {guild_id}",
+                        server=session.server_index + 1,
+                        state=session.state.value,
+                    )
+
+        async def reidentify() -> None:
+            await asyncio.sleep(random.uniform(*INVALID_SESSION_DELAY))
+            await self.wait_for_identify()
+            with contextlib.suppress(websockets.ConnectionClosed):
+                await self._identify(conn)
+
+        async def on_invalid_session(payload: GatewayPayload) -> None:
+            # d=true means the session may still be resumable, but the
+            # gateway has already rejected this attempt, so start fresh
             log(
-                "info",
-                f"[Server {self.client_index + 1}] Joined voice channel "
-                f"{server.channel_id} in guild {server.guild_id}",
+                "warn",
+                f"{self.label} Session invalidated, re-identifying",
             )
+            self.reset_session()
+            conn.sequence = None
+            self.ready = False
+            # Waiting in the pump would hold back heartbeat ACKs meanwhile
+            if not any(not task.done() for task in background):
+                task = asyncio.create_task(reidentify())
+                background.add(task)
+                task.add_done_callback(background.discard)
 
-            # Simple heartbeat loop
-            while True:
-                await ws.send(json.dumps({"op": 1, "d": None}))
-                await asyncio.sleep(heartbeat_interval)
+        async def on_reconnect(payload: GatewayPayload) -> None:
+            msg = "Gateway requested a reconnect"
+            raise ReconnectRequestedError(msg)
 
+        async def on_heartbeat(payload: GatewayPayload) -> None:
+            await heartbeat.beat()
 
-class HealthServer:
-    """HTTP health check server."""
+        async def on_heartbeat_ack(payload: GatewayPayload) -> None:
+            heartbeat.ack()
+            if metrics is not None and heartbeat.latency is not None:
+                metrics.heartbeat_rtt.observe(heartbeat.latency)
+            for _, session in targets:
+                session.mark_heartbeat(heartbeat.latency)
+
+        conn.on_dispatch("READY", on_ready)
+        conn.on_dispatch("RESUMED", on_resumed)
+        if self.confirm_voice:
+            conn.on_dispatch("VOICE_STATE_UPDATE", on_voice_state)
+        conn.on(Opcode.RECONNECT, on_reconnect)
+        conn.on(Opcode.INVALID_SESSION, on_invalid_session)
+        conn.on(Opcode.HEARTBEAT, on_heartbeat)
+        conn.on(Opcode.HEARTBEAT_ACK, on_heartbeat_ack)
+
+    async def keep_online(self, server: Server, session: SessionState) -> None:
+        """Maintain connection for a single server."""
+        await self.keep_online_many([(server, session)])
 
-    def __init__(self, port: int = 8080) -> None:
-        self.port = port
+    async def keep_online_many(self, targets: Sequence[Target]) -> None:
+        """Maintain one connection that joins voice in every target server."""
+        resuming = self.can_resume
+        base = (self.resume_gateway_url if resuming else None) or self.gateway_base_url
+        url = gateway_url(base, compress=self.compress, encoding=self.codec.encoding)
 
-    async def handle_request(
+        # RESUMEs don't count against the identify limit, only IDENTIFYs wait
+        if not resuming:
+            await self.wait_for_identify()
+
+        started = time.monotonic()
+        async with websockets.connect(
+            url,
+            close_timeout=CLOSE_TIMEOUT,
+            max_size=self.max_message_size,
+            max_queue=self.max_queue,
+        ) as ws:
+            conn = GatewayConnection(
+                ws,
+                compress=self.compress,
+                sequence=self.sequence if resuming else None,
+                stats=self.metrics.socket if self.metrics is not None else None,
+                codec=self.codec,
+            )
+            self.connection = conn
+            self.targets = targets
+            try:
+                await self._run_connection(conn, targets, resuming, started)
+            finally:
+                self.connection = None
+                self.ready = False
+                self.sequence = conn.sequence
+
+    async def _run_connection(
         self,
-        reader: asyncio.StreamReader,
-        writer: asyncio.StreamWriter,
+        conn: GatewayConnection,
+        targets: Sequence[Target],
+        resuming: bool,
+        started: float,
     ) -> None:
-        """Handle incoming HTTP request."""
-        await reader.readline()
-        response = (
-            f"HTTP/1.1 {HTTPStatus.OK} OK\r\n"
-            "Content-Type: text/plain\r\n"
-            "Content-Length: 2\r\n"
-            "\r\n"
-            "OK"
+        """Drive one gateway connection from HELLO until it fails."""
+        hello = await conn.recv()
+        heartbeat_interval: float = hello["d"]["heartbeat_interval"] / 1000
+
+        log(
+            "info",
+            f"{self.label} Connected to Gateway (heartbeat: {heartbeat_interval:.1f}s)",
         )
-        writer.write(response.encode())
-        await writer.drain()
-        writer.close()
-        await writer.wait_closed()
-
-    async def start(self) -> None:
-        """Start the health check server."""
-        server = await asyncio.start_server(
-            self.handle_request,
-            "0.0.0.0",
-            self.port,  # noqa: S104
+
+        heartbeat = Heartbeat(
+            heartbeat_interval, conn.send_heartbeat, self.heartbeat_wheel
         )
-        log("info", f"Health server running on port {self.port}")
-        async with server:
-            await server.serve_forever()
+        background: set[asyncio.Task[None]] = set()
+        self._register_handlers(conn, targets, heartbeat, started, background)
+
+        # Heartbeats and the receive pump run side by side, whichever fails
+        # first (zombie or closed socket) ends the connection
+        tasks = [
+            asyncio.create_task(heartbeat.run()),
+            asyncio.create_task(conn.run()),
+        ]
+        try:
+            # Resume the previous session if we have one, otherwise identify
+            if resuming:
+                await conn.send(self.resume_payload())
+            else:
+                await self._identify(conn)
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (*tasks, *background):
+                task.cancel()
+            await asyncio.gather(*tasks, *background, return_exceptions=True)
+
+        try:
+            for task in done:
+                task.result()
+        # Any close code but 1000/1001 keeps the session resumable
+        except HeartbeatTimeoutError:
+            await conn.ws.close(code=4000, reason="Heartbeat ACK timeout")
+            raise
+        except ReconnectRequestedError:
+            await conn.ws.close(code=4000, reason="Reconnect requested")
+            raise
+
+
+async def run_client(client: DiscordClient, targets: Sequence[Target]) -> None:
+    """Keep a client connected for its target servers, reconnecting on errors."""
+    attempt = 0
+    breaker = client.circuit_breaker
+    # A multiplexed client speaks for several servers, so it logs without one
+    server = targets[0][1].server_index + 1 if len(targets) == 1 else None
+
+    try:
+        while not client.closing:
+            for _, session in targets:
+                session.mark_disconnected()
+
+            # During an outage only the probe client gets past this point
+            if breaker is not None:
+                await breaker.wait(client.client_index)
+
+            try:
+                await client.keep_online_many(targets)
+            except (
+                websockets.ConnectionClosed,
+                websockets.WebSocketException,
+                HeartbeatTimeoutError,
+                ReconnectRequestedError,
+                OSError,
+            ) as e:
+                if client.closing:
+                    break
+                was_connected = any(session.connected for _, session in targets)
+                recovery = classify(e)
+                error_msg = str(e) or type(e).__name__
+
+                if recovery == Recovery.FATAL:
+                    for _, session in targets:
+                        session.mark_disconnected()
+                    log(
+                        "error",
+                        f"{client.label} Gateway refused the connection: {error_msg}",
+                        server=server,
+                        state="disconnected",
+                    )
+                    raise fatal_error(client, e) from e
+
+                # A gateway that keeps asking (or a connection that goes
+                # quiet) right after connecting gets backoff
+                if recovery == Recovery.IMMEDIATE and was_connected:
+                    for _, session in targets:
+                        session.mark_reconnecting()
+                    log(
+                        "info",
+                        f"{client.label} {error_msg}, reconnecting now",
+                        server=server,
+                        state="reconnecting",
+                        key=f"{client.label} reconnect",
+                    )
+                    attempt = 0
+                    continue
+
+                # Reset backoff after successful connection
+                if was_connected:
+                    attempt = 0
+                if breaker is not None:
+                    breaker.record_failure(client.client_index)
+                if recovery == Recovery.IDENTIFY:
+                    client.reset_session()
+
+                delay = calculate_backoff(attempt)
+                for _, session in targets:
+                    session.mark_reconnecting()
+                # Flapping connections repeat these every few seconds
+                log(
+                    "warn",
+                    f"{client.label} Connection error: {error_msg}",
+                    server=server,
+                    state="reconnecting",
+                    key=f"{client.label} error",
+                )
+                log(
+                    "info",
+                    f"{client.label} Reconnecting in {delay:.1f}s "
+                    f"(attempt {attempt + 1})...",
+                    server=server,
+                    state="reconnecting",
+                    key=f"{client.label} reconnect",
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    finally:
+        # A cancelled probe (server removed on reload) must not block the rest
+        if breaker is not None:
+            breaker.release(client.client_index)
+
+
+def fatal_error(client: DiscordClient, error: BaseException) -> Exception:
+    """The error that stops the engine after a fatal close."""
+    code = close_code(error)
+    if code == AUTH_FAILED_CODE:
+        if client.token_cache is not None:
+            # Don't let a cached validation skip the REST check next start
+            client.token_cache.invalidate(client.token)
+        return AuthenticationError("Invalid Discord token")
+    return GatewayError(f"Gateway closed the connection with code {code}")
 
 
 async def run_server_client(
-    token: str,
-    status: Status,
+    settings: Settings,
     server: Server,
-    client_index: int,
+    session: SessionState,
     start_time: int,
+    identify_scheduler: IdentifyScheduler | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+    metrics: Metrics | None = None,
 ) -> None:
     """Manage connection for a single server with reconnection."""
-    session = SessionState()
-    client = DiscordClient(token, status, client_index, start_time)
-    attempt = 0
+    client = DiscordClient.from_settings(
+        settings,
+        session.server_index,
+        start_time,
+        identify_scheduler=identify_scheduler,
+        circuit_breaker=circuit_breaker,
+        metrics=metrics,
+    )
+    await run_client(client, [(server, session)])
+
+
+class Engine:
+    """Every client of the process, plus the health server and ledger.
+
+    Runs until a client fails fatally or stop() is called (on SIGTERM).
+    Either way every live socket is drained in parallel: op 4 leaves the
+    voice channels and a normal close frame ends the gateway session. Work
+    left when the shutdown deadline passes is cancelled.
+
+    reload() (on SIGHUP or a .env change) re-reads the settings and only
+    touches what changed: removed servers are left, added servers are
+    joined and a new status or schedule goes through the presence manager,
+    which sends op 3 to the live sockets.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        # Captured once for consistent activity timestamps
+        self.start_time = int(time.time() * 1000)
+
+        # All clients share one identify rate limit, one circuit breaker and
+        # one heartbeat timer
+        self.scheduler = IdentifyScheduler(settings.identify_concurrency)
+        self.breaker = (
+            CircuitBreaker(settings.breaker_threshold)
+            if settings.breaker_threshold > 0
+            else None
+        )
+        self.heartbeats = (
+            HeartbeatWheel(settings.heartbeat_tolerance)
+            if settings.heartbeat_tolerance > 0
+            else None
+        )
+
+        self.health = HealthRegistry(min_ready=settings.ready_min_servers)
+        self.presence = PresenceManager(settings.status, settings.schedule)
+        self.metrics = Metrics(self.scheduler)
+        self.ledger = Ledger(settings.ledger_file) if settings.ledger else None
+        self.health_server = HealthServer(
+            settings.health_port, self.health, self.metrics
+        )
+        # Each client with the servers it joins and the task running it
+        self.clients: dict[DiscordClient, list[Target]] = {}
+        self._tasks: dict[DiscordClient, asyncio.Task[None]] = {}
+        self._services: list[asyncio.Task[None]] = []
+        # Server indexes stay stable across reloads, new servers get fresh ones
+        self._indexes = itertools.count()
+        self._error: BaseException | None = None
+        self._stop = asyncio.Event()
+        self._reload = asyncio.Event()
+        self._connected = asyncio.Event()
+        # Started by run() next to the built-in services
+        self._extra: list[Coroutine[Any, Any, None]] = []
+
+    def stop(self) -> None:
+        """Ask run() to drain every connection and return."""
+        self._stop.set()
+
+    def reload(self) -> None:
+        """Ask run() to re-read the settings and apply what changed."""
+        self._reload.set()
+
+    def add_service(self, coro: Coroutine[Any, Any, None]) -> None:
+        """Run a coroutine alongside the clients, its failure stops the engine."""
+        self._extra.append(coro)
+
+    async def wait_connected(self) -> None:
+        """Wait until any server has connected."""
+        await self._connected.wait()
+
+    def _record(self, guild_id: int, state: ConnectionState) -> None:
+        """Follow every state change, for wait_connected() and the ledger."""
+        if state == ConnectionState.CONNECTED:
+            self._connected.set()
+        if self.ledger is not None:
+            self.ledger.record(guild_id, state)
 
-    while True:
+    def _supervise(self, task: asyncio.Task[None]) -> asyncio.Task[None]:
+        """Stop the engine when a task fails (fatal close, port in use)."""
+
+        def done(task: asyncio.Task[None]) -> None:
+            if task.cancelled() or task.exception() is None:
+                return
+            if self._error is None:
+                self._error = task.exception()
+            self._stop.set()
+
+        task.add_done_callback(done)
+        return task
+
+    def _track(self, server: Server) -> SessionState:
+        """Create a server's session state and hook it up for reporting."""
+        session = SessionState(server_index=next(self._indexes))
+        self.health.register(session)
+        self.metrics.register(session)
+        # Indexes change with the server list, the ledger keys by guild
+        guild_id = int(server.guild_id)
+        session.attach(lambda _, state: self._record(guild_id, state))
+        return session
+
+    def _untrack(self, session: SessionState) -> None:
         session.mark_disconnected()
+        self.health.unregister(session)
+        self.metrics.unregister(session)
+
+    def _start(self, client: DiscordClient, targets: list[Target]) -> None:
+        self.presence.register(client)
+        self.clients[client] = targets
+        self._tasks[client] = self._supervise(
+            asyncio.create_task(run_client(client, targets))
+        )
+
+    async def _stop_client(self, client: DiscordClient) -> None:
+        """Leave voice and close one client's socket, then cancel it."""
+        with contextlib.suppress(TimeoutError):
+            async with asyncio.timeout(self.settings.shutdown_timeout):
+                await client.close()
+        task = self._tasks.pop(client)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        self.presence.unregister(client)
+        for _, session in self.clients.pop(client):
+            self._untrack(session)
+        self.metrics.remove_client(client.client_index)
+
+    def _client_for(self, server: Server) -> DiscordClient:
+        """Create the dedicated client for one server."""
+        session = self._track(server)
+        client = DiscordClient.from_settings(
+            self.settings,
+            session.server_index,
+            self.start_time,
+            identify_scheduler=self.scheduler,
+            circuit_breaker=self.breaker,
+            heartbeat_wheel=self.heartbeats,
+            metrics=self.metrics,
+        )
+        self._start(client, [(server, session)])
+        return client
+
+    def _build_clients(self) -> None:
+        settings = self.settings
+        if settings.multiplex:
+            # One shared connection sends voice state for every server
+            client = DiscordClient.from_settings(
+                settings,
+                0,
+                self.start_time,
+                label="[Gateway]",
+                identify_scheduler=self.scheduler,
+                heartbeat_wheel=self.heartbeats,
+                metrics=self.metrics,
+                confirm_voice=True,
+            )
+            self._start(
+                client, [(server, self._track(server)) for server in settings.servers]
+            )
+            return
+
+        # Create a separate connection for each server
+        for server in settings.servers:
+            self._client_for(server)
+
+    async def apply(self, settings: Settings) -> None:
+        """Move to new settings, leaving unchanged servers connected."""
+        changed = {
+            name
+            for name in Settings.model_fields
+            if getattr(settings, name) != getattr(self.settings, name)
+        }
+        if ignored := sorted(changed - RELOADABLE):
+            log("warn", f"Restart to apply changes to: {', '.join(ignored)}")
+        # Everything else keeps its running value
+        keep = {name: getattr(self.settings, name) for name in changed - RELOADABLE}
+        self.settings = settings.model_copy(update=keep)
+        servers = list(self.settings.servers)
+        configure(self.settings.log_level, self.settings.log_format)
+
+        if self.settings.multiplex:
+            added, removed = await self._apply_multiplexed(servers)
+        else:
+            added, removed = await self._apply_dedicated(servers)
+        if changed & {"status", "status_schedule_raw"}:
+            await self.presence.configure(self.settings.status, self.settings.schedule)
+        log(
+            "info",
+            f"Configuration reloaded: {added} servers added, {removed} removed, "
+            f"status {self.presence.status}",
+        )
+
+    async def _apply_dedicated(self, servers: list[Server]) -> tuple[int, int]:
+        """Stop clients of removed servers and start clients for new ones."""
+        running = {targets[0][0]: client for client, targets in self.clients.items()}
+        removed = [
+            client for server, client in running.items() if server not in servers
+        ]
+        added = [server for server in servers if server not in running]
+        await asyncio.gather(*(self._stop_client(client) for client in removed))
+        for server in added:
+            self._client_for(server)
+        return len(added), len(removed)
+
+    async def _apply_multiplexed(self, servers: list[Server]) -> tuple[int, int]:
+        """Leave and join voice channels on the shared connection."""
+        ((client, targets),) = self.clients.items()
+        removed = [target for target in targets if target[0] not in servers]
+        for server, session in removed:
+            targets.remove((server, session))
+            await client.leave(server)
+            self._untrack(session)
+
+        joined = [server for server, _ in targets]
+        added = [server for server in servers if server not in joined]
+        for server in added:
+            session = self._track(server)
+            # Later READYs rejoin every target, so this also covers reconnects
+            targets.append((server, session))
+            await client.join(server, session)
+        return len(added), len(removed)
+
+    async def _reloader(self) -> None:
+        """Apply reload requests one at a time."""
+        while True:
+            await self._reload.wait()
+            self._reload.clear()
+            try:
+                await self.apply(Settings())  # pyright: ignore[reportCallIssue]
+            except (ValidationError, ValueError) as e:
+                log("error", f"Reload failed, keeping the current configuration: {e}")
+
+    async def _watch_config_files(self, interval: float = ENV_POLL_INTERVAL) -> None:
+        """Reload whenever .env or the servers file changes."""
+        env_file = Path(str(Settings.model_config.get("env_file") or ".env"))
+
+        def modified(path: Path | None) -> float | None:
+            try:
+                return path.stat().st_mtime if path is not None else None
+            except OSError:
+                return None
+
+        # The servers file may be moved by a reload, so it is looked up each time
+        last = (modified(env_file), modified(self.settings.servers_file))
+        while True:
+            await asyncio.sleep(interval)
+            current = (modified(env_file), modified(self.settings.servers_file))
+            if current != last:
+                last = current
+                log("info", "Configuration files changed, reloading")
+                self.reload()
+
+    async def run(self) -> None:
+        """Run every client until stopped, then shut down cleanly."""
+        self._services = [
+            self._supervise(asyncio.create_task(self.health_server.start())),
+            asyncio.create_task(self._reloader()),
+            asyncio.create_task(self._watch_config_files()),
+            asyncio.create_task(self.presence.run()),
+        ]
+        if self.ledger is not None:
+            self._services.append(asyncio.create_task(self.ledger.run()))
+        self._services += [
+            self._supervise(asyncio.create_task(coro)) for coro in self._extra
+        ]
+        self._extra.clear()
+        self._build_clients()
 
         try:
-            await client.keep_online(server, session)
-        except (
-            websockets.ConnectionClosed,
-            websockets.WebSocketException,
-            OSError,
-        ) as e:
-            # Reset backoff after successful connection
-            if session.connected:
-                attempt = 0
-
-            delay = calculate_backoff(attempt)
-            error_msg = str(e) or type(e).__name__
-            log("warn", f"[Server {client_index + 1}] Connection error: {error_msg}")
+            await self._stop.wait()
+        finally:
+            await self._shutdown()
+        if self._error is not None:
+            raise self._error
+
+    async def _shutdown(self) -> None:
+        """Close every socket within the deadline, then cancel the rest."""
+        deadline = self.settings.shutdown_timeout
+        log("info", "Shutting down...")
+        # Stop serving health checks and reloads right away
+        for task in self._services:
+            task.cancel()
+        try:
+            async with asyncio.timeout(deadline):
+                await asyncio.gather(
+                    *(client.close() for client in self.clients),
+                    return_exceptions=True,
+                )
+        except TimeoutError:
             log(
-                "info",
-                f"[Server {client_index + 1}] Reconnecting in {delay:.1f}s "
-                f"(attempt {attempt + 1})...",
+                "warn", f"Shutdown deadline of {deadline:.1f}s passed, dropping sockets"
             )
-            session.mark_reconnecting()
-            await asyncio.sleep(delay)
-            attempt += 1
+            # Whatever hasn't closed by now goes without a closing handshake
+            for client in self.clients:
+                if client.connection is not None:
+                    client.connection.ws.transport.abort()
+
+        tasks = [*self._services, *self._tasks.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Recorded here, cancelled clients never get to do it themselves
+        for targets in self.clients.values():
+            for _, session in targets:
+                session.mark_disconnected()
+        if self.ledger is not None:
+            self.ledger.close()
 
 
 async def run_all(settings: Settings) -> None:
     """Run all server connections and health server."""
-    # Capture start time once for consistent activity timestamps
-    start_time = int(time.time() * 1000)
-
-    # Create a separate connection for each server
-    health_server = HealthServer()
-    tasks: list[asyncio.Task[None]] = [asyncio.create_task(health_server.start())]
-
-    for i, server in enumerate(settings.servers):
-        task = asyncio.create_task(
-            run_server_client(settings.token, settings.status, server, i, start_time)
-        )
-        tasks.append(task)
-
-    await asyncio.gather(*tasks)
+    await Engine(settings).run()
@@ -0,0 +1,76 @@
+"""Identify scheduler shared by every gateway client."""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Final
+
+# The gateway allows max_concurrency IDENTIFYs per window
+IDENTIFY_WINDOW: Final[float] = 5.0
+
+
+class IdentifyScheduler:
+    """Token bucket that paces IDENTIFYs across all clients.
+
+    At most max_concurrency slots are handed out per window. Clients that
+    have to wait are served in client-index order, so startup and reconnect
+    storms identify in a fixed sequence instead of a single burst.
+    """
+
+    def __init__(
+        self, max_concurrency: int = 1, window: float = IDENTIFY_WINDOW
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.window = window
+        self._grants: deque[float] = deque()
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._counter = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+        # Queue wait metrics
+        self.granted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def queued(self) -> int:
+        """Clients currently waiting for a slot."""
+        return sum(not future.done() for _, _, future in self._waiters)
+
+    async def acquire(self, client_index: int) -> float:
+        """Wait for an identify slot, return the seconds spent waiting."""
+        start = time.monotonic()
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (client_index, next(self._counter), future))
+        self._release()
+        await future
+
+        waited = time.monotonic() - start
+        self.granted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def _release(self) -> None:
+        """Hand out free slots and schedule the next release."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        now = time.monotonic()
+        while self._grants and self._grants[0] <= now - self.window:
+            self._grants.popleft()
+
+        while self._waiters and len(self._grants) < self.max_concurrency:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                # The waiter was cancelled while queued
+                continue
+            self._grants.append(now)
+            future.set_result(None)
+
+        if self._waiters:
+            delay = self._grants[0] + self.window - now
+            self._timer = asyncio.get_running_loop().call_later(delay, self._release)
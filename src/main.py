@@ -1,48 +1,177 @@
 """Main entry point for discord-streak."""
 
+import argparse
 import asyncio
+import contextlib
+import importlib
+import os
+import signal
 import sys
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+from pathlib import Path
 
 from pydantic import ValidationError
 
-from src.engine.runner import DiscordClient, run_all
-from src.models.config import Settings
-from src.utils.errors import AuthenticationError
-from src.utils.logger import log
+from src.engine.rest import close_rest_client, configure_rest_client
+from src.engine.runner import DiscordClient, Engine
+from src.models.config import Settings, default_ledger_file
+from src.models.results import User
+from src.utils.cache import TokenCache
+from src.utils.errors import AuthenticationError, DiscordStreakError
+from src.utils.errors import ConnectionError as GatewayError
+from src.utils.ledger import coverage
+from src.utils.logger import configure, log
 
 
-async def main() -> None:
-    """Initialize and run the Discord streak bot."""
+async def validate_token(client: DiscordClient, cache: TokenCache) -> User:
+    """Validate the token over REST and cache the result.
+
+    Only a rejected token drops the cache entry, an API outage raises
+    GatewayError and leaves it alone.
+    """
+    user = await client.get_user()
+
+    if not user:
+        cache.invalidate(client.token)
+        log("error", "Invalid token")
+        raise AuthenticationError("Invalid Discord token")
+
+    cache.put(client.token, user)
+    return user
+
+
+async def revalidate_token(
+    client: DiscordClient, cache: TokenCache, engine: Engine
+) -> None:
+    """Confirm a cached token once connected, keep it if Discord can't answer."""
+    # httpx is only loaded after the first connect, a cached start never waits
+    await engine.wait_connected()
+    import httpx
+
+    try:
+        await validate_token(client, cache)
+    except (httpx.HTTPError, GatewayError) as e:
+        log("warn", f"Could not revalidate token: {e}")
+
+
+def load_settings() -> Settings:
+    """Load settings, or log every configuration error and exit."""
     try:
-        settings = Settings()  # pyright: ignore[reportCallIssue]
+        return Settings()  # pyright: ignore[reportCallIssue]
     except ValidationError as e:
         for error in e.errors():
-            field = error["loc"][0] if error["loc"] else "unknown"
-            log("error", f"Configuration error: {field} - {error['msg']}")
+            message = error["msg"].removeprefix("Value error, ")
+            if error["loc"]:
+                message = f"{error['loc'][0]} - {message}"
+            log("error", f"Configuration error: {message}")
         sys.exit(1)
 
+
+def loop_factory(name: str) -> Callable[[], asyncio.AbstractEventLoop] | None:
+    """Event loop constructor for asyncio.run, None for the stdlib loop."""
+    if name == "uvloop":
+        return importlib.import_module("uvloop").new_event_loop
+    return None
+
+
+async def main(settings: Settings) -> None:
+    """Initialize and run the Discord streak bot."""
+    configure(settings.log_level, settings.log_format)
+    configure_rest_client(settings.api_url)
+
     # Validate token (start_time=0 since we only call get_user)
     client = DiscordClient(settings.token, settings.status, 0, 0)
-    user = await client.get_user()
+    cache = TokenCache(settings.cache_file, settings.cache_ttl)
 
-    if not user:
-        log("error", "Invalid token")
-        raise AuthenticationError("Invalid Discord token")
+    user = cached = cache.get(settings.token)
+    if user is None:
+        try:
+            user = await validate_token(client, cache)
+        except GatewayError as e:
+            log("error", f"Could not validate token: {e}")
+            raise
 
     log("info", f"Logged in as {user['username']} ({user['id']})")
     log("info", f"Status: {settings.status}")
     log("info", f"Servers: {len(settings.servers)}")
 
-    await run_all(settings)
+    engine = Engine(settings)
+    if cached is not None:
+        # Connect right away, a rejected token still stops the process
+        engine.add_service(revalidate_token(client, cache, engine))
+    # Container stops send SIGTERM, drain the sockets instead of dying
+    handlers = {signal.SIGTERM: engine.stop, signal.SIGINT: engine.stop}
+    if hasattr(signal, "SIGHUP"):
+        handlers[signal.SIGHUP] = engine.reload
+    loop = asyncio.get_running_loop()
+    for sig, handler in handlers.items():
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(sig, handler)
+
+    try:
+        await engine.run()
+    finally:
+        await close_rest_client()
+
+
+def print_coverage(path: Path, days: int) -> int:
+    """Print connected time per guild for the last few days."""
+    try:
+        report = coverage(path)
+    except (OSError, ValueError) as e:
+        log("error", f"Could not read uptime ledger: {e}")
+        return 1
+
+    today = date.today()
+    first = today - timedelta(days=days - 1)
+    midnight = datetime.combine(today, datetime.min.time())
+    elapsed_today = (datetime.now() - midnight).total_seconds()
+
+    for guild_id in sorted(report):
+        per_day = report[guild_id]
+        total = sum(seconds for day, seconds in per_day.items() if day >= first)
+        print(f"Guild {guild_id}: {total / 3600:.1f}h connected")
+        for offset in range(days):
+            day = first + timedelta(days=offset)
+            seconds = per_day.get(day, 0.0)
+            length = elapsed_today if day == today else 86400
+            percent = min(seconds / length, 1.0) * 100 if length else 0.0
+            hours, minutes = divmod(int(seconds) // 60, 60)
+            print(f"  {day}  {hours:2d}h {minutes:02d}m  {percent:5.1f}%")
+    if not report:
+        print("No connected time recorded")
+    return 0
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(prog="discord-streak")
+    commands = parser.add_subparsers(dest="command")
+    report = commands.add_parser("coverage", help="show connected time per day")
+    report.add_argument("--days", type=int, default=7, help="days to show")
+    report.add_argument(
+        "--file",
+        type=Path,
+        default=os.environ.get("DISCORD_LEDGER_FILE") or default_ledger_file(),
+        help="ledger file (default: $DISCORD_LEDGER_FILE or the state directory)",
+    )
+    return parser.parse_args(argv)
 
 
 def run() -> None:
-    """Run the main async function."""
+    """Run the main async function, or a subcommand."""
+    args = parse_args(sys.argv[1:])
+    if args.command == "coverage":
+        sys.exit(print_coverage(args.file, max(args.days, 1)))
+
+    settings = load_settings()
     try:
-        asyncio.run(main())
+        asyncio.run(main(settings), loop_factory=loop_factory(settings.event_loop))
     except KeyboardInterrupt:
         log("info", "Shutting down...")
-    except AuthenticationError:
+    except DiscordStreakError:
+        # Already logged where it was raised
         sys.exit(1)
 
 
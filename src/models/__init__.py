@@ -1,13 +1,17 @@
 """Pydantic models for configuration and results."""
 
-from src.models.config import Server, Settings, Status
+from src.models.config import Server, Settings, Status, StatusWindow
+from src.models.gateway import GatewayPayload, Opcode
 from src.models.results import ConnectionResult, ConnectionState, SessionState
 
 __all__ = [
     "ConnectionResult",
     "ConnectionState",
+    "GatewayPayload",
+    "Opcode",
     "Server",
     "SessionState",
     "Settings",
     "Status",
+    "StatusWindow",
 ]
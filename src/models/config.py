@@ -1,21 +1,82 @@
 """Configuration models using Pydantic."""
 
-from typing import Annotated, Final, Literal
+import importlib.util
+import json
+import os
+import tomllib
+from datetime import time
+from pathlib import Path
+from typing import Annotated, Any, Final, Literal, Self, cast
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    PrivateAttr,
+    TypeAdapter,
+    ValidationError,
+    field_validator,
+    model_validator,
+)
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 Status = Literal["online", "idle", "dnd"]
+Encoding = Literal["json", "etf"]
 
-GATEWAY_URL: Final[str] = "wss://gateway.discord.gg/?v=10&encoding=json"
+GATEWAY_BASE_URL: Final[str] = "wss://gateway.discord.gg"
+GATEWAY_VERSION: Final[int] = 10
+GATEWAY_QUERY: Final[str] = f"?v={GATEWAY_VERSION}&encoding=json"
+GATEWAY_URL: Final[str] = f"{GATEWAY_BASE_URL}/{GATEWAY_QUERY}"
 API_URL: Final[str] = "https://discord.com/api/v10"
 
+# Receive limits per gateway socket (websockets defaults)
+DEFAULT_MAX_MESSAGE_SIZE: Final[int] = 2**20
+DEFAULT_MAX_QUEUE: Final[int] = 16
+
+
+def gateway_url(
+    base: str = GATEWAY_BASE_URL,
+    *,
+    compress: bool = False,
+    encoding: Encoding = "json",
+) -> str:
+    """Build a gateway connection URL, optionally with zlib-stream compression."""
+    url = f"{base}/?v={GATEWAY_VERSION}&encoding={encoding}"
+    if compress:
+        url += "&compress=zlib-stream"
+    return url
+
+
+def default_cache_file() -> Path:
+    """Default cache location under $XDG_CACHE_HOME (or ~/.cache)."""
+    base = Path(os.environ.get("XDG_CACHE_HOME") or "~/.cache").expanduser()
+    return base / "discord-streak" / "users.json"
+
+
+def default_ledger_file() -> Path:
+    """Default uptime ledger location under $XDG_STATE_HOME (or ~/.local/state)."""
+    base = Path(os.environ.get("XDG_STATE_HOME") or "~/.local/state").expanduser()
+    return base / "discord-streak" / "uptime.ledger"
+
 
 class Server(BaseModel):
     """Discord server configuration with guild and channel IDs."""
 
+    # Hashable, so reloads can diff server lists
+    model_config = ConfigDict(frozen=True)
+
     guild_id: Annotated[str, Field(min_length=1)]
     channel_id: Annotated[str, Field(min_length=1)]
+    self_mute: bool = True
+    self_deaf: bool = True
+
+    @field_validator("guild_id", "channel_id", mode="before")
+    @classmethod
+    def coerce_numeric_id(cls, v: Any) -> Any:
+        """Accept IDs written as numbers in a servers file."""
+        if isinstance(v, int) and not isinstance(v, bool):
+            return str(v)
+        return v
 
     @field_validator("guild_id", "channel_id")
     @classmethod
@@ -27,6 +88,157 @@ class Server(BaseModel):
         return v
 
 
+# Validates a whole server list in one pass, errors carry the entry index
+SERVER_LIST: Final[TypeAdapter[list[Server]]] = TypeAdapter(list[Server])
+
+
+def _env_entries(raw: str) -> tuple[list[Any], list[str]]:
+    """Split DISCORD_SERVERS into entries and a label for each."""
+    entries: list[Any] = []
+    labels: list[str] = []
+    for number, pair in enumerate(raw.split(","), 1):
+        pair = pair.strip()
+        if not pair:
+            continue
+        guild_id, sep, channel_id = pair.partition(":")
+        # Left as a string when malformed, reported with the other errors
+        entries.append(
+            {"guild_id": guild_id.strip(), "channel_id": channel_id.strip()}
+            if sep
+            else pair
+        )
+        labels.append(f'DISCORD_SERVERS entry {number} "{pair}"')
+    return entries, labels
+
+
+def _file_entries(path: Path) -> tuple[list[Any], list[str]]:
+    """Read the server list of a TOML or JSON servers file."""
+    try:
+        text = path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        msg = f"Cannot read servers file {path}: {e}"
+        raise ValueError(msg) from e
+    try:
+        data: Any = tomllib.loads(text) if path.suffix == ".toml" else json.loads(text)
+    except (tomllib.TOMLDecodeError, json.JSONDecodeError) as e:
+        msg = f"Cannot parse servers file {path}: {e}"
+        raise ValueError(msg) from e
+
+    if isinstance(data, dict):
+        data = cast("dict[str, Any]", data).get("servers")
+    if not isinstance(data, list):
+        msg = f"Servers file {path} must contain a list of servers"
+        raise ValueError(msg)
+    entries = cast("list[Any]", data)
+    labels: list[str] = []
+    for index, entry in enumerate(entries):
+        label = f"{path} servers[{index}]"
+        if isinstance(entry, dict) and "guild_id" in entry:
+            label += f" (guild {entry['guild_id']})"
+        labels.append(label)
+    return entries, labels
+
+
+def load_servers(raw: str, path: Path | None = None) -> tuple[Server, ...]:
+    """Parse and validate every configured server at once.
+
+    Entries come from DISCORD_SERVERS, then from the servers file. All
+    invalid entries are reported together, each by its position in its
+    source. Duplicates are dropped.
+    """
+    entries, labels = _env_entries(raw)
+    if path is not None:
+        more, more_labels = _file_entries(path)
+        entries += more
+        labels += more_labels
+    if not entries:
+        msg = "No servers configured, set DISCORD_SERVERS or DISCORD_SERVERS_FILE"
+        raise ValueError(msg)
+
+    try:
+        servers = SERVER_LIST.validate_python(entries)
+    except ValidationError as e:
+        problems: list[str] = []
+        for error in e.errors():
+            position, *fields = error["loc"]
+            # A list adapter always puts the entry's position first
+            index = cast("int", position)
+            if isinstance(entries[index], str):
+                message = "expected guild_id:channel_id"
+            elif fields:
+                message = f"{'.'.join(map(str, fields))}: {error['msg']}"
+            else:
+                message = error["msg"]
+            problems.append(f"{labels[index]}: {message}")
+        msg = "Invalid servers:\n  " + "\n  ".join(problems)
+        raise ValueError(msg) from None
+    return tuple(dict.fromkeys(servers))
+
+
+class StatusWindow(BaseModel):
+    """A daily time range with its own status, in the host's local time."""
+
+    model_config = ConfigDict(frozen=True)
+
+    status: Status
+    start: time
+    # Before start for a range that runs past midnight
+    end: time
+
+    @model_validator(mode="after")
+    def validate_range(self) -> Self:
+        """Ensure the range isn't empty."""
+        if self.start == self.end:
+            msg = "start and end must differ"
+            raise ValueError(msg)
+        return self
+
+    def contains(self, moment: time) -> bool:
+        """Whether a time of day falls in the range, end excluded."""
+        if self.start < self.end:
+            return self.start <= moment < self.end
+        return moment >= self.start or moment < self.end
+
+
+def load_schedule(raw: str) -> tuple[StatusWindow, ...]:
+    """Parse a status schedule like "idle@23:00-07:00,dnd@09:00-12:00".
+
+    All invalid entries are reported together. Where windows overlap the
+    one listed first wins.
+    """
+    windows: list[StatusWindow] = []
+    problems: list[str] = []
+    for number, entry in enumerate(raw.split(","), 1):
+        entry = entry.strip()
+        if not entry:
+            continue
+        label = f'DISCORD_STATUS_SCHEDULE entry {number} "{entry}"'
+        status, _, hours = entry.partition("@")
+        start, sep, end = hours.partition("-")
+        if not sep:
+            problems.append(f"{label}: expected status@HH:MM-HH:MM")
+            continue
+        try:
+            windows.append(
+                StatusWindow.model_validate(
+                    {
+                        "status": status.strip(),
+                        "start": start.strip(),
+                        "end": end.strip(),
+                    }
+                )
+            )
+        except ValidationError as e:
+            for error in e.errors():
+                field = ".".join(map(str, error["loc"]))
+                message = f"{field}: {error['msg']}" if field else error["msg"]
+                problems.append(f"{label}: {message}")
+    if problems:
+        msg = "Invalid status schedule:\n  " + "\n  ".join(problems)
+        raise ValueError(msg)
+    return tuple(windows)
+
+
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
 
@@ -38,19 +250,61 @@ class Settings(BaseSettings):
 
     token: Annotated[str, Field(min_length=1)]
     status: Status = "online"
-    servers_raw: Annotated[str, Field(alias="DISCORD_SERVERS", min_length=1)]
+    compress: bool = False
+    multiplex: bool = False
+    identify_concurrency: Annotated[int, Field(gt=0)] = 1
+    breaker_threshold: Annotated[int, Field(ge=0)] = 3
+    ready_min_servers: Annotated[int, Field(ge=0)] = 1
+    health_port: Annotated[int, Field(ge=0, le=65535)] = 8080
+    shutdown_timeout: Annotated[float, Field(gt=0)] = 5.0
+    heartbeat_tolerance: Annotated[float, Field(ge=0)] = 1.0
+    log_level: Literal["debug", "info", "warn", "error"] = "info"
+    log_format: Literal["text", "json"] = "text"
+    encoding: Encoding = "json"
+    json_codec: Literal["auto", "orjson", "msgspec", "json"] = "auto"
+    event_loop: Literal["asyncio", "uvloop"] = "asyncio"
+    max_message_size: Annotated[int, Field(gt=0)] = DEFAULT_MAX_MESSAGE_SIZE
+    max_queue: Annotated[int, Field(gt=0)] = DEFAULT_MAX_QUEUE
+    cache_file: Path = Field(default_factory=default_cache_file)
+    cache_ttl: Annotated[int, Field(ge=0)] = 86400
+    ledger: bool = True
+    ledger_file: Path = Field(default_factory=default_ledger_file)
+    gateway_base_url: str = GATEWAY_BASE_URL
+    api_url: str = API_URL
+    servers_raw: Annotated[str, Field(alias="DISCORD_SERVERS")] = ""
+    servers_file: Path | None = None
+    status_schedule_raw: Annotated[str, Field(alias="DISCORD_STATUS_SCHEDULE")] = ""
+
+    _servers: tuple[Server, ...] = PrivateAttr(default=())
+    _schedule: tuple[StatusWindow, ...] = PrivateAttr(default=())
+
+    @field_validator("json_codec", "event_loop")
+    @classmethod
+    def validate_installed(cls, v: str) -> str:
+        """Ensure an explicitly chosen codec or loop is installed."""
+        if v not in ("auto", "asyncio") and importlib.util.find_spec(v) is None:
+            msg = f"{v} is not installed"
+            raise ValueError(msg)
+        return v
+
+    @model_validator(mode="after")
+    def _load_servers(self) -> Self:
+        """Parse and validate the server list once, when settings load."""
+        self._servers = load_servers(self.servers_raw, self.servers_file)
+        return self
+
+    @model_validator(mode="after")
+    def _load_schedule(self) -> Self:
+        """Parse the status schedule once, when settings load."""
+        self._schedule = load_schedule(self.status_schedule_raw)
+        return self
 
     @property
-    def servers(self) -> list[Server]:
-        """Parse servers from comma-separated guild_id:channel_id pairs."""
-        servers: list[Server] = []
-        for pair in self.servers_raw.split(","):
-            pair = pair.strip()
-            if ":" not in pair:
-                msg = f"Invalid server format: {pair} (expected guild_id:channel_id)"
-                raise ValueError(msg)
-            guild_id, channel_id = pair.split(":", 1)
-            servers.append(
-                Server(guild_id=guild_id.strip(), channel_id=channel_id.strip())
-            )
-        return servers
+    def servers(self) -> tuple[Server, ...]:
+        """Servers to join, in configuration order."""
+        return self._servers
+
+    @property
+    def schedule(self) -> tuple[StatusWindow, ...]:
+        """Status windows that override the status, in priority order."""
+        return self._schedule
@@ -0,0 +1,28 @@
+"""Discord Gateway protocol models."""
+
+from enum import IntEnum
+from typing import Any, TypedDict
+
+
+class Opcode(IntEnum):
+    """Gateway opcodes used by the client."""
+
+    DISPATCH = 0
+    HEARTBEAT = 1
+    IDENTIFY = 2
+    PRESENCE_UPDATE = 3
+    VOICE_STATE_UPDATE = 4
+    RESUME = 6
+    RECONNECT = 7
+    INVALID_SESSION = 9
+    HELLO = 10
+    HEARTBEAT_ACK = 11
+
+
+class GatewayPayload(TypedDict):
+    """Gateway frame envelope."""
+
+    op: int
+    d: Any
+    s: int | None
+    t: str | None
@@ -1,10 +1,11 @@
 """Connection result and state tracking models."""
 
+from collections.abc import Callable
 from datetime import datetime
 from enum import Enum
 from typing import TypedDict
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class ConnectionState(str, Enum):
@@ -19,27 +20,49 @@ class ConnectionState(str, Enum):
 class SessionState(BaseModel):
     """Tracks connection state for backoff reset."""
 
+    server_index: int = Field(default=0)
     connected: bool = Field(default=False)
     state: ConnectionState = Field(default=ConnectionState.DISCONNECTED)
     last_connected: datetime | None = Field(default=None)
     reconnect_attempts: int = Field(default=0)
+    reconnects: int = Field(default=0)
+    latency: float | None = Field(default=None)
+    last_heartbeat: datetime | None = Field(default=None)
+
+    # Called with (server_index, new_state) on every state change
+    _recorder: Callable[[int, ConnectionState], None] | None = PrivateAttr(default=None)
+
+    def attach(self, recorder: Callable[[int, ConnectionState], None]) -> None:
+        """Report every future state change to a recorder."""
+        self._recorder = recorder
+
+    def _set_state(self, state: ConnectionState) -> None:
+        if state != self.state and self._recorder is not None:
+            self._recorder(self.server_index, state)
+        self.state = state
 
     def mark_connected(self) -> None:
         """Mark session as successfully connected."""
         self.connected = True
-        self.state = ConnectionState.CONNECTED
+        self._set_state(ConnectionState.CONNECTED)
         self.last_connected = datetime.now()
         self.reconnect_attempts = 0
 
+    def mark_heartbeat(self, latency: float | None) -> None:
+        """Record an acknowledged heartbeat and its round-trip latency."""
+        self.last_heartbeat = datetime.now()
+        self.latency = latency
+
     def mark_disconnected(self) -> None:
         """Mark session as disconnected."""
         self.connected = False
-        self.state = ConnectionState.DISCONNECTED
+        self._set_state(ConnectionState.DISCONNECTED)
 
     def mark_reconnecting(self) -> None:
         """Mark session as attempting reconnection."""
-        self.state = ConnectionState.RECONNECTING
+        self._set_state(ConnectionState.RECONNECTING)
         self.reconnect_attempts += 1
+        self.reconnects += 1
 
 
 class ConnectionResult(BaseModel):
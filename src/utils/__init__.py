@@ -1,11 +1,20 @@
 """Utility functions and custom exceptions."""
 
-from src.utils.errors import AuthenticationError, ConfigError, ConnectionError
-from src.utils.logger import log
+from src.utils.errors import (
+    AuthenticationError,
+    ConfigError,
+    ConnectionError,
+    HeartbeatTimeoutError,
+    ReconnectRequestedError,
+)
+from src.utils.logger import configure, log
 
 __all__ = [
     "AuthenticationError",
     "ConfigError",
     "ConnectionError",
+    "HeartbeatTimeoutError",
+    "ReconnectRequestedError",
+    "configure",
     "log",
 ]
@@ -0,0 +1,86 @@
+"""Persistent cache for token validation results."""
+
+import hashlib
+import os
+import time
+from pathlib import Path
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from src.models.results import User
+from src.utils.logger import log
+
+
+class CachedUser(BaseModel):
+    """A validated user and when the validation expires."""
+
+    user: User
+    expires_at: float
+
+
+CacheEntries = dict[str, CachedUser]
+_entries_adapter: TypeAdapter[CacheEntries] = TypeAdapter(CacheEntries)
+
+
+class TokenCache:
+    """On-disk cache of validated users, keyed by a hash of the token.
+
+    The token itself is never written to disk. The cache is best effort:
+    unreadable or unwritable files behave like an empty cache.
+    """
+
+    def __init__(self, path: Path, ttl: float) -> None:
+        self.path = path
+        self.ttl = ttl
+
+    @staticmethod
+    def key(token: str) -> str:
+        """Hash a token into its cache key."""
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def _load(self) -> CacheEntries:
+        try:
+            return _entries_adapter.validate_json(self.path.read_bytes())
+        except (OSError, ValidationError):
+            return {}
+
+    def _save(self, entries: CacheEntries) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(_entries_adapter.dump_json(entries))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log("warn", f"Could not write token cache: {e}")
+
+    def get(self, token: str) -> User | None:
+        """Return the cached user for a token if it hasn't expired."""
+        if self.ttl <= 0:
+            return None
+        entry = self._load().get(self.key(token))
+        if entry is None or entry.expires_at < time.time():
+            return None
+        return entry.user
+
+    def put(self, token: str, user: User) -> None:
+        """Cache a validated user for the configured TTL."""
+        if self.ttl <= 0:
+            return
+        now = time.time()
+        # Drop expired entries while we're rewriting the file anyway
+        entries = {
+            key: entry for key, entry in self._load().items() if entry.expires_at >= now
+        }
+        entries[self.key(token)] = CachedUser(
+            user={"id": user["id"], "username": user["username"]},
+            expires_at=now + self.ttl,
+        )
+        self._save(entries)
+
+    def invalidate(self, token: str) -> None:
+        """Drop the cached user for a token."""
+        entries = self._load()
+        if entries.pop(self.key(token), None) is not None:
+            self._save(entries)
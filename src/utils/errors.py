@@ -15,3 +15,11 @@ class AuthenticationError(DiscordStreakError):
 
 class ConnectionError(DiscordStreakError):
     """Raised when Discord connection fails."""
+
+
+class HeartbeatTimeoutError(DiscordStreakError):
+    """Raised when the gateway stops acknowledging heartbeats."""
+
+
+class ReconnectRequestedError(DiscordStreakError):
+    """Raised when the gateway asks the client to reconnect (op 7)."""
@@ -0,0 +1,235 @@
+"""Append-only uptime ledger of connection state transitions."""
+
+import asyncio
+import io
+import mmap
+import os
+import struct
+import time
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Final, NamedTuple
+
+from src.models.results import ConnectionState
+from src.utils.logger import log
+
+MAGIC: Final[bytes] = b"DSLG"
+VERSION: Final[int] = 2
+# magic, version, record count, last time the writer was known to be alive
+HEADER: Final[struct.Struct] = struct.Struct("<4sH2xQd")
+# timestamp, guild ID, state code (padded to 24 bytes)
+RECORD: Final[struct.Struct] = struct.Struct("<dQB7x")
+
+# The file grows by this many records at a time
+GROWTH: Final[int] = 4096
+# Seconds between liveness checkpoints while the writer runs
+CHECKPOINT_INTERVAL: Final[float] = 60.0
+# Guild ID of records that apply to every server, no snowflake is 0
+ALL_SERVERS: Final[int] = 0
+
+STATES: Final[tuple[ConnectionState, ...]] = tuple(ConnectionState)
+STATE_CODES: Final[dict[ConnectionState, int]] = {
+    state: code for code, state in enumerate(STATES)
+}
+
+# Guild ID -> day -> connected seconds
+Coverage = dict[int, dict[date, float]]
+
+
+class LedgerRecord(NamedTuple):
+    """A single state transition."""
+
+    time: float
+    guild_id: int
+    state: ConnectionState
+
+
+class Ledger:
+    """Memory-mapped ledger with one fixed-size record per transition.
+
+    Appending a record packs 24 bytes into the mapping and bumps the count
+    in the header, there is no syscall unless the file has to grow. Records
+    are keyed by guild ID, so history follows a server however the server
+    list is reordered across restarts and reloads. The
+    header also keeps a liveness timestamp that is checkpointed once a
+    minute, so after a crash the connected time can be cut off where the
+    process stopped instead of where it restarted.
+
+    Like the token cache, the ledger is best effort: if the file can't be
+    opened or mapped, recording is disabled with a warning.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.count = 0
+        self._file: io.BufferedRandom | None = None
+        self._mm: mmap.mmap | None = None
+        try:
+            self._open()
+        except (OSError, ValueError) as e:
+            log("warn", f"Uptime ledger disabled: {e}")
+            self._release()
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._file = os.fdopen(fd, "r+b")
+        size = os.fstat(fd).st_size
+        if size >= HEADER.size:
+            magic, version, _, _ = HEADER.unpack(self._file.read(HEADER.size))
+            if magic == MAGIC and version < VERSION:
+                # Older records carry a per-process index instead of the guild
+                old = self.path.with_name(f"{self.path.name}.v{version}")
+                self._release()
+                self.path.replace(old)
+                log("warn", f"Uptime ledger of an older version moved to {old}")
+                self._open()
+                return
+        if size == 0:
+            self._file.truncate(HEADER.size + GROWTH * RECORD.size)
+        self._mm = mmap.mmap(fd, 0)
+
+        if size == 0:
+            HEADER.pack_into(self._mm, 0, MAGIC, VERSION, 0, time.time())
+            return
+
+        count, alive = _check_header(self.path, self._mm)
+        self.count = count
+        if count:
+            # Whatever was connected in the last run ended when it went quiet
+            self.record(ALL_SERVERS, ConnectionState.DISCONNECTED, alive)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether records are being written."""
+        return self._mm is not None
+
+    def record(
+        self,
+        guild_id: int,
+        state: ConnectionState,
+        timestamp: float | None = None,
+    ) -> None:
+        """Append a state transition of a server, by its guild ID."""
+        mm = self._mm
+        if mm is None:
+            return
+        offset = HEADER.size + self.count * RECORD.size
+        if offset + RECORD.size > len(mm):
+            mm = self._grow()
+            if mm is None:
+                return
+        now = time.time() if timestamp is None else timestamp
+        RECORD.pack_into(mm, offset, now, guild_id, STATE_CODES[state])
+        # Count goes last, a torn write is never counted
+        self.count += 1
+        HEADER.pack_into(mm, 0, MAGIC, VERSION, self.count, now)
+
+    def touch(self) -> None:
+        """Checkpoint that the writer is still alive."""
+        if self._mm is not None:
+            HEADER.pack_into(self._mm, 0, MAGIC, VERSION, self.count, time.time())
+
+    def _grow(self) -> mmap.mmap | None:
+        if self._mm is None or self._file is None:
+            return None
+        try:
+            self._mm.resize(len(self._mm) + GROWTH * RECORD.size)
+        except (OSError, SystemError) as e:
+            log("warn", f"Uptime ledger disabled: {e}")
+            self.close()
+            return None
+        return self._mm
+
+    async def run(self, interval: float = CHECKPOINT_INTERVAL) -> None:
+        """Checkpoint liveness forever."""
+        while self.enabled:
+            await asyncio.sleep(interval)
+            self.touch()
+
+    def close(self) -> None:
+        """Checkpoint, flush and unmap the ledger."""
+        if self._mm is not None:
+            self.touch()
+            self._mm.flush()
+        self._release()
+
+    def _release(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _check_header(path: Path, mm: mmap.mmap) -> tuple[int, float]:
+    """Validate the header, return the record count and liveness time."""
+    if len(mm) < HEADER.size:
+        msg = f"{path} is too short to be a ledger"
+        raise ValueError(msg)
+    magic, version, count, alive = HEADER.unpack_from(mm)
+    if magic != MAGIC or version != VERSION:
+        msg = f"{path} is not a version {VERSION} ledger"
+        raise ValueError(msg)
+    if HEADER.size + count * RECORD.size > len(mm):
+        msg = f"{path} counts {count} records but is cut short"
+        raise ValueError(msg)
+    return count, alive
+
+
+def read_ledger(path: Path) -> tuple[list[LedgerRecord], float]:
+    """Read every record and the last liveness checkpoint."""
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        count, alive = _check_header(path, mm)
+        end = HEADER.size + count * RECORD.size
+        records = [
+            LedgerRecord(timestamp, guild_id, STATES[code])
+            for timestamp, guild_id, code in RECORD.iter_unpack(mm[HEADER.size : end])
+        ]
+    return records, alive
+
+
+def _split_days(start: float, end: float) -> Iterator[tuple[date, float]]:
+    """Split an interval into seconds per local calendar day."""
+    while start < end:
+        day = date.fromtimestamp(start)
+        midnight = datetime.combine(day + timedelta(days=1), datetime.min.time())
+        boundary = min(end, midnight.timestamp())
+        yield day, boundary - start
+        start = boundary
+
+
+def coverage(path: Path, until: float | None = None) -> Coverage:
+    """Connected seconds per guild per local day.
+
+    Intervals still open at the end of the ledger are closed at `until`,
+    or at the writer's last liveness checkpoint.
+    """
+    records, alive = read_ledger(path)
+    end = alive if until is None else until
+    result: Coverage = {}
+    # Guild ID -> when its current connected interval started
+    connected_since: dict[int, float] = {}
+
+    def close(guild_id: int, timestamp: float) -> None:
+        start = connected_since.pop(guild_id, None)
+        if start is None:
+            return
+        days = result.setdefault(guild_id, {})
+        for day, seconds in _split_days(start, timestamp):
+            days[day] = days.get(day, 0.0) + seconds
+
+    for timestamp, guild_id, state in records:
+        if guild_id == ALL_SERVERS:
+            for open_guild in list(connected_since):
+                close(open_guild, timestamp)
+        elif state == ConnectionState.CONNECTED:
+            connected_since.setdefault(guild_id, timestamp)
+        else:
+            close(guild_id, timestamp)
+
+    for guild_id in list(connected_since):
+        close(guild_id, max(end, connected_since[guild_id]))
+    return result
@@ -1,25 +1,214 @@
-"""Colored logging utility."""
+"""Non-blocking colored and structured logging utility."""
 
+import atexit
+import json
+import queue
+import sys
+import threading
+import time
 from datetime import datetime
-from typing import Literal
+from typing import Any, Final, Literal, NamedTuple, TextIO
 
 from colorama import Fore, Style, init
 
 init()
 
-LogLevel = Literal["info", "warn", "error"]
+LogLevel = Literal["debug", "info", "warn", "error"]
+LogFormat = Literal["text", "json"]
 
 LEVEL_COLORS: dict[LogLevel, str] = {
+    "debug": Fore.WHITE,
     "info": Fore.CYAN,
     "warn": Fore.YELLOW,
     "error": Fore.RED,
 }
+LEVEL_ORDER: Final[dict[LogLevel, int]] = {
+    "debug": 10,
+    "info": 20,
+    "warn": 30,
+    "error": 40,
+}
+
+# Lines buffered for the writer thread before new ones are dropped
+MAX_PENDING: Final[int] = 10_000
+# Messages allowed per rate-limit key within one window
+RATE_LIMIT: Final[int] = 5
+RATE_WINDOW: Final[float] = 60.0
+
+
+class Record(NamedTuple):
+    """A log line waiting to be written."""
+
+    time: float
+    level: LogLevel
+    message: str
+    server: int | None
+    state: str | None
+    suppressed: int
+
+
+class Logger:
+    """Logger that formats and writes on a background thread.
+
+    log() only filters and enqueues, so a slow stdout never blocks the
+    event loop. Lines logged with a rate-limit key are capped at
+    `rate_limit` per `rate_window` seconds, and the next line that gets
+    through reports how many were suppressed.
+    """
+
+    def __init__(
+        self,
+        level: LogLevel = "info",
+        fmt: LogFormat = "text",
+        stream: TextIO | None = None,
+        *,
+        rate_limit: int = RATE_LIMIT,
+        rate_window: float = RATE_WINDOW,
+    ) -> None:
+        self.level: LogLevel = level
+        self.fmt: LogFormat = fmt
+        self.stream = stream
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.dropped = 0
+        self._queue: queue.Queue[Record | None] = queue.Queue(MAX_PENDING)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        # Rate-limit key -> (window start, lines in window, lines suppressed)
+        self._rates: dict[str, tuple[float, int, int]] = {}
+        # Timestamps are formatted once per second, not once per line
+        self._second = -1
+        self._timestamp = ""
+
+    def log(
+        self,
+        level: LogLevel,
+        message: str,
+        *,
+        server: int | None = None,
+        state: str | None = None,
+        key: str | None = None,
+    ) -> None:
+        """Queue a message, dropping it if filtered or rate limited."""
+        if LEVEL_ORDER[level] < LEVEL_ORDER[self.level]:
+            return
+
+        now = time.time()
+        suppressed = 0
+        if key is not None:
+            start, count, suppressed = self._rates.get(key, (now, 0, 0))
+            if now - start >= self.rate_window:
+                start, count = now, 0
+            if count >= self.rate_limit:
+                self._rates[key] = (start, count, suppressed + 1)
+                return
+            self._rates[key] = (start, count + 1, 0)
+
+        self._start()
+        try:
+            self._queue.put_nowait(
+                Record(now, level, message, server, state, suppressed)
+            )
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Block until every queued line has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Write what is queued and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="logger", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            record = self._queue.get()
+            try:
+                if record is None:
+                    return
+                self._write(self._format(record))
+                if self.dropped:
+                    dropped, self.dropped = self.dropped, 0
+                    notice = f"Log queue full, dropped {dropped} lines"
+                    self._write(
+                        self._format(Record(time.time(), "warn", notice, None, None, 0))
+                    )
+            finally:
+                self._queue.task_done()
+
+    def _write(self, line: str) -> None:
+        # Resolved per line so redirected or captured stdout is honoured
+        stream = self.stream or sys.stdout
+        stream.write(line + "\n")
+        stream.flush()
+
+    def _format(self, record: Record) -> str:
+        message = record.message
+        if record.suppressed:
+            message += f" ({record.suppressed} similar suppressed)"
+
+        if self.fmt == "json":
+            entry: dict[str, Any] = {
+                "time": datetime.fromtimestamp(record.time).isoformat(
+                    timespec="milliseconds"
+                ),
+                "level": record.level,
+                "message": message,
+            }
+            if record.server is not None:
+                entry["server"] = record.server
+            if record.state is not None:
+                entry["state"] = record.state
+            return json.dumps(entry, ensure_ascii=False)
+
+        second = int(record.time)
+        if second != self._second:
+            self._second = second
+            self._timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+        color = LEVEL_COLORS.get(record.level, Fore.WHITE)
+        return (
+            f"{Fore.WHITE}[{self._timestamp}] {color}[{record.level.upper()}]"
+            f"{Style.RESET_ALL} {message}"
+        )
+
+
+_logger = Logger()
+atexit.register(_logger.close)
+
+
+def configure(level: LogLevel = "info", fmt: LogFormat = "text") -> None:
+    """Set the minimum level and output format of the process logger."""
+    _logger.level = level
+    _logger.fmt = fmt
+
 
+def log(
+    level: LogLevel,
+    message: str,
+    *,
+    server: int | None = None,
+    state: str | None = None,
+    key: str | None = None,
+) -> None:
+    """Log a message with colored level indicator (or as a JSON line).
 
-def log(level: LogLevel, message: str) -> None:
-    """Log a message with colored level indicator."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    color = LEVEL_COLORS.get(level, Fore.WHITE)
-    print(
-        f"{Fore.WHITE}[{timestamp}] {color}[{level.upper()}]{Style.RESET_ALL} {message}"
-    )
+    server (numbered from 1, like the [Server N] labels) and state are
+    included as fields in JSON output. Messages that share a key are rate
+    limited together.
+    """
+    _logger.log(level, message, server=server, state=state, key=key)
@@ -0,0 +1,465 @@
+"""Local Discord gateway and REST stand-in.
+
+Speaks enough of the gateway protocol for the engine to connect for real:
+HELLO, IDENTIFY/READY, RESUME/RESUMED, heartbeat/ACK and voice state
+updates. Plain HTTP requests on the same port serve GET /api/v10/users/@me,
+a /_control/drop endpoint that closes every socket and /_control/stats.
+
+With a Chaos config the stand-in also injects faults on a seeded schedule:
+dropped sockets with assorted close codes, aborted transports, op 7
+RECONNECT, op 9 INVALID_SESSION, delayed or missing heartbeat ACKs and
+slow reads.
+
+Run standalone with: python -m tests.fakes.gateway [--port N] [--chaos]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import random
+from collections import Counter
+from collections.abc import Coroutine
+from dataclasses import asdict, dataclass, field
+from http import HTTPStatus
+from typing import Any, cast
+from urllib.parse import parse_qs, urlsplit
+
+from websockets.asyncio.server import Server, ServerConnection, serve
+from websockets.datastructures import Headers
+from websockets.exceptions import ConnectionClosed
+from websockets.http11 import Request, Response
+
+from src.engine import etf
+from src.models.gateway import Opcode
+
+API_PREFIX = "/api/v10"
+USER: dict[str, str] = {"id": "100000000000000001", "username": "streak"}
+# Fields the gateway sends as integers when the socket uses encoding=etf
+SNOWFLAKE_KEYS: frozenset[str] = frozenset({"id", "user_id", "guild_id", "channel_id"})
+
+# Close codes after which a client is expected to reconnect (none are fatal)
+CHAOS_CLOSE_CODES: tuple[int, ...] = (
+    1001,
+    1011,
+    4000,
+    4001,
+    4002,
+    4003,
+    4005,
+    4007,
+    4008,
+    4009,
+)
+
+
+@dataclass
+class Chaos:
+    """Fault injection schedule, reproducible from its seed.
+
+    Every connection gets its own generator seeded from `seed` and the
+    connection number, so a run replays the same faults in the same order.
+    """
+
+    seed: int = 0
+    # Mean seconds between connection-level faults on each socket
+    mean_interval: float = 20.0
+    # Relative weights of the connection-level faults
+    weights: dict[str, float] = field(
+        default_factory=lambda: {
+            "close": 4.0,
+            "abort": 2.0,
+            "reconnect": 2.0,
+            "invalid_session": 1.0,
+        }
+    )
+    # Chance per heartbeat that the ACK is dropped or delayed
+    ack_missing: float = 0.02
+    ack_delay: float = 0.1
+    # Chance per client payload that reading it stalls
+    slow_read: float = 0.05
+    # Longest delayed ACK, stalled read or grace after op 7, in seconds
+    max_delay: float = 2.0
+
+
+@dataclass
+class GatewayStats:
+    """What the stand-in has seen so far."""
+
+    connections: int = 0
+    identifies: int = 0
+    resumes: int = 0
+    heartbeats: int = 0
+    voice_states: list[dict[str, Any]] = field(default_factory=list[dict[str, Any]])
+    presences: int = 0
+    rest_requests: int = 0
+    faults: Counter[str] = field(default_factory=Counter[str])
+    # Close codes of sockets the client closed
+    client_closes: Counter[int] = field(default_factory=Counter[int])
+
+
+@dataclass
+class FakeSession:
+    """A session the stand-in handed out, kept so it can be resumed."""
+
+    session_id: str
+    sequence: int = 0
+
+
+class FakeGateway:
+    """Asyncio websocket server that behaves like the Discord gateway."""
+
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        heartbeat_interval: int = 41250,
+        token: str = "token",
+        chaos: Chaos | None = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.heartbeat_interval = heartbeat_interval
+        self.token = token
+        self.chaos = chaos
+        self.stats = GatewayStats()
+        self.sessions: dict[str, FakeSession] = {}
+        self.sockets: set[ServerConnection] = set()
+        self._ids = itertools.count(1)
+        self._server: Server | None = None
+        self._tasks: set[asyncio.Task[Any]] = set()
+        self._rngs: dict[ServerConnection, random.Random] = {}
+        # Sockets that connected with encoding=etf
+        self._etf: set[ServerConnection] = set()
+
+    @property
+    def url(self) -> str:
+        """Gateway base URL, as used for DISCORD_GATEWAY_BASE_URL."""
+        return f"ws://{self.host}:{self.port}"
+
+    @property
+    def api_url(self) -> str:
+        """REST base URL, as used for DISCORD_API_URL."""
+        return f"http://{self.host}:{self.port}{API_PREFIX}"
+
+    async def start(self) -> None:
+        """Start listening, picking a free port if none was given."""
+        self._server = await serve(
+            self._handle,
+            self.host,
+            self.port,
+            process_request=self._process_request,
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        """Stop the server and close every socket."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "FakeGateway":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.close()
+
+    async def drop_all(self, code: int = 4000, reason: str = "Dropped") -> int:
+        """Close every open socket with a close code, return how many."""
+        sockets = list(self.sockets)
+        await asyncio.gather(
+            *(ws.close(code, reason) for ws in sockets), return_exceptions=True
+        )
+        return len(sockets)
+
+    async def invalidate_all(self) -> int:
+        """Forget every session and send op 9 to every open socket."""
+        self.sessions.clear()
+        sockets = list(self.sockets)
+        await asyncio.gather(
+            *(
+                self.send(ws, {"op": Opcode.INVALID_SESSION, "d": False})
+                for ws in sockets
+            ),
+            return_exceptions=True,
+        )
+        return len(sockets)
+
+    def _process_request(
+        self, connection: ServerConnection, request: Request
+    ) -> Response | None:
+        """Serve plain HTTP requests, let websocket upgrades through."""
+        if request.headers.get("Upgrade", "").lower() == "websocket":
+            return None
+
+        self.stats.rest_requests += 1
+        path = request.path.split("?", 1)[0]
+        if path == f"{API_PREFIX}/users/@me":
+            if request.headers.get("Authorization") != self.token:
+                return _json_response(
+                    HTTPStatus.UNAUTHORIZED, {"message": "401: Unauthorized"}
+                )
+            return _json_response(HTTPStatus.OK, USER)
+        if path == "/_control/drop":
+            self._spawn(self.drop_all())
+            return _json_response(HTTPStatus.OK, {"dropped": len(self.sockets)})
+        if path == "/_control/stats":
+            stats = asdict(self.stats)
+            stats["voice_states"] = len(self.stats.voice_states)
+            # asdict() would rebuild the Counters from (key, value) pairs
+            stats["faults"] = dict(self.stats.faults)
+            stats["client_closes"] = dict(self.stats.client_closes)
+            return _json_response(HTTPStatus.OK, stats)
+        return _json_response(HTTPStatus.NOT_FOUND, {"message": "404: Not Found"})
+
+    def _spawn(self, coro: Coroutine[Any, Any, Any]) -> None:
+        """Run a background task, keeping a reference until it finishes."""
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _handle(self, ws: ServerConnection) -> None:
+        """Drive one gateway connection."""
+        self.stats.connections += 1
+        self.sockets.add(ws)
+        if ws.request is not None:
+            query = parse_qs(urlsplit(ws.request.path).query)
+            if query.get("encoding") == ["etf"]:
+                self._etf.add(ws)
+        session: FakeSession | None = None
+        faults: asyncio.Task[None] | None = None
+        if self.chaos is not None:
+            seed = f"{self.chaos.seed}:{self.stats.connections}"
+            self._rngs[ws] = random.Random(seed)
+            faults = asyncio.create_task(self._inject_faults(ws, self.chaos))
+        try:
+            await self.send(
+                ws,
+                {
+                    "op": Opcode.HELLO,
+                    "d": {"heartbeat_interval": self.heartbeat_interval},
+                },
+            )
+            async for message in ws:
+                payload = (
+                    etf.decode(message)  # pyright: ignore[reportArgumentType]
+                    if ws in self._etf
+                    else json.loads(message)
+                )
+                await self._maybe_stall(ws)
+                session = await self.on_payload(ws, payload, session)
+        except ConnectionClosed:
+            pass
+        finally:
+            self._on_closed(ws, session)
+            self.sockets.discard(ws)
+            self._etf.discard(ws)
+            self._rngs.pop(ws, None)
+            if faults is not None:
+                faults.cancel()
+
+    def _on_closed(self, ws: ServerConnection, session: FakeSession | None) -> None:
+        """Record a client-side close, 1000 and 1001 end the session."""
+        rcvd = ws.protocol.close_rcvd
+        if rcvd is None or not ws.protocol.close_rcvd_then_sent:
+            return
+        self.stats.client_closes[rcvd.code] += 1
+        if session is not None and rcvd.code in (1000, 1001):
+            self.sessions.pop(session.session_id, None)
+
+    async def _inject_faults(self, ws: ServerConnection, chaos: Chaos) -> None:
+        """Hit one connection with a fault every so often until it closes."""
+        rng = self._rngs[ws]
+        kinds = list(chaos.weights)
+        weights = list(chaos.weights.values())
+        with contextlib.suppress(ConnectionClosed):
+            while True:
+                await asyncio.sleep(rng.expovariate(1 / chaos.mean_interval))
+                kind = rng.choices(kinds, weights)[0]
+                self.stats.faults[kind] += 1
+                if kind == "close":
+                    code = rng.choice(CHAOS_CLOSE_CODES)
+                    await ws.close(code, "Chaos")
+                    return
+                if kind == "abort":
+                    # No close frame, the client sees an abnormal closure
+                    ws.transport.abort()
+                    return
+                if kind == "reconnect":
+                    await self.send(ws, {"op": Opcode.RECONNECT})
+                    # The gateway hangs up on clients that ignore op 7
+                    await asyncio.sleep(rng.uniform(0, chaos.max_delay))
+                    await ws.close(4000, "Reconnect requested")
+                    return
+                if kind == "invalid_session":
+                    self.sessions.clear()
+                    await self.send(ws, {"op": Opcode.INVALID_SESSION, "d": False})
+
+    async def _maybe_stall(self, ws: ServerConnection) -> None:
+        """Sometimes wait before reading on, like a congested gateway."""
+        rng = self._rngs.get(ws)
+        if self.chaos is None or rng is None:
+            return
+        if rng.random() < self.chaos.slow_read:
+            self.stats.faults["slow_read"] += 1
+            await asyncio.sleep(rng.uniform(0, self.chaos.max_delay))
+
+    async def _ack(self, ws: ServerConnection) -> None:
+        """Acknowledge a heartbeat, unless chaos drops or delays it."""
+        rng = self._rngs.get(ws)
+        if self.chaos is not None and rng is not None:
+            roll = rng.random()
+            if roll < self.chaos.ack_missing:
+                self.stats.faults["ack_missing"] += 1
+                return
+            if roll < self.chaos.ack_missing + self.chaos.ack_delay:
+                self.stats.faults["ack_delay"] += 1
+                delay = rng.uniform(0, self.chaos.max_delay)
+                self._spawn(self._send_later(ws, delay, {"op": Opcode.HEARTBEAT_ACK}))
+                return
+        await self.send(ws, {"op": Opcode.HEARTBEAT_ACK})
+
+    async def _send_later(
+        self, ws: ServerConnection, delay: float, payload: dict[str, Any]
+    ) -> None:
+        await asyncio.sleep(delay)
+        with contextlib.suppress(ConnectionClosed):
+            await self.send(ws, payload)
+
+    async def on_payload(
+        self,
+        ws: ServerConnection,
+        payload: dict[str, Any],
+        session: FakeSession | None,
+    ) -> FakeSession | None:
+        """Answer one client payload, return the connection's session."""
+        op = payload["op"]
+        data: Any = payload.get("d")
+
+        if op == Opcode.HEARTBEAT:
+            self.stats.heartbeats += 1
+            await self._ack(ws)
+        elif op == Opcode.IDENTIFY:
+            self.stats.identifies += 1
+            if data["token"] != self.token:
+                await ws.close(4004, "Authentication failed")
+                return None
+            session = FakeSession(f"session-{next(self._ids)}")
+            self.sessions[session.session_id] = session
+            await self.dispatch(
+                ws,
+                session,
+                "READY",
+                {
+                    "v": 10,
+                    "user": USER,
+                    "session_id": session.session_id,
+                    "resume_gateway_url": self.url,
+                    "guilds": [],
+                },
+            )
+        elif op == Opcode.RESUME:
+            self.stats.resumes += 1
+            session = self.sessions.get(data["session_id"])
+            if session is None:
+                await self.send(ws, {"op": Opcode.INVALID_SESSION, "d": False})
+            else:
+                await self.dispatch(ws, session, "RESUMED", None)
+        elif op == Opcode.VOICE_STATE_UPDATE:
+            self.stats.voice_states.append(data)
+            if session is not None:
+                # The voice state of our own user, as every client sees it
+                state = {
+                    **data,
+                    "user_id": USER["id"],
+                    "session_id": session.session_id,
+                }
+                await self.dispatch(ws, session, "VOICE_STATE_UPDATE", state)
+        elif op == Opcode.PRESENCE_UPDATE:
+            self.stats.presences += 1
+        return session
+
+    async def send(self, ws: ServerConnection, payload: dict[str, Any]) -> None:
+        """Send a payload with the envelope fields the gateway always has."""
+        frame = {"t": None, "s": None, "op": payload["op"], "d": payload.get("d")}
+        await ws.send(self._encode(ws, frame))
+
+    async def dispatch(
+        self, ws: ServerConnection, session: FakeSession, event: str, data: Any
+    ) -> None:
+        """Send a dispatch, advancing the session's sequence number."""
+        session.sequence += 1
+        frame = {"t": event, "s": session.sequence, "op": Opcode.DISPATCH, "d": data}
+        await ws.send(self._encode(ws, frame))
+
+    def _encode(self, ws: ServerConnection, frame: dict[str, Any]) -> str | bytes:
+        """Encode a frame the way the socket asked for when it connected."""
+        if ws in self._etf:
+            return etf.encode(_int_snowflakes(frame))
+        return json.dumps(frame, separators=(",", ":"))
+
+
+def _int_snowflakes(value: Any) -> Any:
+    """Turn ID strings into integers, as the gateway does over ETF."""
+    if isinstance(value, dict):
+        items = cast(dict[str, Any], value).items()
+        return {
+            key: int(item)
+            if key in SNOWFLAKE_KEYS and isinstance(item, str)
+            else _int_snowflakes(item)
+            for key, item in items
+        }
+    if isinstance(value, list):
+        return [_int_snowflakes(item) for item in cast(list[Any], value)]
+    return value
+
+
+def _json_response(status: HTTPStatus, body: Any) -> Response:
+    data = json.dumps(body).encode()
+    headers = Headers(
+        [("Content-Type", "application/json"), ("Content-Length", str(len(data)))]
+    )
+    return Response(status.value, status.phrase, headers, data)
+
+
+async def _serve(
+    port: int, heartbeat_interval: int, token: str, chaos: Chaos | None
+) -> None:
+    async with FakeGateway(
+        port=port, heartbeat_interval=heartbeat_interval, token=token, chaos=chaos
+    ) as gateway:
+        # First line tells a parent process where to connect
+        print(gateway.url, flush=True)
+        await asyncio.Future[None]()
+
+
+def main() -> None:
+    """Serve the stand-in until interrupted."""
+    parser = argparse.ArgumentParser(description="Local Discord gateway stand-in")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--heartbeat-interval", type=int, default=41250, help="ms")
+    parser.add_argument("--token", default="token")
+    parser.add_argument("--chaos", action="store_true", help="inject faults")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--fault-interval", type=float, default=20.0, help="mean seconds per socket"
+    )
+    parser.add_argument(
+        "--max-delay", type=float, default=2.0, help="longest injected delay"
+    )
+    args = parser.parse_args()
+    chaos = (
+        Chaos(args.seed, args.fault_interval, max_delay=args.max_delay)
+        if args.chaos
+        else None
+    )
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_serve(args.port, args.heartbeat_interval, args.token, chaos))
+
+
+if __name__ == "__main__":
+    main()
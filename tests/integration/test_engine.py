@@ -2,11 +2,31 @@
 
 import asyncio
 import contextlib
+import json
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
 from unittest.mock import AsyncMock, Mock, patch
 
+import httpx
 import pytest
 
-from src.engine.runner import DiscordClient, HealthServer, calculate_backoff
+from src.engine import etf
+from src.engine.codec import ETF
+from src.engine.health import HealthRegistry
+from src.engine.metrics import ClientMetrics, Metrics
+from src.engine.rest import RestClient
+from src.engine.runner import (
+    DiscordClient,
+    Engine,
+    HealthServer,
+    calculate_backoff,
+)
+from src.models.config import GATEWAY_URL, Server, Settings
+from src.models.results import ConnectionState, SessionState
+from src.utils.errors import ConnectionError as GatewayError
+from src.utils.ledger import read_ledger
 
 
 class TestHealthServer:
@@ -42,6 +62,129 @@ class TestHealthServer:
             with contextlib.suppress(asyncio.CancelledError):
                 await server_task
 
+    async def test_readyz_follows_session_state(self) -> None:
+        """Test that /readyz turns ready once a session connects."""
+        registry = HealthRegistry(min_ready=1)
+        session = SessionState(server_index=0)
+        registry.register(session)
+        health_server = HealthServer(port=8082, registry=registry)
+        server_task = asyncio.create_task(health_server.start())
+        await asyncio.sleep(0.1)
+
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", 8082)
+            request = b"GET /readyz HTTP/1.1\r\nHost: localhost\r\n\r\n"
+
+            writer.write(request)
+            await writer.drain()
+            response = await reader.readuntil(b"NOT READY 0/1")
+            assert b"503 Service Unavailable" in response
+
+            # Same connection, served again after the session connects
+            session.mark_connected()
+            writer.write(request)
+            await writer.drain()
+            response = await reader.readuntil(b"READY 1/1")
+            assert b"200 OK" in response
+
+            writer.close()
+            await writer.wait_closed()
+        finally:
+            server_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await server_task
+
+    async def test_unknown_path_closes_when_asked(self) -> None:
+        """Test 404 for unknown paths and Connection: close handling."""
+        health_server = HealthServer(port=8083)
+        server_task = asyncio.create_task(health_server.start())
+        await asyncio.sleep(0.1)
+
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", 8083)
+            writer.write(b"GET /nope HTTP/1.1\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+
+            response = await reader.read()
+            assert response.startswith(b"HTTP/1.1 404 Not Found")
+            assert b"Connection: close" in response
+
+            writer.close()
+            await writer.wait_closed()
+        finally:
+            server_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await server_task
+
+    async def test_idle_connection_is_closed(self) -> None:
+        """Test that a connection without a complete request is dropped."""
+        health_server = HealthServer(port=8085, read_timeout=0.05)
+        server_task = asyncio.create_task(health_server.start())
+        await asyncio.sleep(0.1)
+
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", 8085)
+            # Half a request, the headers never end
+            writer.write(b"GET /healthz HTTP/1.1\r\n")
+            await writer.drain()
+
+            async with asyncio.timeout(1):
+                assert await reader.read() == b""
+
+            writer.close()
+            await writer.wait_closed()
+        finally:
+            server_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await server_task
+
+    async def test_metrics_endpoint(self) -> None:
+        """Test that /metrics serves the Prometheus text format."""
+        metrics = Metrics()
+        metrics.register(SessionState(server_index=0))
+        health_server = HealthServer(port=8084, metrics=metrics)
+        server_task = asyncio.create_task(health_server.start())
+        await asyncio.sleep(0.1)
+
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", 8084)
+            writer.write(b"GET /metrics HTTP/1.0\r\n\r\n")
+            await writer.drain()
+
+            response = await reader.read()
+            assert b"Content-Type: text/plain; version=0.0.4" in response
+            assert b'state="disconnected"} 1' in response
+
+            writer.close()
+            await writer.wait_closed()
+        finally:
+            server_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await server_task
+
+    def test_stale_session_is_not_ready(self) -> None:
+        """Test that a connected session without recent heartbeats is not ready."""
+        registry = HealthRegistry(min_ready=1, max_age=timedelta(seconds=30))
+        session = SessionState(server_index=0)
+        registry.register(session)
+        session.mark_connected()
+        assert registry.ready_count() == 1
+
+        stale = datetime.now() - timedelta(seconds=60)
+        session.last_connected = stale
+        session.last_heartbeat = stale
+        assert registry.ready_count() == 0
+
+        session.mark_heartbeat(0.05)
+        assert registry.ready_count() == 1
+
+    def test_responses_are_cached(self) -> None:
+        """Test that identical responses reuse the same bytes."""
+        health_server = HealthServer()
+        first = health_server._response("/healthz", keep_alive=True, head=False)  # pyright: ignore[reportPrivateUsage]
+        second = health_server._response("/", keep_alive=True, head=False)  # pyright: ignore[reportPrivateUsage]
+        assert first is second
+
 
 class TestDiscordClient:
     """Tests for DiscordClient."""
@@ -58,21 +201,34 @@ class TestDiscordClient:
         assert "os" in client.properties
         assert "browser" in client.properties
 
+    def test_identify_frame_reused_until_status_changes(self) -> None:
+        """Test that IDENTIFY is encoded once per status."""
+        client = DiscordClient("test_token", "online", 0, 0, codec=ETF)
+        frame = client.identify_frame()
+
+        assert client.identify_frame() is frame
+        assert etf.decode(frame)["d"]["presence"]["status"] == "online"
+        client.status = "idle"
+        assert etf.decode(client.identify_frame())["d"]["presence"]["status"] == "idle"
+
+    @staticmethod
+    def _rest(status_code: int, body: dict[str, str] | None = None) -> RestClient:
+        """Create a REST client that answers every request the same way."""
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert request.headers["Authorization"] in {"test_token", "invalid_token"}
+            return httpx.Response(status_code, json=body)
+
+        return RestClient(transport=httpx.MockTransport(handler))
+
     async def test_get_user_success(self) -> None:
         """Test successful user fetch."""
         client = DiscordClient(
             token="test_token", status="online", client_index=0, start_time=0
         )
 
-        with patch("src.engine.runner.httpx.AsyncClient") as mock_client:
-            mock_instance = AsyncMock()
-            # Response is not async, only get() is async
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = {"id": "123", "username": "testuser"}
-            mock_instance.get.return_value = mock_response
-            mock_client.return_value.__aenter__.return_value = mock_instance
-
+        rest = self._rest(200, {"id": "123", "username": "testuser"})
+        with patch("src.engine.runner.get_rest_client", return_value=rest):
             user = await client.get_user()
             assert user is not None
             assert user["id"] == "123"
@@ -84,16 +240,24 @@ class TestDiscordClient:
             token="invalid_token", status="online", client_index=0, start_time=0
         )
 
-        with patch("src.engine.runner.httpx.AsyncClient") as mock_client:
-            mock_instance = AsyncMock()
-            mock_response = Mock()
-            mock_response.status_code = 401
-            mock_instance.get.return_value = mock_response
-            mock_client.return_value.__aenter__.return_value = mock_instance
-
+        rest = self._rest(401)
+        with patch("src.engine.runner.get_rest_client", return_value=rest):
             user = await client.get_user()
             assert user is None
 
+    async def test_get_user_outage(self) -> None:
+        """Test that a server error raises instead of rejecting the token."""
+        client = DiscordClient(
+            token="test_token", status="online", client_index=0, start_time=0
+        )
+
+        rest = self._rest(502)
+        with (
+            patch("src.engine.runner.get_rest_client", return_value=rest),
+            pytest.raises(GatewayError, match="502"),
+        ):
+            await client.get_user()
+
 
 class TestBackoff:
     """Tests for backoff calculation."""
@@ -118,3 +282,372 @@ class TestBackoff:
         """Test maximum backoff cap."""
         delay = calculate_backoff(10)  # Would be 1024s without cap
         assert delay <= 66.0  # 60s + 10% jitter max
+
+
+class FakeWebSocket:
+    """Scripted gateway socket that ends once its frames run out."""
+
+    def __init__(self, frames: list[dict[str, Any]]) -> None:
+        self.frames = [json.dumps(frame).encode() for frame in frames]
+        self.sent: list[dict[str, Any]] = []
+        # Frames to queue once a payload with the opcode is sent
+        self.replies: dict[int, dict[str, Any]] = {}
+
+    async def __aenter__(self) -> "FakeWebSocket":
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        return None
+
+    async def recv(self, decode: bool | None = None) -> bytes:
+        if not self.frames:
+            # Give background tasks a moment to send something that gets a reply
+            await asyncio.sleep(0.01)
+        if not self.frames:
+            raise ScriptEndError
+        return self.frames.pop(0)
+
+    async def send(self, message: bytes, text: bool | None = None) -> None:
+        payload = json.loads(message)
+        self.sent.append(payload)
+        reply = self.replies.pop(payload["op"], None)
+        if reply is not None:
+            self.frames.append(json.dumps(reply).encode())
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        return None
+
+    def sent_ops(self) -> list[int]:
+        """Opcodes sent so far, ignoring heartbeats."""
+        return [payload["op"] for payload in self.sent if payload["op"] != 1]
+
+
+class ScriptEndError(Exception):
+    """Raised by FakeWebSocket when no scripted frames are left."""
+
+
+HELLO = {"op": 10, "d": {"heartbeat_interval": 41250}, "s": None, "t": None}
+READY = {
+    "op": 0,
+    "t": "READY",
+    "s": 1,
+    "d": {
+        "session_id": "abc",
+        "resume_gateway_url": "wss://resume.example",
+        "user": {"id": "42"},
+    },
+}
+
+
+def voice_state(
+    guild_id: str, channel_id: str | None, user_id: str = "42"
+) -> dict[str, Any]:
+    """A VOICE_STATE_UPDATE dispatch for a user in a guild."""
+    return {
+        "op": 0,
+        "t": "VOICE_STATE_UPDATE",
+        "s": 2,
+        "d": {"guild_id": guild_id, "channel_id": channel_id, "user_id": user_id},
+    }
+
+
+class TestResume:
+    """Tests for gateway session resume."""
+
+    async def _run(
+        self,
+        client: DiscordClient,
+        frames: list[dict[str, Any]],
+        replies: dict[int, dict[str, Any]] | None = None,
+    ) -> tuple[FakeWebSocket, Mock]:
+        ws = FakeWebSocket(frames)
+        ws.replies = replies or {}
+        with (
+            patch("src.engine.runner.websockets.connect", return_value=ws) as connect,
+            patch("src.engine.runner.random.uniform", return_value=0),
+            pytest.raises(ScriptEndError),
+        ):
+            await client.keep_online(Server(guild_id="1", channel_id="2"), self.session)
+        return ws, connect
+
+    @pytest.fixture(autouse=True)
+    def _session(self) -> None:
+        self.session = SessionState()
+
+    async def test_identify_stores_session(self) -> None:
+        """Test that READY stores the session for later resumes."""
+        client = DiscordClient("token", "online", 0, 0)
+        ws, connect = await self._run(client, [HELLO, READY])
+
+        assert connect.call_args.args[0] == GATEWAY_URL
+        assert ws.sent_ops() == [2, 4]
+        assert client.session_id == "abc"
+        assert client.resume_gateway_url == "wss://resume.example"
+        assert client.sequence == 1
+
+    async def test_resume_skips_identify(self) -> None:
+        """Test that a known session is resumed on the resume URL."""
+        client = DiscordClient("token", "online", 0, 0)
+        client.session_id = "abc"
+        client.resume_gateway_url = "wss://resume.example"
+        client.sequence = 7
+        client.shown_status = "online"
+        resumed = {"op": 0, "t": "RESUMED", "s": 8, "d": None}
+        ws, connect = await self._run(client, [HELLO, resumed])
+
+        assert connect.call_args.args[0].startswith("wss://resume.example/")
+        assert ws.sent[0] == {
+            "op": 6,
+            "d": {"token": "token", "session_id": "abc", "seq": 7},
+        }
+        assert ws.sent_ops() == [6]
+        assert client.sequence == 8
+
+    async def test_resume_sends_missed_status(self) -> None:
+        """Test that a status changed while away goes out after RESUMED."""
+        client = DiscordClient("token", "online", 0, 0)
+        client.session_id = "abc"
+        client.resume_gateway_url = "wss://resume.example"
+        client.shown_status = "online"
+        await client.set_status("idle")
+        resumed = {"op": 0, "t": "RESUMED", "s": 8, "d": None}
+        ws, _ = await self._run(client, [HELLO, resumed])
+
+        assert ws.sent_ops() == [6, 3]
+        assert ws.sent[1]["d"]["status"] == "idle"
+        assert client.shown_status == "idle"
+
+    async def test_ready_sends_status_changed_after_identify(self) -> None:
+        """Test that a status changed before READY goes out right after it."""
+        client = DiscordClient("token", "online", 0, 0)
+        identify = client._identify  # pyright: ignore[reportPrivateUsage]
+
+        async def identify_then_change(conn: Any) -> None:
+            await identify(conn)
+            await client.set_status("idle")
+
+        with patch.object(client, "_identify", identify_then_change):
+            ws, _ = await self._run(client, [HELLO, READY])
+
+        assert ws.sent_ops() == [2, 3, 4]
+        assert ws.sent[0]["d"]["presence"]["status"] == "online"
+        assert ws.sent[1]["d"]["status"] == "idle"
+        assert client.shown_status == "idle"
+
+    async def test_resume_same_status_sends_nothing(self) -> None:
+        """Test that RESUMED sends no update when the status didn't change."""
+        client = DiscordClient("token", "online", 0, 0)
+        client.session_id = "abc"
+        client.resume_gateway_url = "wss://resume.example"
+        client.shown_status = "online"
+        resumed = {"op": 0, "t": "RESUMED", "s": 8, "d": None}
+        ws, _ = await self._run(client, [HELLO, resumed])
+
+        assert ws.sent_ops() == [6]
+
+    async def test_invalid_session_falls_back_to_identify(self) -> None:
+        """Test that INVALID_SESSION drops the session and re-identifies."""
+        client = DiscordClient("token", "online", 0, 0)
+        client.session_id = "stale"
+        client.resume_gateway_url = "wss://resume.example"
+        client.sequence = 3
+        invalid = {"op": 9, "d": False, "s": None, "t": None}
+        # READY only comes once the new IDENTIFY is in
+        ws, _ = await self._run(client, [HELLO, invalid], {2: READY})
+
+        assert ws.sent_ops() == [6, 2, 4]
+        assert client.session_id == "abc"
+
+    async def test_log_fields_number_servers_from_one(self) -> None:
+        """Test that JSON log fields match the [Server N] label."""
+        client = DiscordClient("token", "online", 0, 0)
+        with patch("src.engine.runner.log") as log:
+            await self._run(client, [HELLO, READY])
+
+        joined = [c for c in log.call_args_list if "Joined" in c.args[1]]
+        assert joined[0].args[1].startswith("[Server 1]")
+        assert joined[0].kwargs["server"] == 1
+
+    async def test_metrics_recorded(self) -> None:
+        """Test that bytes and time-to-READY are recorded for the client."""
+        metrics = ClientMetrics()
+        client = DiscordClient("token", "online", 0, 0, metrics=metrics)
+        await self._run(client, [HELLO, READY])
+
+        assert metrics.socket.bytes_in == sum(
+            len(json.dumps(frame)) for frame in (HELLO, READY)
+        )
+        assert metrics.socket.bytes_out > 0
+        assert metrics.time_to_ready.count == 1
+
+    async def test_compressed_stream(self) -> None:
+        """Test that zlib-stream frames are inflated with one stream per socket."""
+        compressor = zlib.compressobj()
+        frames: list[bytes] = []
+        for frame in (HELLO, READY):
+            data = compressor.compress(json.dumps(frame).encode())
+            frames.append(data + compressor.flush(zlib.Z_SYNC_FLUSH))
+
+        client = DiscordClient("token", "online", 0, 0, compress=True)
+        ws = FakeWebSocket([])
+        ws.frames = [frames[0][:4], frames[0][4:], frames[1]]
+        with (
+            patch("src.engine.runner.websockets.connect", return_value=ws) as connect,
+            pytest.raises(ScriptEndError),
+        ):
+            await client.keep_online(
+                Server(guild_id="1", channel_id="2"), SessionState()
+            )
+
+        assert connect.call_args.args[0].endswith("&compress=zlib-stream")
+        assert client.session_id == "abc"
+
+    async def test_heartbeat_request_and_ack(self) -> None:
+        """Test that requested heartbeats carry the sequence and ACKs time them."""
+        client = DiscordClient("token", "online", 0, 0)
+        request = {"op": 1, "d": None, "s": None, "t": None}
+        ack = {"op": 11, "d": None, "s": None, "t": None}
+        ws, _ = await self._run(client, [HELLO, READY, request, ack])
+
+        assert {"op": 1, "d": 1} in ws.sent
+        assert self.session.latency is not None
+
+
+class TestMultiplex:
+    """Tests for sharing one gateway session across servers."""
+
+    def _targets(self) -> list[tuple[Server, SessionState]]:
+        return [
+            (Server(guild_id="1", channel_id="2"), SessionState(server_index=0)),
+            (Server(guild_id="3", channel_id="4"), SessionState(server_index=1)),
+        ]
+
+    async def test_one_session_joins_every_server(self) -> None:
+        """Test that one connection sends voice state for every target."""
+        client = DiscordClient(
+            "token", "online", 0, 0, label="[Gateway]", confirm_voice=True
+        )
+        targets = self._targets()
+        ws = FakeWebSocket([HELLO, READY, voice_state("1", "2"), voice_state("3", "4")])
+        with (
+            patch("src.engine.runner.websockets.connect", return_value=ws) as connect,
+            pytest.raises(ScriptEndError),
+        ):
+            await client.keep_online_many(targets)
+
+        assert connect.call_count == 1
+        assert ws.sent_ops() == [2, 4, 4]
+        assert [p["d"]["guild_id"] for p in ws.sent if p["op"] == 4] == ["1", "3"]
+        assert all(session.connected for _, session in targets)
+
+    async def test_only_confirmed_joins_count(self) -> None:
+        """Test that a server counts as connected once its own join is reported."""
+        client = DiscordClient(
+            "token", "online", 0, 0, label="[Gateway]", confirm_voice=True
+        )
+        targets = self._targets()
+        frames = [
+            HELLO,
+            READY,
+            voice_state("1", "2"),
+            # Someone else joining, then ours ending up in another channel
+            voice_state("3", "4", user_id="7"),
+            voice_state("3", "5"),
+        ]
+        ws = FakeWebSocket(frames)
+        with (
+            patch("src.engine.runner.websockets.connect", return_value=ws),
+            pytest.raises(ScriptEndError),
+        ):
+            await client.keep_online_many(targets)
+        connected = [session.connected for _, session in targets]
+        assert connected == [True, False]
+
+        # The channel is left while connected
+        ws = FakeWebSocket(
+            [HELLO, READY, voice_state("1", "2"), voice_state("1", None)]
+        )
+        client.reset_session()
+        with (
+            patch("src.engine.runner.websockets.connect", return_value=ws),
+            pytest.raises(ScriptEndError),
+        ):
+            await client.keep_online_many(targets)
+        assert not targets[0][1].connected
+
+    async def test_resume_keeps_confirmed_joins(self) -> None:
+        """Test that RESUMED marks only the joins confirmed before the drop."""
+        client = DiscordClient(
+            "token", "online", 0, 0, label="[Gateway]", confirm_voice=True
+        )
+        client.session_id = "abc"
+        client.resume_gateway_url = "wss://resume.example"
+        client.shown_status = "online"
+        client.voice_channels = {"1": "2"}
+        targets = self._targets()
+        resumed = {"op": 0, "t": "RESUMED", "s": 8, "d": None}
+        ws = FakeWebSocket([HELLO, resumed])
+        with (
+            patch("src.engine.runner.websockets.connect", return_value=ws),
+            pytest.raises(ScriptEndError),
+        ):
+            await client.keep_online_many(targets)
+
+        assert ws.sent_ops() == [6]
+        assert [session.connected for _, session in targets] == [True, False]
+
+    async def test_settings_enable_multiplex(
+        self, mock_env: dict[str, str], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that multiplex mode starts a single client for all servers."""
+        monkeypatch.setenv("DISCORD_MULTIPLEX", "true")
+        monkeypatch.setenv("DISCORD_LEDGER", "false")
+        settings = Settings()  # pyright: ignore[reportCallIssue]
+
+        engine = Engine(settings)
+        with (
+            patch("src.engine.runner.run_client", new=AsyncMock()) as run_client,
+            patch.object(HealthServer, "start", new=AsyncMock()),
+        ):
+            task = asyncio.create_task(engine.run())
+            await asyncio.sleep(0.01)
+            engine.stop()
+            await task
+
+        run_client.assert_awaited_once()
+        client, targets = run_client.await_args_list[0].args
+        assert client.label == "[Gateway]"
+        assert client.confirm_voice
+        assert [session.server_index for _, session in targets] == [0, 1]
+
+
+class TestUptimeLedger:
+    """Tests for how the engine feeds the uptime ledger."""
+
+    async def test_history_follows_the_guild(
+        self,
+        mock_env: dict[str, str],
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path: Path,
+    ) -> None:
+        """Test that reordering the servers across restarts keeps each history."""
+        monkeypatch.setenv("DISCORD_LEDGER_FILE", str(tmp_path / "uptime.ledger"))
+        for servers in ("1:2,3:4", "3:4,1:2"):
+            monkeypatch.setenv("DISCORD_SERVERS", servers)
+            engine = Engine(Settings())  # pyright: ignore[reportCallIssue]
+            with (
+                patch("src.engine.runner.run_client", new=AsyncMock()),
+                patch.object(HealthServer, "start", new=AsyncMock()),
+            ):
+                task = asyncio.create_task(engine.run())
+                await asyncio.sleep(0.01)
+                for targets in engine.clients.values():
+                    for server, session in targets:
+                        if server.guild_id == "3":
+                            session.mark_connected()
+                engine.stop()
+                await task
+
+        records, _ = read_ledger(tmp_path / "uptime.ledger")
+        connected = [r for r in records if r.state == ConnectionState.CONNECTED]
+        assert [r.guild_id for r in connected] == [3, 3]
@@ -0,0 +1,294 @@
+"""Integration tests against the local gateway stand-in."""
+
+import asyncio
+import contextlib
+from collections.abc import AsyncGenerator, Callable
+from unittest.mock import patch
+
+import pytest
+
+from src.engine.codec import gateway_codec
+from src.engine.rest import RestClient
+from src.engine.runner import DiscordClient, Engine, run_all, run_client
+from src.models.config import Encoding, Server, Settings
+from src.models.gateway import Opcode
+from src.models.results import SessionState
+from src.utils.errors import AuthenticationError
+from tests.fakes.gateway import USER, Chaos, FakeGateway
+
+
+async def wait_until(predicate: Callable[[], bool], timeout: float = 5.0) -> None:
+    """Poll until a condition holds."""
+    async with asyncio.timeout(timeout):
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+async def gateway() -> AsyncGenerator[FakeGateway, None]:
+    """Start a stand-in gateway with a short heartbeat interval."""
+    async with FakeGateway(heartbeat_interval=50) as fake:
+        yield fake
+
+
+class TestFakeGateway:
+    """End-to-end tests of the engine over real sockets."""
+
+    async def test_get_user(self, gateway: FakeGateway) -> None:
+        """Test token validation against the /users/@me stub."""
+        rest = RestClient(gateway.api_url)
+        client = DiscordClient("token", "online", 0, 0)
+        bad = DiscordClient("wrong", "online", 0, 0)
+        try:
+            with patch("src.engine.runner.get_rest_client", return_value=rest):
+                assert await client.get_user() == USER
+                assert await bad.get_user() is None
+        finally:
+            await rest.aclose()
+
+    @pytest.mark.parametrize("encoding", ["json", "etf"])
+    async def test_connect_heartbeat_and_resume(
+        self, gateway: FakeGateway, encoding: Encoding
+    ) -> None:
+        """Test identify, heartbeats and a resume after the socket drops."""
+        # Connected only once the gateway's voice state (int IDs over ETF) matches
+        client = DiscordClient(
+            "token",
+            "online",
+            0,
+            0,
+            gateway_base_url=gateway.url,
+            codec=gateway_codec(encoding),
+            confirm_voice=True,
+        )
+        session = SessionState()
+        server = Server(guild_id="1", channel_id="2")
+
+        with patch("src.engine.runner.calculate_backoff", return_value=0):
+            task = asyncio.create_task(run_client(client, [(server, session)]))
+            try:
+                await wait_until(lambda: gateway.stats.heartbeats >= 2)
+                assert session.connected
+                assert client.voice_channels == {"1": "2"}
+                assert gateway.stats.identifies == 1
+                assert gateway.stats.voice_states[0]["guild_id"] == "1"
+                assert session.latency is not None
+
+                await gateway.drop_all()
+                await wait_until(lambda: gateway.stats.resumes == 1)
+                await wait_until(lambda: session.connected)
+                assert gateway.stats.identifies == 1
+                assert session.reconnects == 1
+            finally:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+
+    async def test_invalid_session_keeps_acks_flowing(
+        self, gateway: FakeGateway
+    ) -> None:
+        """Test that waiting to re-identify doesn't stall the receive pump."""
+        client = DiscordClient("token", "online", 0, 0, gateway_base_url=gateway.url)
+        session = SessionState()
+        server = Server(guild_id="1", channel_id="2")
+
+        # Six heartbeat intervals between op 9 and the new IDENTIFY
+        with patch("src.engine.runner.INVALID_SESSION_DELAY", (0.3, 0.3)):
+            task = asyncio.create_task(run_client(client, [(server, session)]))
+            try:
+                await wait_until(lambda: session.connected)
+                await gateway.invalidate_all()
+                heartbeats = gateway.stats.heartbeats
+                await wait_until(lambda: gateway.stats.identifies == 2)
+
+                # ACKs were read meanwhile, so no beat went unanswered
+                assert gateway.stats.heartbeats >= heartbeats + 3
+                assert gateway.stats.connections == 1
+                assert session.reconnects == 0
+            finally:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+
+    async def test_reconnect_request_skips_backoff(self, gateway: FakeGateway) -> None:
+        """Test that op 7 resumes right away instead of backing off."""
+        client = DiscordClient("token", "online", 0, 0, gateway_base_url=gateway.url)
+        session = SessionState()
+        server = Server(guild_id="1", channel_id="2")
+
+        with patch("src.engine.runner.calculate_backoff") as backoff:
+            task = asyncio.create_task(run_client(client, [(server, session)]))
+            try:
+                await wait_until(lambda: session.connected)
+                for ws in list(gateway.sockets):
+                    await gateway.send(ws, {"op": Opcode.RECONNECT})
+                await wait_until(lambda: gateway.stats.resumes == 1)
+                await wait_until(lambda: session.connected)
+                assert session.reconnects == 1
+                backoff.assert_not_called()
+            finally:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+
+    async def test_rejected_token_stops(self, gateway: FakeGateway) -> None:
+        """Test that close code 4004 stops instead of retrying."""
+        client = DiscordClient("wrong", "online", 0, 0, gateway_base_url=gateway.url)
+        session = SessionState()
+        server = Server(guild_id="1", channel_id="2")
+
+        with pytest.raises(AuthenticationError):
+            await asyncio.wait_for(run_client(client, [(server, session)]), 5)
+        assert gateway.stats.connections == 1
+        assert not session.connected
+
+    async def test_run_all(
+        self,
+        gateway: FakeGateway,
+        mock_env: dict[str, str],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that run_all connects every configured server."""
+        monkeypatch.setenv("DISCORD_GATEWAY_BASE_URL", gateway.url)
+        monkeypatch.setenv("DISCORD_IDENTIFY_CONCURRENCY", "2")
+        monkeypatch.setenv("DISCORD_HEALTH_PORT", "0")
+        monkeypatch.setenv("DISCORD_LEDGER", "false")
+        settings = Settings(token="token")  # pyright: ignore[reportCallIssue]
+
+        task = asyncio.create_task(run_all(settings))
+        try:
+            await wait_until(lambda: len(gateway.stats.voice_states) == 2)
+            assert gateway.stats.identifies == 2
+            assert {state["guild_id"] for state in gateway.stats.voice_states} == {
+                server.guild_id for server in settings.servers
+            }
+        finally:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def test_stop_drains_connections(
+        self,
+        gateway: FakeGateway,
+        mock_env: dict[str, str],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that stopping leaves voice and closes every socket normally."""
+        monkeypatch.setenv("DISCORD_GATEWAY_BASE_URL", gateway.url)
+        monkeypatch.setenv("DISCORD_IDENTIFY_CONCURRENCY", "2")
+        monkeypatch.setenv("DISCORD_HEALTH_PORT", "0")
+        monkeypatch.setenv("DISCORD_LEDGER", "false")
+        settings = Settings(token="token")  # pyright: ignore[reportCallIssue]
+        engine = Engine(settings)
+
+        task = asyncio.create_task(engine.run())
+        await wait_until(lambda: len(gateway.stats.voice_states) == 2)
+        engine.stop()
+        await asyncio.wait_for(task, settings.shutdown_timeout)
+
+        leaves = [s for s in gateway.stats.voice_states if s["channel_id"] is None]
+        assert len(leaves) == 2
+        assert gateway.stats.client_closes[1000] == 2
+        assert not gateway.sessions
+        assert all(not session.connected for session in engine.health.sessions.values())
+
+    @pytest.mark.parametrize("multiplex", [False, True])
+    async def test_reload_keeps_unchanged_servers(
+        self,
+        gateway: FakeGateway,
+        mock_env: dict[str, str],
+        monkeypatch: pytest.MonkeyPatch,
+        multiplex: bool,
+    ) -> None:
+        """Test that a reload only joins and leaves the servers that changed."""
+        monkeypatch.setenv("DISCORD_GATEWAY_BASE_URL", gateway.url)
+        monkeypatch.setenv("DISCORD_IDENTIFY_CONCURRENCY", "3")
+        monkeypatch.setenv("DISCORD_HEALTH_PORT", "0")
+        monkeypatch.setenv("DISCORD_LEDGER", "false")
+        monkeypatch.setenv("DISCORD_MULTIPLEX", str(multiplex))
+        engine = Engine(Settings(token="token"))  # pyright: ignore[reportCallIssue]
+
+        task = asyncio.create_task(engine.run())
+        try:
+            await wait_until(lambda: len(gateway.stats.voice_states) == 2)
+            await wait_until(
+                lambda: len(engine.health.sessions) == engine.health.ready_count()
+            )
+            connections = gateway.stats.connections
+
+            monkeypatch.setenv("DISCORD_SERVERS", "111111111:222222222,333:444")
+            monkeypatch.setenv("DISCORD_STATUS", "idle")
+            await engine.apply(Settings(token="token"))  # pyright: ignore[reportCallIssue]
+            await wait_until(lambda: len(gateway.stats.voice_states) == 4)
+
+            joined, left = gateway.stats.voice_states[2:]
+            if left["channel_id"] is not None:
+                joined, left = left, joined
+            assert left["guild_id"] == "123456789"
+            assert joined == {
+                "guild_id": "333",
+                "channel_id": "444",
+                "self_mute": True,
+                "self_deaf": True,
+            }
+            # Only a dedicated client for the new server had to connect
+            assert gateway.stats.connections == connections + (not multiplex)
+            assert gateway.stats.identifies == connections + (not multiplex)
+            await wait_until(lambda: gateway.stats.presences >= 1)
+            assert sorted(engine.health.sessions) == [1, 2]
+        finally:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def test_status_change_without_reconnect(
+        self,
+        gateway: FakeGateway,
+        mock_env: dict[str, str],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that a new status goes out as op 3 once per live socket."""
+        monkeypatch.setenv("DISCORD_GATEWAY_BASE_URL", gateway.url)
+        monkeypatch.setenv("DISCORD_IDENTIFY_CONCURRENCY", "2")
+        monkeypatch.setenv("DISCORD_HEALTH_PORT", "0")
+        monkeypatch.setenv("DISCORD_LEDGER", "false")
+        engine = Engine(Settings(token="token"))  # pyright: ignore[reportCallIssue]
+
+        task = asyncio.create_task(engine.run())
+        try:
+            await wait_until(lambda: len(gateway.stats.voice_states) == 2)
+            await engine.presence.set_status("idle")
+            await engine.presence.set_status("idle")
+            await wait_until(lambda: gateway.stats.presences == 2)
+            await asyncio.sleep(0.05)
+            assert gateway.stats.presences == 2
+            assert gateway.stats.connections == gateway.stats.identifies == 2
+        finally:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def test_recovers_from_chaos(self, gateway: FakeGateway) -> None:
+        """Test that the client rides out a burst of injected faults."""
+        gateway.chaos = Chaos(seed=1, mean_interval=0.1, max_delay=0.05)
+        client = DiscordClient("token", "online", 0, 0, gateway_base_url=gateway.url)
+        session = SessionState()
+        server = Server(guild_id="1", channel_id="2")
+
+        with (
+            patch("src.engine.runner.calculate_backoff", return_value=0),
+            patch("src.engine.runner.INVALID_SESSION_DELAY", (0, 0)),
+        ):
+            task = asyncio.create_task(run_client(client, [(server, session)]))
+            try:
+                await wait_until(lambda: session.reconnects >= 5)
+                assert gateway.stats.faults.total() > 0
+
+                # Once the network calms down the session settles
+                gateway.chaos = None
+                await gateway.drop_all()
+                await wait_until(lambda: session.connected)
+            finally:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
@@ -0,0 +1,74 @@
+"""Integration tests for the shared REST client."""
+
+from unittest.mock import AsyncMock, patch
+
+import httpx
+
+from src.engine.rest import RestClient, close_rest_client, get_rest_client
+
+
+class TestRestClient:
+    """Tests for RestClient."""
+
+    async def test_retries_after_429(self) -> None:
+        """Test that a 429 is waited out and retried instead of returned."""
+        responses = [
+            httpx.Response(429, headers={"Retry-After": "2"}, json={}),
+            httpx.Response(200, json={"id": "1"}),
+        ]
+        rest = RestClient(transport=httpx.MockTransport(lambda _: responses.pop(0)))
+
+        with patch("src.engine.rest.asyncio.sleep", new=AsyncMock()) as sleep:
+            resp = await rest.request("GET", "/users/@me", token="t")
+
+        assert resp.status_code == 200
+        sleep.assert_awaited_once_with(2.0)
+
+    async def test_waits_for_exhausted_bucket(self) -> None:
+        """Test that a bucket with no remaining requests queues the next one."""
+        headers = {
+            "X-RateLimit-Bucket": "abc",
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset-After": "5",
+        }
+        rest = RestClient(
+            transport=httpx.MockTransport(
+                lambda _: httpx.Response(200, headers=headers)
+            )
+        )
+
+        with patch("src.engine.rest.asyncio.sleep", new=AsyncMock()) as sleep:
+            await rest.request("GET", "/users/@me")
+            sleep.assert_not_awaited()
+            await rest.request("GET", "/users/@me")
+
+        sleep.assert_awaited_once()
+        assert 4 < sleep.await_args_list[0].args[0] <= 5
+
+    async def test_major_params_split_buckets(self) -> None:
+        """Test that major parameters get separate buckets."""
+        seen: list[str] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request.url.path)
+            return httpx.Response(200, headers={"X-RateLimit-Remaining": "0"})
+
+        rest = RestClient(transport=httpx.MockTransport(handler))
+        path = "/channels/{channel_id}/messages"
+
+        with patch("src.engine.rest.asyncio.sleep", new=AsyncMock()) as sleep:
+            await rest.request("GET", path, params={"channel_id": "1"})
+            await rest.request("GET", path, params={"channel_id": "2"})
+
+        sleep.assert_not_awaited()
+        assert seen == ["/api/v10/channels/1/messages", "/api/v10/channels/2/messages"]
+
+    async def test_shared_client_is_pooled(self) -> None:
+        """Test that every caller shares one client and its connection pool."""
+        rest = get_rest_client()
+        assert get_rest_client() is rest
+        assert rest.client is rest.client
+
+        await close_rest_client()
+        assert get_rest_client() is not rest
+        await close_rest_client()
@@ -0,0 +1,128 @@
+"""Integration tests for startup with and without a cached token."""
+
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import pytest
+
+from src.engine.rest import RestClient
+from src.engine.runner import DiscordClient, Engine, HealthServer
+from src.main import revalidate_token
+from src.models.config import Settings
+from src.utils.cache import TokenCache
+from src.utils.errors import AuthenticationError
+
+# Connects with a cached token and records whether httpx was loaded by then
+CACHED_START = """
+import asyncio, sys
+from pathlib import Path
+from unittest.mock import patch
+
+from src.main import main
+from src.models.config import Settings
+from src.utils.cache import TokenCache
+
+settings = Settings(token="token", cache_file=Path(sys.argv[1]))
+TokenCache(settings.cache_file, settings.cache_ttl).put(
+    "token", {"id": "1", "username": "streak"}
+)
+connected = asyncio.Event()
+
+def connect(*args, **kwargs):
+    # stderr, the log lines share stdout
+    print("httpx at connect:", "httpx" in sys.modules, file=sys.stderr)
+    connected.set()
+    raise OSError("no gateway here")
+
+async def run():
+    task = asyncio.create_task(main(settings))
+    await connected.wait()
+    task.cancel()
+
+with patch("src.engine.runner.websockets.connect", connect):
+    asyncio.run(run())
+"""
+
+
+class TestStartupImports:
+    """Tests for modules loaded before the first gateway connect."""
+
+    def test_httpx_loads_lazily(self) -> None:
+        """Test that importing the app doesn't import httpx until REST runs."""
+        code = (
+            "import sys, src.main\n"
+            "assert 'httpx' not in sys.modules, 'httpx imported at startup'\n"
+            "from src.engine.rest import get_rest_client\n"
+            "get_rest_client().client\n"
+            "assert 'httpx' in sys.modules\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True
+        )
+        assert result.returncode == 0, result.stderr
+
+    def test_cached_start_connects_before_httpx(self, tmp_path: Path) -> None:
+        """Test that a cached token reaches the gateway without loading httpx."""
+        env = {
+            "DISCORD_SERVERS": "1:2",
+            "DISCORD_HEALTH_PORT": "0",
+            "DISCORD_LEDGER": "false",
+            "PATH": "",
+        }
+        result = subprocess.run(
+            [sys.executable, "-c", CACHED_START, str(tmp_path / "cache.json")],
+            capture_output=True,
+            text=True,
+            env=env,
+            timeout=30,
+        )
+        assert result.returncode == 0, result.stderr
+        assert "httpx at connect: False" in result.stderr
+
+
+class TestRevalidation:
+    """Tests for the background check of a cached token."""
+
+    @staticmethod
+    def _rest(status_code: int) -> RestClient:
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(status_code, json={"id": "1", "username": "a"})
+
+        return RestClient(transport=httpx.MockTransport(handler))
+
+    async def test_outage_keeps_cached_token(self, tmp_path: Path) -> None:
+        """Test that a 5xx leaves the cache entry and raises nothing."""
+        cache = TokenCache(tmp_path / "cache.json", 3600)
+        cache.put("token", {"id": "1", "username": "streak"})
+        engine = Mock(wait_connected=AsyncMock())
+
+        rest = self._rest(502)
+        with patch("src.engine.runner.get_rest_client", return_value=rest):
+            await revalidate_token(
+                DiscordClient("token", "online", 0, 0), cache, engine
+            )
+
+        engine.wait_connected.assert_awaited_once()
+        assert cache.get("token") is not None
+
+    async def test_rejected_token_stops_engine(
+        self, mock_env: dict[str, str], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a failing engine service ends run() with its error."""
+        monkeypatch.setenv("DISCORD_LEDGER", "false")
+        engine = Engine(Settings())  # pyright: ignore[reportCallIssue]
+
+        async def reject() -> None:
+            raise AuthenticationError("Invalid Discord token")
+
+        engine.add_service(reject())
+        with (
+            patch("src.engine.runner.run_client", new=AsyncMock()),
+            patch.object(HealthServer, "start", new=AsyncMock()),
+            pytest.raises(AuthenticationError),
+        ):
+            await asyncio.wait_for(engine.run(), 5)
@@ -0,0 +1,93 @@
+"""Unit tests for the shared circuit breaker."""
+
+import asyncio
+
+from src.engine.breaker import BreakerState, CircuitBreaker
+
+
+class TestCircuitBreaker:
+    """Tests for CircuitBreaker."""
+
+    async def test_closed_lets_everyone_through(self) -> None:
+        """Test that uncorrelated failures keep the circuit closed."""
+        breaker = CircuitBreaker(threshold=3)
+        breaker.record_failure(0)
+        breaker.record_failure(0)
+        breaker.record_failure(1)
+
+        assert breaker.state == BreakerState.CLOSED
+        await asyncio.wait_for(breaker.wait(2), timeout=0.1)
+
+    async def test_opens_and_sends_single_probe(self) -> None:
+        """Test that correlated failures leave only one client probing."""
+        breaker = CircuitBreaker(threshold=3)
+        for index in range(3):
+            breaker.record_failure(index)
+        assert breaker.state == BreakerState.OPEN
+
+        await breaker.wait(2)
+        assert breaker.state == BreakerState.HALF_OPEN
+        assert breaker.probe == 2
+
+        waiter = asyncio.create_task(breaker.wait(0))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        waiter.cancel()
+
+    async def test_probe_failure_frees_probe_slot(self) -> None:
+        """Test that a failed probe lets the next attempt probe again."""
+        breaker = CircuitBreaker(threshold=2)
+        breaker.record_failure(0)
+        breaker.record_failure(1)
+        await breaker.wait(0)
+
+        breaker.record_failure(0)
+
+        assert breaker.state == BreakerState.OPEN
+        assert breaker.probe is None
+        await asyncio.wait_for(breaker.wait(1), timeout=0.1)
+        assert breaker.probe == 1
+
+    async def test_released_probe_hands_slot_on(self) -> None:
+        """Test that a probe that stops for good lets a waiter probe instead."""
+        breaker = CircuitBreaker(threshold=2)
+        breaker.record_failure(0)
+        breaker.record_failure(1)
+        probe = asyncio.create_task(breaker.wait(0))
+        await probe
+        waiters = [asyncio.create_task(breaker.wait(i)) for i in (2, 1)]
+        await asyncio.sleep(0)
+
+        # The probe's task is cancelled, e.g. its server was removed on reload
+        breaker.release(0)
+        await asyncio.wait_for(waiters[1], timeout=0.1)
+
+        assert breaker.probe == 1
+        assert breaker.state == BreakerState.HALF_OPEN
+        assert not waiters[0].done()
+        breaker.record_success(1)
+        await asyncio.wait_for(waiters[0], timeout=0.1)
+
+    async def test_success_releases_waiters_staggered(self) -> None:
+        """Test that a successful probe releases waiters in order, staggered."""
+        breaker = CircuitBreaker(threshold=2, stagger=0.05)
+        breaker.record_failure(0)
+        breaker.record_failure(1)
+        await breaker.wait(0)
+
+        loop = asyncio.get_running_loop()
+        released: dict[int, float] = {}
+
+        async def wait(index: int) -> None:
+            await breaker.wait(index)
+            released[index] = loop.time()
+
+        tasks = [asyncio.create_task(wait(i)) for i in (2, 1)]
+        await asyncio.sleep(0)
+        start = loop.time()
+        breaker.record_success(0)
+        await asyncio.gather(*tasks)
+
+        assert breaker.state == BreakerState.CLOSED
+        assert released[1] - start < 0.04
+        assert released[2] - start >= 0.04
@@ -0,0 +1,64 @@
+"""Unit tests for the token validation cache."""
+
+from pathlib import Path
+from unittest.mock import patch
+
+from src.utils.cache import TokenCache
+
+USER = {"id": "123", "username": "testuser"}
+
+
+class TestTokenCache:
+    """Tests for TokenCache."""
+
+    def test_roundtrip(self, tmp_path: Path) -> None:
+        """Test that a cached user is returned for the same token only."""
+        cache = TokenCache(tmp_path / "users.json", ttl=60)
+        cache.put("secret_token", {"id": "123", "username": "testuser"})
+
+        assert cache.get("secret_token") == USER
+        assert cache.get("other_token") is None
+
+    def test_token_not_stored(self, tmp_path: Path) -> None:
+        """Test that only a hash of the token reaches the disk."""
+        path = tmp_path / "users.json"
+        TokenCache(path, ttl=60).put("secret_token", {"id": "1", "username": "u"})
+
+        content = path.read_text()
+        assert "secret_token" not in content
+        assert TokenCache.key("secret_token") in content
+
+    def test_expired_entry(self, tmp_path: Path) -> None:
+        """Test that entries past their TTL are ignored."""
+        cache = TokenCache(tmp_path / "users.json", ttl=60)
+        cache.put("token", {"id": "123", "username": "testuser"})
+
+        with patch("src.utils.cache.time.time", return_value=10**12):
+            assert cache.get("token") is None
+
+    def test_invalidate(self, tmp_path: Path) -> None:
+        """Test that an invalidated token is no longer cached."""
+        cache = TokenCache(tmp_path / "users.json", ttl=60)
+        cache.put("token", {"id": "123", "username": "testuser"})
+        cache.invalidate("token")
+
+        assert cache.get("token") is None
+
+    def test_disabled_with_zero_ttl(self, tmp_path: Path) -> None:
+        """Test that a TTL of 0 disables the cache."""
+        path = tmp_path / "users.json"
+        cache = TokenCache(path, ttl=0)
+        cache.put("token", {"id": "123", "username": "testuser"})
+
+        assert cache.get("token") is None
+        assert not path.exists()
+
+    def test_corrupt_file(self, tmp_path: Path) -> None:
+        """Test that a corrupt cache file behaves like an empty cache."""
+        path = tmp_path / "users.json"
+        path.write_text("{not json")
+        cache = TokenCache(path, ttl=60)
+
+        assert cache.get("token") is None
+        cache.put("token", {"id": "123", "username": "testuser"})
+        assert cache.get("token") == USER
@@ -0,0 +1,82 @@
+"""Unit tests for the gateway frame codecs."""
+
+import importlib.util
+
+import pytest
+
+from src.engine.codec import (
+    CODECS,
+    ETF,
+    CodecName,
+    codec_available,
+    gateway_codec,
+    load_codec,
+)
+from src.models.gateway import Opcode
+
+
+@pytest.mark.parametrize("name", list(CODECS))
+class TestCodec:
+    """Tests every installed codec against the same frames."""
+
+    @pytest.fixture(autouse=True)
+    def _installed(self, name: CodecName) -> None:
+        if not codec_available(name):
+            pytest.skip(f"{name} is not installed")
+
+    def test_round_trip(self, name: CodecName) -> None:
+        """Test that a payload survives encoding and decoding."""
+        codec = load_codec(name)
+        payload = {"op": 0, "t": "READY", "s": 1, "d": {"guilds": [{"id": "1"}]}}
+        assert codec.loads(codec.dumps(payload)) == payload
+
+    def test_compact_bytes(self, name: CodecName) -> None:
+        """Test that opcodes encode as plain numbers without padding."""
+        data = load_codec(name).dumps({"op": Opcode.HEARTBEAT, "d": None})
+        assert data == b'{"op":1,"d":null}'
+
+    def test_heartbeat_matches_payload(self, name: CodecName) -> None:
+        """Test that the prebuilt heartbeat equals the encoded payload."""
+        codec = load_codec(name)
+        for sequence in (None, 0, 42, 2**40):
+            payload = {"op": Opcode.HEARTBEAT, "d": sequence}
+            assert codec.heartbeat(sequence) == codec.dumps(payload)
+
+    def test_non_ascii(self, name: CodecName) -> None:
+        """Test that non-ASCII text decodes from raw UTF-8 bytes."""
+        codec = load_codec(name)
+        assert codec.loads('{"name":"café ☕"}'.encode()) == {"name": "café ☕"}
+
+
+class TestETFCodec:
+    """Tests for the ETF codec."""
+
+    def test_heartbeat_matches_payload(self) -> None:
+        """Test that the prebuilt heartbeat equals the encoded payload."""
+        for sequence in (None, 0, 300, 2**40):
+            payload = {"op": Opcode.HEARTBEAT, "d": sequence}
+            assert ETF.heartbeat(sequence) == ETF.dumps(payload)
+
+    def test_binary_frames(self) -> None:
+        """Test that ETF is picked by encoding and sent as binary frames."""
+        assert gateway_codec("etf") is ETF
+        assert not ETF.text
+        assert gateway_codec("json", "json").text
+
+
+class TestLoadCodec:
+    """Tests for picking a codec."""
+
+    def test_auto_prefers_fastest_installed(self) -> None:
+        """Test that auto picks the first installed codec in preference order."""
+        expected = next(
+            name
+            for name, (module, _) in CODECS.items()
+            if importlib.util.find_spec(module) is not None
+        )
+        assert load_codec("auto").name == expected
+
+    def test_stdlib_always_available(self) -> None:
+        """Test that the stdlib codec never needs an extra install."""
+        assert codec_available("json")
+        assert load_codec("json").name == "json"
@@ -0,0 +1,50 @@
+"""Unit tests for gateway transport compression."""
+
+import json
+import zlib
+
+from src.engine.compression import ZLIB_SUFFIX, ZlibStreamInflater
+
+
+def compress_messages(*messages: dict[str, object]) -> list[bytes]:
+    """Compress messages as one zlib stream, one flushed chunk per message."""
+    compressor = zlib.compressobj()
+    chunks: list[bytes] = []
+    for message in messages:
+        data = compressor.compress(json.dumps(message).encode())
+        chunks.append(data + compressor.flush(zlib.Z_SYNC_FLUSH))
+    return chunks
+
+
+class TestZlibStreamInflater:
+    """Tests for ZlibStreamInflater."""
+
+    def test_single_frame_messages(self) -> None:
+        """Test that consecutive messages share one stream."""
+        first, second = compress_messages({"op": 10}, {"op": 11})
+        inflater = ZlibStreamInflater()
+
+        assert first.endswith(ZLIB_SUFFIX)
+        assert inflater.feed(first) == b'{"op": 10}'
+        assert inflater.feed(second) == b'{"op": 11}'
+
+    def test_fragmented_message(self) -> None:
+        """Test that a message split across frames is buffered until flushed."""
+        (chunk,) = compress_messages({"op": 0, "d": "x" * 1000})
+        inflater = ZlibStreamInflater()
+
+        assert inflater.feed(chunk[:5]) is None
+        assert inflater.feed(chunk[5:-2]) is None
+        assert json.loads(inflater.feed(chunk[-2:]) or b"") == {
+            "op": 0,
+            "d": "x" * 1000,
+        }
+
+    def test_buffer_reused_after_fragment(self) -> None:
+        """Test that the stream continues after a fragmented message."""
+        first, second = compress_messages({"op": 1}, {"op": 11})
+        inflater = ZlibStreamInflater()
+
+        assert inflater.feed(first[:3]) is None
+        assert inflater.feed(first[3:]) == b'{"op": 1}'
+        assert inflater.feed(second) == b'{"op": 11}'
@@ -0,0 +1,151 @@
+"""Unit tests for the ETF encoder and decoder."""
+
+import struct
+import zlib
+from typing import Any
+
+import pytest
+
+from src.engine import etf
+
+
+class TestRoundTrip:
+    """Tests that every supported term survives encoding and decoding."""
+
+    @pytest.mark.parametrize(
+        "value",
+        [
+            None,
+            True,
+            False,
+            0,
+            255,
+            256,
+            -1,
+            2**31 - 1,
+            -(2**31),
+            2**31,
+            # A snowflake, and numbers past SMALL_BIG_EXT
+            1425827351261872219,
+            -(2**70),
+            2**2100,
+            1.5,
+            "",
+            "café ☕",
+            [],
+            [1, "a", None],
+            list(range(300)),
+            (1, "a"),
+            tuple(range(300)),
+            {},
+            {"op": 0, "d": {"guilds": [{"id": 1, "name": "x"}], "v": 10}},
+        ],
+    )
+    def test_round_trip(self, value: Any) -> None:
+        """Test that decode(encode(x)) gives x back."""
+        assert etf.decode(etf.encode(value)) == value
+
+    def test_bytes_decode_as_text(self) -> None:
+        """Test that bytes are sent as binaries and read back as str."""
+        assert etf.decode(etf.encode(b"abc")) == "abc"
+
+
+class TestEncode:
+    """Tests the exact bytes Erlang's term_to_binary produces."""
+
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [
+            (1, b"\x83a\x01"),
+            (-1, b"\x83b\xff\xff\xff\xff"),
+            (2**32, b"\x83n\x05\x00\x00\x00\x00\x00\x01"),
+            (1.5, b"\x83F?\xf8\x00\x00\x00\x00\x00\x00"),
+            ("op", b"\x83m\x00\x00\x00\x02op"),
+            (None, b"\x83w\x03nil"),
+            ([], b"\x83j"),
+            ([1], b"\x83l\x00\x00\x00\x01a\x01j"),
+            ((1,), b"\x83h\x01a\x01"),
+            ({}, b"\x83t\x00\x00\x00\x00"),
+        ],
+    )
+    def test_known_encodings(self, value: Any, expected: bytes) -> None:
+        """Test encodings against term_to_binary output."""
+        assert etf.encode(value) == expected
+
+    def test_unsupported_type(self) -> None:
+        """Test that values with no term type are rejected."""
+        with pytest.raises(TypeError, match="Cannot encode set"):
+            etf.encode({1})
+
+
+class TestDecode:
+    """Tests for terms only the gateway sends."""
+
+    def test_atoms(self) -> None:
+        """Test atom keys, nil and booleans in every atom encoding."""
+        data = (
+            b"\x83t\x00\x00\x00\x03"
+            b"d\x00\x02op" + b"a\x0b"
+            b"s\x01d" + b"w\x03nil"
+            b"v\x00\x01t" + b"w\x04true"
+        )
+        assert etf.decode(data) == {"op": 11, "d": None, "t": True}
+
+    def test_string_ext(self) -> None:
+        """Test that a STRING_EXT byte list decodes like erlpack does."""
+        assert etf.decode(b"\x83k\x00\x03abc") == "abc"
+
+    def test_old_float(self) -> None:
+        """Test the text float format of old encoders."""
+        text = b"1.50000000000000000000e+00".ljust(31, b"\x00")
+        assert etf.decode(b"\x83c" + text) == 1.5
+
+    def test_compressed(self) -> None:
+        """Test a zlib-compressed term."""
+        term = etf.encode_term(["x" * 100])
+        data = b"\x83P" + struct.pack(">I", len(term)) + zlib.compress(term)
+        assert etf.decode(data) == ["x" * 100]
+
+    @pytest.mark.parametrize(
+        "data",
+        [b"", b"\x82a\x01", b"\x83m\x00\x00\x00\x05ab", b"\x83a\x01\x00", b"\x83\x01"],
+    )
+    def test_malformed(self, data: bytes) -> None:
+        """Test that broken messages raise ValueError."""
+        with pytest.raises(ValueError):
+            etf.decode(data)
+
+
+class TestPeekHeader:
+    """Tests for reading the envelope without decoding the payload."""
+
+    def test_payload_skipped(self) -> None:
+        """Test that the header is read wherever "d" sits in the map."""
+        payload = {"guilds": [{"id": 2**60, "x": (1.5, None)}], "big": 2**2100}
+        frame = etf.encode({"d": payload, "op": 0, "s": 7, "t": "GUILD_CREATE"})
+        assert etf.peek_header(frame) == (0, "GUILD_CREATE", 7)
+
+    def test_stops_after_header(self) -> None:
+        """Test that a payload after the header is never read."""
+        header = etf.encode({"op": 0, "s": 7, "t": "READY"})[6:]
+        frame = b"\x83t\x00\x00\x00\x04" + header + etf.encode_term("d") + b"\xff"
+        assert etf.peek_header(frame) == (0, "READY", 7)
+
+    def test_atom_envelope(self) -> None:
+        """Test the atom keys and nil values the gateway uses."""
+        data = (
+            b"\x83t\x00\x00\x00\x04"
+            b"w\x01t" + b"w\x03nil"
+            b"w\x01s" + b"w\x03nil"
+            b"w\x02op" + b"a\x0b"
+            b"w\x01d" + b"w\x03nil"
+        )
+        assert etf.peek_header(data) == (11, None, None)
+
+    @pytest.mark.parametrize(
+        "data",
+        [etf.encode([1]), etf.encode({"t": None}), etf.encode({"op": "x"}), b"\x83t"],
+    )
+    def test_unusual_frames_fall_back(self, data: bytes) -> None:
+        """Test that anything but a well-formed envelope returns None."""
+        assert etf.peek_header(data) is None
@@ -0,0 +1,130 @@
+"""Unit tests for the gateway receive pump."""
+
+import json
+from typing import Any
+
+import pytest
+
+from src.engine.codec import load_codec
+from src.engine.gateway import GatewayConnection, peek_header
+from src.models.gateway import GatewayPayload, Opcode
+
+
+class ScriptedSocket:
+    """Socket stand-in that yields scripted frames then fails."""
+
+    def __init__(self, frames: list[dict[str, Any]]) -> None:
+        self.frames = [json.dumps(frame).encode() for frame in frames]
+        self.sent: list[tuple[bytes, bool | None]] = []
+
+    async def recv(self, decode: bool | None = None) -> bytes:
+        if not self.frames:
+            raise EOFError
+        return self.frames.pop(0)
+
+    async def send(self, message: bytes, text: bool | None = None) -> None:
+        self.sent.append((message, text))
+
+
+class TestGatewayConnection:
+    """Tests for GatewayConnection."""
+
+    async def test_routes_handled_frames_and_drops_rest(self) -> None:
+        """Test that only registered opcodes and events reach handlers."""
+        frames: list[dict[str, Any]] = [
+            {"op": 0, "t": "TYPING_START", "s": 1, "d": {}},
+            {"op": 0, "t": "READY", "s": 2, "d": {}},
+            {"op": 11, "t": None, "s": None, "d": None},
+            {"op": 0, "t": "PRESENCE_UPDATE", "s": 3, "d": {}},
+            {"op": 7, "t": None, "s": None, "d": None},
+        ]
+        conn = GatewayConnection(ScriptedSocket(frames))  # pyright: ignore[reportArgumentType]
+        seen: list[GatewayPayload] = []
+
+        async def handler(payload: GatewayPayload) -> None:
+            seen.append(payload)
+
+        conn.on_dispatch("READY", handler)
+        conn.on(Opcode.HEARTBEAT_ACK, handler)
+
+        with pytest.raises(EOFError):
+            await conn.run()
+
+        assert [(p["op"], p["t"]) for p in seen] == [(0, "READY"), (11, None)]
+        assert conn.frames_dropped == 3
+
+    async def test_sequence_tracked_for_dropped_dispatches(self) -> None:
+        """Test that dropped dispatches still advance the resume sequence."""
+        frames: list[dict[str, Any]] = [
+            {"op": 0, "t": "MESSAGE_CREATE", "s": 42, "d": {}}
+        ]
+        conn = GatewayConnection(ScriptedSocket(frames), sequence=41)  # pyright: ignore[reportArgumentType]
+
+        with pytest.raises(EOFError):
+            await conn.run()
+
+        assert conn.sequence == 42
+
+    async def test_send_writes_text_frame(self) -> None:
+        """Test that encoded bytes are sent as a text frame."""
+        socket = ScriptedSocket([])
+        conn = GatewayConnection(socket, codec=load_codec("json"))  # pyright: ignore[reportArgumentType]
+
+        await conn.send({"op": Opcode.HEARTBEAT, "d": None})
+
+        assert socket.sent == [(b'{"op":1,"d":null}', True)]
+        assert conn.stats.bytes_out == len(socket.sent[0][0])
+
+
+class TestPeekHeader:
+    """Tests for the raw frame header prefilter."""
+
+    def test_dispatch_header(self) -> None:
+        """Test reading the envelope of a dispatch frame."""
+        data = b'{"t":"TYPING_START","s":12,"op":0,"d":{"op":99,"t":"x"}}'
+        assert peek_header(data) == (0, "TYPING_START", 12)
+
+    def test_control_header(self) -> None:
+        """Test reading the envelope of a non-dispatch frame."""
+        data = b'{"t":null,"s":null,"op":11,"d":null}'
+        assert peek_header(data) == (11, None, None)
+
+    def test_reordered_header(self) -> None:
+        """Test that envelope fields are found in any order before "d"."""
+        data = b'{"op":0,"s":5,"t":"MESSAGE_CREATE","d":{}}'
+        assert peek_header(data) == (0, "MESSAGE_CREATE", 5)
+
+    def test_payload_first_falls_back(self) -> None:
+        """Test that nested keys are never mistaken for the envelope."""
+        data = b'{"d":{"t":"READY","s":1,"op":0},"op":0,"s":2,"t":"X"}'
+        assert peek_header(data) is None
+
+    def test_unusual_formatting_falls_back(self) -> None:
+        """Test that frames with whitespace fall back to a full decode."""
+        data = json.dumps({"t": None, "s": None, "op": 10, "d": {}}).encode()
+        assert peek_header(data) is None
+
+    async def test_prefiltered_frames_match_full_decode(self) -> None:
+        """Test that filtered and decoded frames reach the same handlers."""
+        frames: list[dict[str, Any]] = [
+            {"t": "READY", "s": 1, "op": 0, "d": {}},
+            {"d": {}, "op": 0, "s": 2, "t": "READY"},
+            {"t": "GUILD_CREATE", "s": 3, "op": 0, "d": {}},
+        ]
+        socket = ScriptedSocket([])
+        socket.frames = [
+            json.dumps(frame, separators=(",", ":")).encode() for frame in frames
+        ]
+        conn = GatewayConnection(socket)  # pyright: ignore[reportArgumentType]
+        seen: list[int | None] = []
+
+        async def handler(payload: GatewayPayload) -> None:
+            seen.append(payload["s"])
+
+        conn.on_dispatch("READY", handler)
+        with pytest.raises(EOFError):
+            await conn.run()
+
+        assert seen == [1, 2]
+        assert conn.frames_dropped == 1
+        assert conn.sequence == 3
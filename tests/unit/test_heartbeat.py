@@ -0,0 +1,154 @@
+"""Unit tests for gateway heartbeats."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.engine.heartbeat import Heartbeat, HeartbeatWheel
+from src.utils.errors import HeartbeatTimeoutError
+
+
+class TestHeartbeat:
+    """Tests for Heartbeat."""
+
+    async def test_ack_records_latency(self) -> None:
+        """Test that an ACK after a beat records round-trip latency."""
+        sent: list[float] = []
+
+        async def send() -> None:
+            sent.append(asyncio.get_running_loop().time())
+
+        heartbeat = Heartbeat(41.25, send)
+        assert heartbeat.latency is None
+
+        await heartbeat.beat()
+        heartbeat.ack()
+
+        assert len(sent) == 1
+        assert heartbeat.latency is not None
+        assert heartbeat.latency >= 0
+        assert heartbeat.last_ack is not None
+
+    async def test_missing_ack_raises(self) -> None:
+        """Test that a beat without ACK is detected as a zombie connection."""
+
+        async def send() -> None:
+            return None
+
+        heartbeat = Heartbeat(0.01, send)
+        with pytest.raises(HeartbeatTimeoutError):
+            await asyncio.wait_for(heartbeat.run(), timeout=1)
+
+    async def test_acked_beats_keep_running(self) -> None:
+        """Test that acknowledged beats never trip zombie detection."""
+        heartbeat: Heartbeat
+
+        async def send() -> None:
+            asyncio.get_running_loop().call_soon(heartbeat.ack)
+
+        heartbeat = Heartbeat(0.01, send)
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(heartbeat.run(), timeout=0.1)
+
+
+def acking(interval: float, wheel: HeartbeatWheel, sent: list[float]) -> Heartbeat:
+    """A heartbeat whose beats are ACKed right away, recording send times."""
+    heartbeat: Heartbeat
+
+    async def send() -> None:
+        loop = asyncio.get_running_loop()
+        sent.append(loop.time())
+        loop.call_soon(heartbeat.ack)
+
+    heartbeat = Heartbeat(interval, send, wheel)
+    return heartbeat
+
+
+class TestHeartbeatWheel:
+    """Tests for HeartbeatWheel."""
+
+    async def test_beats_share_wakeups(self) -> None:
+        """Test that beats due within a slot go out in one wakeup, never late."""
+        wheel = HeartbeatWheel(tolerance=0.04)
+        times: list[list[float]] = [[] for _ in range(10)]
+        # First beats due in pairs, five slots
+        jitter = [i // 2 / 5 for i in range(10)]
+        with patch("src.engine.heartbeat.random.random", side_effect=jitter):
+            tasks = [
+                asyncio.create_task(acking(0.4, wheel, sent).run()) for sent in times
+            ]
+            await asyncio.sleep(0)
+        try:
+            async with asyncio.timeout(2):
+                while wheel.beats < 20:
+                    await asyncio.sleep(0.01)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert wheel.wakeups * 2 <= wheel.beats
+        for sent in times:
+            gap = sent[1] - sent[0]
+            assert 0.4 - 0.04 <= gap < 0.4 + 0.05
+
+    async def test_missing_ack_raises(self) -> None:
+        """Test that a connection without ACKs fails, the others keep beating."""
+        wheel = HeartbeatWheel(tolerance=0.01)
+
+        async def send() -> None:
+            return None
+
+        good: list[float] = []
+        healthy = asyncio.create_task(acking(0.02, wheel, good).run())
+        try:
+            with pytest.raises(HeartbeatTimeoutError):
+                await asyncio.wait_for(Heartbeat(0.02, send, wheel).run(), timeout=1)
+            count = len(good)
+            await asyncio.sleep(0.1)
+            assert len(good) > count
+        finally:
+            healthy.cancel()
+
+    async def test_cancelled_connection_stops_beating(self) -> None:
+        """Test that a connection that ends is dropped from the wheel."""
+        wheel = HeartbeatWheel(tolerance=0.01)
+        sent: list[float] = []
+        task = asyncio.create_task(acking(0.02, wheel, sent).run())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        count = len(sent)
+        await asyncio.sleep(0.1)
+        assert len(sent) == count
+        assert not wheel._slots  # pyright: ignore[reportPrivateUsage]
+
+    async def test_slow_send_holds_up_no_other(self) -> None:
+        """Test that a socket stuck closing doesn't delay beats in its slot."""
+        wheel = HeartbeatWheel(tolerance=0.01)
+
+        async def stuck() -> None:
+            await asyncio.sleep(1)
+
+        sent: list[float] = []
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        with patch("src.engine.heartbeat.random.random", return_value=0):
+            tasks = [
+                asyncio.create_task(Heartbeat(10, stuck, wheel).run()),
+                asyncio.create_task(acking(10, wheel, sent).run()),
+            ]
+            await asyncio.sleep(0)
+        try:
+            async with asyncio.timeout(0.5):
+                while not sent:
+                    await asyncio.sleep(0.01)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert wheel.wakeups == 1
+        assert sent[0] - start < 0.1
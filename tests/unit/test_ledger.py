@@ -0,0 +1,169 @@
+"""Unit tests for the uptime ledger."""
+
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+
+from src.main import print_coverage
+from src.models.results import ConnectionState, SessionState
+from src.utils.ledger import (
+    ALL_SERVERS,
+    GROWTH,
+    HEADER,
+    MAGIC,
+    Ledger,
+    coverage,
+    read_ledger,
+)
+
+
+def _at(day: str, clock: str) -> float:
+    return datetime.fromisoformat(f"{day}T{clock}").timestamp()
+
+
+class TestLedger:
+    """Tests for Ledger."""
+
+    def test_session_transitions_are_recorded(self, tmp_path: Path) -> None:
+        """Test that every state change of an attached session is appended."""
+        ledger = Ledger(tmp_path / "uptime.ledger")
+        session = SessionState(server_index=2)
+        session.attach(lambda _, state: ledger.record(123, state))
+
+        session.mark_disconnected()  # already disconnected, not a change
+        session.mark_connected()
+        session.mark_reconnecting()
+        session.mark_disconnected()
+        ledger.close()
+
+        records, _ = read_ledger(tmp_path / "uptime.ledger")
+        assert [(r.guild_id, r.state) for r in records] == [
+            (123, ConnectionState.CONNECTED),
+            (123, ConnectionState.RECONNECTING),
+            (123, ConnectionState.DISCONNECTED),
+        ]
+
+    def test_reopen_closes_previous_run(self, tmp_path: Path) -> None:
+        """Test that reopening marks every server disconnected at the checkpoint."""
+        path = tmp_path / "uptime.ledger"
+        ledger = Ledger(path)
+        ledger.record(123, ConnectionState.CONNECTED)
+        ledger.close()
+        _, alive = read_ledger(path)
+
+        ledger = Ledger(path)
+        ledger.close()
+
+        records, _ = read_ledger(path)
+        assert len(records) == 2
+        assert records[1].guild_id == ALL_SERVERS
+        assert records[1].state == ConnectionState.DISCONNECTED
+        assert records[1].time == alive
+
+    def test_grows_past_initial_size(self, tmp_path: Path) -> None:
+        """Test that the file is extended when the mapping fills up."""
+        path = tmp_path / "uptime.ledger"
+        ledger = Ledger(path)
+        for i in range(GROWTH + 10):
+            ledger.record(i % 3 + 1, ConnectionState.CONNECTED, float(i))
+        ledger.close()
+
+        records, _ = read_ledger(path)
+        assert len(records) == GROWTH + 10
+        assert records[-1].time == GROWTH + 9
+
+    def test_foreign_file_disables_ledger(self, tmp_path: Path) -> None:
+        """Test that a file that isn't a ledger is left alone."""
+        path = tmp_path / "uptime.ledger"
+        path.write_bytes(b"not a ledger" * 4)
+
+        ledger = Ledger(path)
+        ledger.record(123, ConnectionState.CONNECTED)
+
+        assert not ledger.enabled
+        assert path.read_bytes() == b"not a ledger" * 4
+
+    def test_truncated_file_disables_ledger(self, tmp_path: Path) -> None:
+        """Test that a file shorter than the header is left alone."""
+        path = tmp_path / "uptime.ledger"
+        path.write_bytes(b"DSLG")
+
+        ledger = Ledger(path)
+
+        assert not ledger.enabled
+        assert path.read_bytes() == b"DSLG"
+
+    def test_count_past_the_end_is_rejected(self, tmp_path: Path) -> None:
+        """Test that a count the file can't hold is an error, not a short read."""
+        path = tmp_path / "uptime.ledger"
+        Ledger(path).close()
+        data = bytearray(path.read_bytes())
+        magic, version, _, alive = HEADER.unpack_from(data)
+        HEADER.pack_into(data, 0, magic, version, 2**40, alive)
+        path.write_bytes(bytes(data))
+
+        with pytest.raises(ValueError, match="cut short"):
+            read_ledger(path)
+        assert not Ledger(path).enabled
+
+    def test_older_version_is_moved_aside(self, tmp_path: Path) -> None:
+        """Test that a version 1 ledger is kept next to a fresh one."""
+        path = tmp_path / "uptime.ledger"
+        old = bytearray(HEADER.size + 16)
+        HEADER.pack_into(old, 0, MAGIC, 1, 1, 0.0)
+        path.write_bytes(bytes(old))
+
+        ledger = Ledger(path)
+        ledger.record(123, ConnectionState.CONNECTED)
+        ledger.close()
+
+        assert (tmp_path / "uptime.ledger.v1").read_bytes() == old
+        records, _ = read_ledger(path)
+        assert [r.guild_id for r in records] == [123]
+
+
+class TestCoverage:
+    """Tests for coverage."""
+
+    def test_connected_time_per_day(self, tmp_path: Path) -> None:
+        """Test that intervals are summed per guild and split at midnight."""
+        path = tmp_path / "uptime.ledger"
+        ledger = Ledger(path)
+        ledger.record(111, ConnectionState.CONNECTED, _at("2026-03-01", "22:00"))
+        ledger.record(222, ConnectionState.CONNECTED, _at("2026-03-01", "23:00"))
+        ledger.record(111, ConnectionState.RECONNECTING, _at("2026-03-02", "01:00"))
+        ledger.record(111, ConnectionState.DISCONNECTED, _at("2026-03-02", "01:01"))
+        ledger.record(111, ConnectionState.CONNECTED, _at("2026-03-02", "02:00"))
+        ledger.close()
+
+        report = coverage(path, until=_at("2026-03-02", "03:00"))
+
+        assert report[111] == {
+            date(2026, 3, 1): 2 * 3600,
+            date(2026, 3, 2): 2 * 3600,
+        }
+        assert report[222] == {
+            date(2026, 3, 1): 3600,
+            date(2026, 3, 2): 3 * 3600,
+        }
+
+    def test_restart_stops_the_clock(self, tmp_path: Path) -> None:
+        """Test that a restart marker ends every open interval."""
+        path = tmp_path / "uptime.ledger"
+        ledger = Ledger(path)
+        ledger.record(111, ConnectionState.CONNECTED, _at("2026-03-01", "10:00"))
+        ledger.record(
+            ALL_SERVERS, ConnectionState.DISCONNECTED, _at("2026-03-01", "10:30")
+        )
+        ledger.close()
+
+        report = coverage(path, until=_at("2026-03-01", "12:00"))
+        assert report == {111: {date(2026, 3, 1): 1800}}
+
+    def test_report_of_a_truncated_file_fails(self, tmp_path: Path) -> None:
+        """Test that the coverage command reports a short file as unreadable."""
+        path = tmp_path / "uptime.ledger"
+        path.write_bytes(b"DSLG")
+
+        assert print_coverage(path, 7) == 1
@@ -0,0 +1,77 @@
+"""Unit tests for the background logger."""
+
+import io
+import json
+
+from src.utils.logger import Logger
+
+
+class TestLogger:
+    """Tests for Logger."""
+
+    def test_writes_on_background_thread(self) -> None:
+        """Test that queued lines are written in order once flushed."""
+        stream = io.StringIO()
+        logger = Logger(stream=stream)
+        logger.log("info", "first")
+        logger.log("error", "second")
+        logger.flush()
+
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 2
+        assert "[INFO]" in lines[0]
+        assert lines[0].endswith("first")
+        assert "[ERROR]" in lines[1]
+        logger.close()
+
+    def test_level_filtering(self) -> None:
+        """Test that lines below the configured level are skipped."""
+        stream = io.StringIO()
+        logger = Logger("warn", stream=stream)
+        logger.log("debug", "noise")
+        logger.log("info", "noise")
+        logger.log("warn", "kept")
+        logger.flush()
+
+        assert stream.getvalue().count("\n") == 1
+        assert "kept" in stream.getvalue()
+        logger.close()
+
+    def test_rate_limit_reports_suppressed(self) -> None:
+        """Test that repeated keyed lines are capped per window."""
+        stream = io.StringIO()
+        logger = Logger(stream=stream, rate_limit=2, rate_window=3600)
+        for i in range(5):
+            logger.log("warn", f"reconnect {i}", key="reconnect")
+        logger.log("warn", "unrelated")
+        logger.flush()
+
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 3
+        assert lines[-1].endswith("unrelated")
+
+        # A new window lets lines through again and reports the gap
+        logger.rate_window = 0
+        logger.log("warn", "reconnect 5", key="reconnect")
+        logger.flush()
+        assert (
+            stream.getvalue()
+            .splitlines()[-1]
+            .endswith("reconnect 5 (3 similar suppressed)")
+        )
+        logger.close()
+
+    def test_json_lines(self) -> None:
+        """Test that JSON output carries server and state fields."""
+        stream = io.StringIO()
+        logger = Logger(fmt="json", stream=stream)
+        logger.log("info", "Joined", server=2, state="connected")
+        logger.log("info", "Plain")
+        logger.close()
+
+        first, second = (json.loads(line) for line in stream.getvalue().splitlines())
+        assert first["level"] == "info"
+        assert first["message"] == "Joined"
+        assert first["server"] == 2
+        assert first["state"] == "connected"
+        assert "server" not in second
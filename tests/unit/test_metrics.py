@@ -0,0 +1,88 @@
+"""Unit tests for Prometheus metrics."""
+
+import asyncio
+
+from src.engine.metrics import Histogram, Metrics
+from src.engine.scheduler import IdentifyScheduler
+from src.models.results import SessionState
+
+
+class TestHistogram:
+    """Tests for Histogram."""
+
+    def test_observations_land_in_inclusive_buckets(self) -> None:
+        """Test that values equal to a bound count towards that bucket."""
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        assert histogram.counts == [2, 1, 1]
+        assert histogram.count == 4
+        assert histogram.sum == 3.65
+
+    def test_render_is_cumulative(self) -> None:
+        """Test that rendered buckets are cumulative and end with +Inf."""
+        histogram = Histogram((0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+
+        lines = list(histogram.render("rtt", 'client="1"'))
+        assert lines == [
+            'rtt_bucket{client="1",le="0.1"} 1',
+            'rtt_bucket{client="1",le="1.0"} 2',
+            'rtt_bucket{client="1",le="+Inf"} 2',
+            'rtt_sum{client="1"} 0.55',
+            'rtt_count{client="1"} 2',
+        ]
+
+
+class TestMetrics:
+    """Tests for Metrics."""
+
+    def test_render_reads_session_state(self) -> None:
+        """Test that state and reconnect counters come from SessionState."""
+        metrics = Metrics()
+        session = SessionState(server_index=0)
+        metrics.register(session)
+        session.mark_reconnecting()
+        session.mark_reconnecting()
+        session.mark_connected()
+
+        text = metrics.render()
+        assert 'discord_streak_connection_state{server="1",state="connected"} 1' in text
+        assert 'discord_streak_connection_state{server="1",state="reconnecting"} 0' in (
+            text
+        )
+        assert 'discord_streak_reconnect_attempts{server="1"} 0' in text
+        assert 'discord_streak_reconnects_total{server="1"} 2' in text
+        assert text.endswith("\n")
+
+    def test_client_metrics_are_reused(self) -> None:
+        """Test that a client keeps its counters across lookups."""
+        metrics = Metrics()
+        metrics.client(0).socket.bytes_in += 10
+        metrics.client(0).heartbeat_rtt.observe(0.04)
+
+        text = metrics.render()
+        assert 'discord_streak_socket_received_bytes_total{client="1"} 10' in text
+        assert 'discord_streak_heartbeat_rtt_seconds_count{client="1"} 1' in text
+        assert "# TYPE discord_streak_time_to_ready_seconds histogram" in text
+
+    async def test_identify_waits_and_queue(self) -> None:
+        """Test that identify waits and the queue depth come from the scheduler."""
+        scheduler = IdentifyScheduler(1, window=0.05)
+        metrics = Metrics(scheduler)
+        await scheduler.acquire(0)
+        waiting = asyncio.create_task(scheduler.acquire(1))
+        await asyncio.sleep(0)
+
+        text = metrics.render()
+        assert "discord_streak_identify_wait_seconds_count 1" in text
+        assert "discord_streak_identify_queue_depth 1" in text
+
+        await waiting
+        text = metrics.render()
+        assert "discord_streak_identify_wait_seconds_count 2" in text
+        assert "discord_streak_identify_queue_depth 0" in text
+        assert f"discord_streak_identify_wait_max_seconds {scheduler.max_wait}" in text
+        assert scheduler.max_wait > 0
@@ -1,9 +1,14 @@
 """Unit tests for Pydantic models."""
 
+import json
+from datetime import time
+from pathlib import Path
+from unittest.mock import patch
+
 import pytest
 from pydantic import ValidationError
 
-from src.models.config import Server, Settings
+from src.models.config import Server, Settings, load_schedule, load_servers
 from src.models.results import ConnectionResult, ConnectionState, SessionState
 
 
@@ -51,6 +56,41 @@ class TestSettings:
         assert servers[1].guild_id == "111111111"
         assert servers[1].channel_id == "222222222"
 
+    def test_servers_parsed_once(self, sample_settings: Settings) -> None:
+        """Test that the server list is parsed at load time and cached."""
+        assert sample_settings.servers is sample_settings.servers
+        assert isinstance(sample_settings.servers, tuple)
+
+    def test_servers_file(
+        self,
+        mock_env: dict[str, str],
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path: Path,
+    ) -> None:
+        """Test that a TOML servers file adds entries with their options."""
+        path = tmp_path / "servers.toml"
+        path.write_text(
+            "[[servers]]\n"
+            'guild_id = "333"\n'
+            'channel_id = "444"\n'
+            "\n"
+            "[[servers]]\n"
+            "guild_id = 555\n"
+            "channel_id = 666\n"
+            "self_deaf = false\n"
+        )
+        monkeypatch.setenv("DISCORD_SERVERS_FILE", str(path))
+        settings = Settings()  # pyright: ignore[reportCallIssue]
+
+        assert [server.guild_id for server in settings.servers] == [
+            "123456789",
+            "111111111",
+            "333",
+            "555",
+        ]
+        assert settings.servers[2].self_deaf
+        assert not settings.servers[3].self_deaf
+
     def test_default_status(self, monkeypatch: pytest.MonkeyPatch) -> None:
         """Test default status value."""
         # Clear any existing .env file influence by setting env vars directly
@@ -70,6 +110,92 @@ class TestSettings:
         settings = TestSettings()  # pyright: ignore[reportCallIssue]
         assert settings.status == "online"
 
+    def test_missing_event_loop(
+        self, mock_env: dict[str, str], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that choosing a loop that isn't installed is a config error."""
+        monkeypatch.setenv("DISCORD_EVENT_LOOP", "uvloop")
+
+        with (
+            patch("importlib.util.find_spec", return_value=None),
+            pytest.raises(ValidationError, match="uvloop is not installed"),
+        ):
+            Settings()  # pyright: ignore[reportCallIssue]
+
+
+class TestLoadServers:
+    """Tests for load_servers."""
+
+    def test_json_list(self, tmp_path: Path) -> None:
+        """Test a JSON servers file holding a bare list."""
+        path = tmp_path / "servers.json"
+        path.write_text(json.dumps([{"guild_id": "1", "channel_id": "2"}] * 2))
+        assert load_servers("", path) == (Server(guild_id="1", channel_id="2"),)
+
+    def test_errors_name_every_entry(self, tmp_path: Path) -> None:
+        """Test that every invalid entry is reported by its position."""
+        path = tmp_path / "servers.json"
+        path.write_text(
+            json.dumps(
+                {"servers": [{"guild_id": "1", "channel_id": "2"}, {"guild_id": "x"}]}
+            )
+        )
+        with pytest.raises(ValueError, match="Invalid servers") as info:
+            load_servers("1:2, nocolon ,3:abc", path)
+
+        message = str(info.value)
+        assert (
+            'DISCORD_SERVERS entry 2 "nocolon": expected guild_id:channel_id' in message
+        )
+        assert 'DISCORD_SERVERS entry 3 "3:abc": channel_id: Value error' in message
+        assert f"{path} servers[1] (guild x): guild_id: Value error" in message
+        assert f"{path} servers[1] (guild x): channel_id: Field required" in message
+        assert "entry 1" not in message
+
+    def test_unreadable_file(self, tmp_path: Path) -> None:
+        """Test that a broken servers file names the file."""
+        path = tmp_path / "servers.toml"
+        path.write_text("[[servers]\n")
+        with pytest.raises(ValueError, match="Cannot parse servers file"):
+            load_servers("", path)
+
+    def test_no_servers(self) -> None:
+        """Test that an empty configuration is rejected."""
+        with pytest.raises(ValueError, match="No servers configured"):
+            load_servers(" , ")
+
+
+class TestLoadSchedule:
+    """Tests for load_schedule and StatusWindow."""
+
+    def test_windows(self) -> None:
+        """Test parsing, including a window that runs past midnight."""
+        night, lunch = load_schedule("idle@23:00-07:00, dnd@12:00-12:30,")
+        assert (night.status, night.start, night.end) == ("idle", time(23), time(7))
+        assert night.contains(time(23, 30))
+        assert night.contains(time(6, 59))
+        assert not night.contains(time(7))
+        assert lunch.contains(time(12))
+        assert not lunch.contains(time(12, 30))
+
+    def test_errors_name_every_entry(self) -> None:
+        """Test that every invalid entry is reported by its position."""
+        with pytest.raises(ValueError, match="Invalid status schedule") as info:
+            load_schedule("idle@23:00,away@01:00-02:00,dnd@01:00-01:00")
+
+        message = str(info.value)
+        assert 'entry 1 "idle@23:00": expected status@HH:MM-HH:MM' in message
+        assert 'entry 2 "away@01:00-02:00": status: Input should be' in message
+        assert 'entry 3 "dnd@01:00-01:00": Value error, start and end' in message
+
+    def test_settings(
+        self, mock_env: dict[str, str], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that settings parse DISCORD_STATUS_SCHEDULE once."""
+        monkeypatch.setenv("DISCORD_STATUS_SCHEDULE", "idle@00:00-08:00")
+        settings = Settings()  # pyright: ignore[reportCallIssue]
+        assert [w.status for w in settings.schedule] == ["idle"]
+
 
 class TestSessionState:
     """Tests for SessionState model."""
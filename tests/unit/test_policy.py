@@ -0,0 +1,43 @@
+"""Unit tests for the reconnect policy."""
+
+from websockets.exceptions import ConnectionClosedError
+from websockets.frames import Close
+
+from src.engine.policy import Recovery, classify, close_code
+from src.utils.errors import HeartbeatTimeoutError, ReconnectRequestedError
+
+
+def closed(code: int) -> ConnectionClosedError:
+    """A close received from the gateway."""
+    return ConnectionClosedError(Close(code, ""), None)
+
+
+class TestClassify:
+    """Tests for classify."""
+
+    def test_fatal_codes(self) -> None:
+        """Test that a rejected token or intents stop the engine."""
+        for code in (4004, 4010, 4011, 4012, 4013, 4014):
+            assert classify(closed(code)) == Recovery.FATAL
+
+    def test_session_codes_identify(self) -> None:
+        """Test that closes which end the session start a new one."""
+        assert classify(closed(4007)) == Recovery.IDENTIFY
+        assert classify(closed(4009)) == Recovery.IDENTIFY
+
+    def test_other_codes_resume(self) -> None:
+        """Test that other closes and errors back off and resume."""
+        assert classify(closed(4000)) == Recovery.RESUME
+        assert classify(closed(1001)) == Recovery.RESUME
+        assert classify(OSError()) == Recovery.RESUME
+
+    def test_reconnect_request_is_immediate(self) -> None:
+        """Test that op 7 and a zombie connection reconnect without backoff."""
+        assert classify(ReconnectRequestedError()) == Recovery.IMMEDIATE
+        assert classify(HeartbeatTimeoutError()) == Recovery.IMMEDIATE
+
+    def test_close_code(self) -> None:
+        """Test reading the received close code."""
+        assert close_code(closed(4004)) == 4004
+        assert close_code(ConnectionClosedError(None, None)) is None
+        assert close_code(OSError()) is None
@@ -0,0 +1,105 @@
+"""Unit tests for the presence manager."""
+
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+from src.engine.presence import PresenceManager
+from src.engine.runner import DiscordClient
+from src.models.config import load_schedule
+
+
+class Clock:
+    """A wall clock the test moves by hand."""
+
+    def __init__(self, now: datetime) -> None:
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+class TestPresenceManager:
+    """Tests for PresenceManager."""
+
+    def test_schedule_overrides_default(self) -> None:
+        """Test that the first window covering the time decides the status."""
+        clock = Clock(datetime(2026, 1, 1, 23, 30))
+        schedule = load_schedule("dnd@23:00-23:45,idle@22:00-07:00")
+        presence = PresenceManager("online", schedule, clock=clock)
+
+        assert presence.status == "dnd"
+        clock.now = datetime(2026, 1, 2, 6)
+        assert presence.current() == "idle"
+        clock.now = datetime(2026, 1, 2, 12)
+        assert presence.current() == "online"
+
+    def test_next_change(self) -> None:
+        """Test the wait until the nearest window boundary, wrapping at midnight."""
+        clock = Clock(datetime(2026, 1, 1, 23, 0))
+        presence = PresenceManager(
+            "online", load_schedule("idle@22:00-07:00"), clock=clock
+        )
+        assert presence.next_change() == 8 * 3600
+        clock.now = datetime(2026, 1, 1, 21, 59, 30)
+        assert presence.next_change() == 30
+        assert PresenceManager().next_change() is None
+
+    def test_register_sets_status(self) -> None:
+        """Test that a new client identifies with the status due now."""
+        presence = PresenceManager("dnd")
+        client = DiscordClient("token", "online", 0, 0)
+        presence.register(client)
+        assert client.status == "dnd"
+
+    async def test_unchanged_status_sends_nothing(self) -> None:
+        """Test that only real changes reach the clients."""
+        presence = PresenceManager("online")
+        client = DiscordClient("token", "online", 0, 0)
+        client.set_status = AsyncMock()
+        presence.register(client)
+
+        await presence.set_status("online")
+        client.set_status.assert_not_awaited()
+        await presence.set_status("idle")
+        await presence.set_status("idle")
+        client.set_status.assert_awaited_once_with("idle")
+
+    async def test_client_skips_same_status(self) -> None:
+        """Test that a client doesn't resend the status its socket shows."""
+        client = DiscordClient("token", "online", 0, 0)
+        client.connection = AsyncMock()
+        client.ready = True
+        client.shown_status = "online"
+        await client.set_status("online")
+        client.connection.send_encoded.assert_not_awaited()
+        await client.set_status("idle")
+        client.connection.send_encoded.assert_awaited_once()
+
+    async def test_client_waits_for_ready(self) -> None:
+        """Test that no update goes out before READY, IDENTIFY carries it."""
+        client = DiscordClient("token", "online", 0, 0)
+        client.connection = AsyncMock()
+        await client.set_status("idle")
+        client.connection.send_encoded.assert_not_awaited()
+        assert client.status == "idle"
+
+    async def test_run_follows_schedule(self) -> None:
+        """Test that run() switches the status when a window starts."""
+        clock = Clock(datetime(2026, 1, 1, 21, 59, 59, 950000))
+        presence = PresenceManager(
+            "online", load_schedule("idle@22:00-07:00"), clock=clock
+        )
+        client = DiscordClient("token", "online", 0, 0)
+        presence.register(client)
+
+        task = asyncio.create_task(presence.run())
+        try:
+            # Let it start waiting for the boundary 50ms away
+            await asyncio.sleep(0)
+            clock.now = datetime(2026, 1, 1, 22)
+            async with asyncio.timeout(1):
+                while client.status != "idle":
+                    await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
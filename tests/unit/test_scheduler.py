@@ -0,0 +1,51 @@
+"""Unit tests for the identify scheduler."""
+
+import asyncio
+
+from src.engine.scheduler import IdentifyScheduler
+
+
+class TestIdentifyScheduler:
+    """Tests for IdentifyScheduler."""
+
+    async def test_immediate_within_concurrency(self) -> None:
+        """Test that up to max_concurrency clients identify right away."""
+        scheduler = IdentifyScheduler(max_concurrency=2, window=10)
+
+        waits = await asyncio.gather(scheduler.acquire(0), scheduler.acquire(1))
+
+        assert all(wait < 0.05 for wait in waits)
+        assert scheduler.granted == 2
+
+    async def test_waiters_released_per_window_in_index_order(self) -> None:
+        """Test that queued clients identify one window later, lowest index first."""
+        scheduler = IdentifyScheduler(max_concurrency=1, window=0.05)
+        order: list[int] = []
+
+        async def identify(index: int) -> None:
+            await scheduler.acquire(index)
+            order.append(index)
+
+        await scheduler.acquire(9)
+        tasks = [asyncio.create_task(identify(i)) for i in (3, 1, 2)]
+        await asyncio.sleep(0)
+        assert scheduler.queued == 3
+
+        await asyncio.gather(*tasks)
+
+        assert order == [1, 2, 3]
+        assert scheduler.max_wait >= 0.1
+        assert scheduler.total_wait >= scheduler.max_wait
+
+    async def test_cancelled_waiter_skipped(self) -> None:
+        """Test that a cancelled waiter doesn't consume a slot."""
+        scheduler = IdentifyScheduler(max_concurrency=1, window=0.05)
+        await scheduler.acquire(0)
+
+        cancelled = asyncio.create_task(scheduler.acquire(1))
+        waiting = asyncio.create_task(scheduler.acquire(2))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        wait = await asyncio.wait_for(waiting, timeout=1)
+        assert wait < 0.1